@@ -1,62 +1,64 @@
-from fastapi import Depends, FastAPI, Request
-import uvicorn
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 import logging
-from opentelemetry import trace
-from opentelemetry.sdk.trace.export import (
-    ConsoleSpanExporter,
-    SimpleSpanProcessor,
-)
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.resources import SERVICE_NAME, Resource
-from opentelemetry.propagate import inject
-import uuid
+import os
 from app.routers import recipes
-
-import watchtower
-import boto3
-"""
-boto3_client = boto3.client('logs', region_name='us-east-1')
-# Configure CloudWatch logging
-cloudwatch_handler = watchtower.CloudWatchLogHandler(
-    # boto3_session=boto3.Session(region_name="us-east-1"),
-    boto3_client=boto3_client,
-    log_group="recipe_management_logs",
-    stream_name="application_logs"
+from app.services import service_metrics
+from app.services.service_factory import ServiceFactory
+from framework.middleware.correlation_id import CorrelationIdFilter, CorrelationIdMiddleware
+from framework.middleware.metrics import RequestMetricsMiddleware
+from framework.utils import metrics
+from framework.utils.telemetry import configure_logging, configure_tracing
+
+def configure_cloudwatch_logging():
+    # boto3 and watchtower take about 0.1 s to import, so they are only loaded when enabled.
+    import boto3
+    import watchtower
+
+    boto3_client = boto3.client('logs', region_name='us-east-1')
+    # Configure CloudWatch logging
+    cloudwatch_handler = watchtower.CloudWatchLogHandler(
+        # boto3_session=boto3.Session(region_name="us-east-1"),
+        boto3_client=boto3_client,
+        log_group="recipe_management_logs",
+        stream_name="application_logs"
+    )
+    # Handed to the log queue listener, so requests never wait on CloudWatch.
+    return cloudwatch_handler
+
+def env_flag(name: str) -> bool:
+    return os.environ.get(name, "").lower() in ("1", "true", "yes")
+
+# Logging goes through a bounded queue; formatting and writing happen on a listener thread.
+log_handler = logging.StreamHandler()
+log_handler.setFormatter(logging.Formatter(
+    "%(asctime)s %(levelname)s: [Correlation-ID: %(correlation_id)s] %(message)s"
+))
+log_handlers = [log_handler]
+if env_flag("RECIPE_CLOUDWATCH_LOGGING"):
+    log_handlers.append(configure_cloudwatch_logging())
+log_listener = configure_logging(
+    log_handlers,
+    level=os.environ.get("RECIPE_LOG_LEVEL", "INFO").upper(),
+    filters=[CorrelationIdFilter()]
 )
 
-# Add CloudWatch handler to the root logger
-logging.getLogger().addHandler(cloudwatch_handler)
-logging.info("CloudWatch Logging is configured.")
-"""
-# Configure global logging without hardcoding `correlation_id`
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s %(levelname)s: %(message)s"
+# Spans are exported to the console in batches, from a background thread.
+# RECIPE_TRACE_SAMPLE_RATE is the fraction of requests traced (0 turns tracing off); of those,
+# slow (RECIPE_TRACE_SLOW_MS) and failed requests are exported, the rest with probability
+# RECIPE_TRACE_KEEP_RATE.
+tracer_provider = configure_tracing(
+    "recipe_management",
+    sample_ratio=float(os.environ.get("RECIPE_TRACE_SAMPLE_RATE", "1.0")),
+    keep_ratio=float(os.environ.get("RECIPE_TRACE_KEEP_RATE", "0.1")),
+    slow_threshold=float(os.environ.get("RECIPE_TRACE_SLOW_MS", "500")) / 1000
 )
 
-# Define a custom logger adapter to handle `correlation_id`
-class CorrelationIdAdapter(logging.LoggerAdapter):
-    def process(self, msg, kwargs):
-        correlation_id = self.extra.get("correlation_id", "N/A")
-        return f"[Correlation-ID: {correlation_id}] {msg}", kwargs
-
-# Create a logger instance with adapter
-logger = CorrelationIdAdapter(logging.getLogger(__name__), {"correlation_id": "N/A"})
-
-# Initialize OpenTelemetry
-tracer_provider = TracerProvider(resource=Resource.create({SERVICE_NAME: "recipe_management"}))
-trace.set_tracer_provider(tracer_provider)
-tracer = trace.get_tracer(__name__)
-
-# Export spans to the console
-span_exporter = ConsoleSpanExporter()
-span_processor = SimpleSpanProcessor(span_exporter)
-tracer_provider.add_span_processor(span_processor)
-
+# Services are built on first use; the lifespan runs their startup and shutdown hooks.
 app = FastAPI(
     title="Recipe Management API",
-    description="API for managing and retrieving recipes"
+    description="API for managing and retrieving recipes",
+    lifespan=ServiceFactory.lifespan
 )
 
 # Enable CORS
@@ -68,28 +70,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Middleware for correlation ID and logging
-@app.middleware("http")
-async def add_correlation_id_and_logging(request: Request, call_next):
-    correlation_id = request.headers.get("X-Trace-Id", str(uuid.uuid4()))
-    request.state.correlation_id = correlation_id
+# Request latency by route and status, for /metrics
+app.add_middleware(RequestMetricsMiddleware)
 
-    # Update the logger's correlation_id for this request
-    logger.extra["correlation_id"] = correlation_id
-
-    # Log the incoming request
-    logger.info(f"Incoming request: {request.method} {request.url}")
-
-    # Start OpenTelemetry span
-    with trace.get_tracer(__name__).start_as_current_span(
-        f"{request.method} {request.url}",
-        attributes={"correlation_id": correlation_id}
-    ):
-        response = await call_next(request)
-
-    # Log the outgoing response
-    logger.info(f"Outgoing response: {response.status_code}")
-    return response
+# Correlation ID, request span and request log line
+app.add_middleware(CorrelationIdMiddleware, header="X-Correlation-ID", request_headers=("X-Trace-Id",))
 
 # Include routers
 app.include_router(recipes.router)
@@ -98,5 +83,16 @@ app.include_router(recipes.router)
 async def root():
     return {"message": "Hello Bigger Applications!"}
 
+# Cache and connection pool counters are read when scraped.
+service_metrics.register()
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """
+    Prometheus scrape endpoint.
+    """
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
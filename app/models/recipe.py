@@ -2,6 +2,24 @@ from __future__ import annotations
 from typing import Optional, List
 from pydantic import BaseModel, HttpUrl
 
+def parse_ingredient_ids(value) -> List[int]:
+    """
+    Normalize the comma separated ingredient_id column ("1, 2, 3") into a sorted list of
+    unique ints. Blank and non-numeric entries are skipped.
+    """
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        parts = value
+    else:
+        parts = str(value).split(",")
+    ids = set()
+    for part in parts:
+        part = str(part).strip()
+        if part.isdigit():
+            ids.add(int(part))
+    return sorted(ids)
+
 class Link(BaseModel):
     rel: str
     href: str
@@ -11,6 +29,23 @@ class Pagination(BaseModel):
     offset: int
     limit: int
     total_count: int
+    total_count_type: str = "exact"  # exact, cached or approximate
+    next_cursor: Optional[str] = None  # opaque token for the next page in cursor mode
+
+class BatchItemResult(BaseModel):
+    index: int  # position in the request body
+    status: str  # created or failed
+    recipe_id: Optional[int] = None
+    error: Optional[str] = None
+
+class BatchCreateResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BatchItemResult]
+
+class MultiRecipeResponse(BaseModel):
+    data: List[Optional[RecipeSection]]  # in request order, null where missing
+    missing: List[int]
 
 class PaginatedRecipeResponse(BaseModel):
     data: List[RecipeSection]
@@ -29,7 +64,7 @@ class RecipeSection(BaseModel):
     cooking_time: Optional[int] = None
     create_time: Optional[str] = None
     # pictures: Optional[List[HttpUrl]] = None  # List of URLs to pictures
-    pictures: Optional[str]
+    pictures: Optional[str] = None  # may be left out of sparse fieldsets
     links: Optional[List[Link]] = None
 
     class Config:
@@ -1,8 +1,19 @@
 from typing import Any, List, Optional
 from framework.resources.base_resource import BaseResource
-from app.models.recipe import RecipeSection
+from app.models.recipe import RecipeSection, Pagination, parse_ingredient_ids
 from app.services.service_factory import ServiceFactory
+from app.services.recipe_import import RecipeImporter
+from app.services.recipe_serializer import VALIDATION_SECONDS
+from framework.services.cache.BaseCache import MISSING, NOT_FOUND
+from framework.utils.cursor import encode_cursor, decode_cursor
 from datetime import datetime
+import asyncio
+import json
+import time
+
+# Shared by all RecipeResource instances so concurrent requests build the indexes once.
+_index_lock = asyncio.Lock()
+_replica_lock = asyncio.Lock()
 
 class RecipeResource(BaseResource):
 
@@ -11,72 +22,831 @@ class RecipeResource(BaseResource):
 
         # TODO -- Replace with dependency injection.
         #
-        self.data_service = ServiceFactory.get_service("RecipeResourceDataService")
+        self.data_service = ServiceFactory.get_service("RecipeResourceAsyncDataService")
+        self.cache = ServiceFactory.get_service("RecipeCache")
+        self.shared_cache = ServiceFactory.get_service("RecipeSharedCache")
+        self.count_cache = ServiceFactory.get_service("RecipeCountCache")
+        self.validators = ServiceFactory.get_service("RecipeValidatorCache")
+        self.table_version = ServiceFactory.get_service("RecipeTableVersion")
+        self.search_index = ServiceFactory.get_service("RecipeSearchIndex")
+        self.ingredient_index = ServiceFactory.get_service("RecipeIngredientIndex")
+        self.replica = ServiceFactory.get_service("RecipeReplica")
+        self.flights = ServiceFactory.get_service("RecipeReadFlights")
+        self.id_allocator = ServiceFactory.get_service("RecipeIdAllocator")
+        self.search_index_max_age = (config or {}).get("search_index_max_age", 3600)
+        # Table version the search and ingredient indexes were last brought up to date with.
+        self._indexed_version = None
         self.database = "recipe_management"
         self.collection = "Recipe"
         self.key_field = "recipe_id"
-        self.current_recipe_id = int(datetime.now().strftime('%Y%m%d%H%M%S')) - 20240000000000
+        self.sortable_fields = ("recipe_id", "create_time", "rating")
+        # Types a cursor's sort value may have for each sort field, besides None.
+        self.sort_value_types = {"recipe_id": (int,), "create_time": (str,), "rating": (int, float)}
+        self.count_strategies = ("exact", "cached", "approximate", "single_query")
+        self.count_strategy = (config or {}).get("count_strategy", "exact")
 
 
-    def get_by_key(self, key: str) -> RecipeSection:
-        d_service = self.data_service # get recipe data from db
+    async def get_by_key(self, key: str, raw: bool = False,
+                         fields: Optional[List[str]] = None) -> Optional[RecipeSection]:
+        """
+        :param raw: Return the row as a dict instead of a model, for the serialization fast path.
+        :param fields: Only return these fields (plus the key), validated with check_fields().
+            A cached full row is projected; otherwise only these columns are read and the
+            partial row is not cached.
+
+        With the read replica enabled the recipe is served from memory; recipes it does not
+        have, which may have been created since it was refreshed, are read through the cache.
+        Concurrent reads of the same uncached recipe share one query, unless it was written in
+        between.
+        """
+        key = self._canonical_key(key)
+        if key is None:
+            return None
+        if await self._ensure_replica():
+            record = self.replica.get(key, self._columns(fields))
+            if record is not None:
+                return record if raw else self._to_model(record)
+
+        version = self.table_version.key_version(key)
+        result = self.cache.get(self._cache_key(key, version)) if self.cache is not None else MISSING
+        if result is NOT_FOUND:
+            return None
+
+        if result is MISSING:
+            columns = self._columns(fields)
+            result = await self.flights.do(("recipe", key, version, tuple(columns or ())),
+                                           lambda: self._fetch_recipe(key, columns, version))
+            if result is None:
+                return None
+
+        # Return a fresh copy per call; handlers mutate it (links, picture URL).
+        if fields:
+            result = {column: result.get(column) for column in self._columns(fields)}
+        if raw:
+            return dict(result)
+        result = self._to_model(result) # store result as Recipe model
+        return result
 
-        result = d_service.get_data_object(
-            self.database, self.collection, key_field=self.key_field, key_value=key
+    async def _fetch_recipe(self, key: str, columns: Optional[List[str]], version: int) -> Optional[dict]:
+        # Read one recipe from the database and cache it; shared by coalesced get_by_key() calls.
+        # A failed query raises, so only a recipe the query did not find is cached as missing.
+        # version is the key's version before the read; if the recipe was written since, the
+        # result may predate the write and is not cached.
+        d_service = self.data_service # get recipe data from db
+        result = await d_service.get_data_object(
+            self.database, self.collection, key_field=self.key_field, key_value=key, columns=columns
         )
+        cacheable = self.cache is not None and self.table_version.key_version(key) == version
+        if result is None:
+            if cacheable:
+                self.cache.set(self._cache_key(key, version), NOT_FOUND)
+            return None
 
-        result['create_time'] = str(result['create_time'])
-        result = RecipeSection(**result) # store result as Recipe model
+        result = self._normalize_row(result)
+        if cacheable and not columns:
+            self.cache.set(self._cache_key(key, version), result)
         return result
 
-    def get_paginated(self, skip: int = 0, limit: int = 10, filter_by: Optional[str] = None) -> (
-    List[RecipeSection], int):
+    @staticmethod
+    def _cache_key(key: str, version: int) -> str:
+        # Entries stored before a write to the key are no longer looked up after it.
+        return f"{key}@{version}"
+
+    async def get_many(self, keys: List[str], raw: bool = False) -> List[Optional[RecipeSection]]:
+        """
+        Look up many recipes with a single IN query for the keys that are not cached.
+
+        :param keys: Recipe IDs in the order the caller wants them back.
+        :param raw: Return row dicts (or replica records) instead of models. They may be shared
+            with the cache and must not be modified.
+        :return: One entry per key, in the same order; None where the recipe does not exist.
+        """
+        found = {}
+        to_fetch = {}  # key -> its version before the read
+        keys = [self._canonical_key(key) for key in keys]
+        unique_keys = [key for key in dict.fromkeys(keys) if key is not None]
+        use_replica = await self._ensure_replica()
+        replicated = self.replica.get_many(unique_keys) if use_replica else {}
+        for key in unique_keys:
+            # Keys the replica does not have may have been created since it was refreshed.
+            record = replicated.get(int(key))
+            if record is not None:
+                found[key] = record
+                continue
+            version = self.table_version.key_version(key)
+            cached = self.cache.get(self._cache_key(key, version)) if self.cache is not None else MISSING
+            if cached is MISSING:
+                to_fetch[key] = version
+            elif cached is not NOT_FOUND:
+                found[key] = cached
+
+        if to_fetch:
+            # A failed query raises, so keys absent from the result do not exist.
+            rows = await self.data_service.get_data_objects(
+                self.database, self.collection, key_field=self.key_field, key_values=list(to_fetch)
+            )
+            for row in rows:
+                row = self._normalize_row(row)
+                found[str(row[self.key_field])] = row
+            if self.cache is not None:
+                for key, version in to_fetch.items():
+                    # Skip keys written during the read, see _fetch_recipe().
+                    if self.table_version.key_version(key) == version:
+                        self.cache.set(self._cache_key(key, version), found.get(key, NOT_FOUND))
+
+        if raw:
+            return [found.get(key) for key in keys]
+        started = time.perf_counter()
+        models = [RecipeSection(**found[key]) if key in found else None for key in keys]
+        VALIDATION_SECONDS.labels("RecipeSection").observe(time.perf_counter() - started)
+        return models
+
+    def check_fields(self, fields: Optional[List[str]]) -> Optional[List[str]]:
+        """
+        Validate a column projection against the RecipeSection model.
+
+        :return: The fields with duplicates removed, or None for all columns.
+        :raises ValueError: On an unknown field.
+        """
+        if not fields:
+            return None
+        allowed = [name for name in RecipeSection.model_fields if name != "links"]
+        unknown = [field for field in fields if field not in allowed]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+        return list(dict.fromkeys(fields))
+
+    def _columns(self, fields: Optional[List[str]]) -> Optional[List[str]]:
+        """
+        SQL column list for a checked field list. The key is always read, it is needed for links.
+        """
+        if not fields:
+            return None
+        return [self.key_field] + [field for field in fields if field != self.key_field]
+
+    def export_rows(self, fields: Optional[List[str]] = None):
+        """
+        Generator over every recipe row as a plain dict, straight from a server-side cursor and
+        normalized like the rows of API responses. It blocks, so iterate it in a worker thread.
+        """
+        rows = self.data_service.stream_data(self.database, self.collection, columns=self.check_fields(fields),
+                                             order_by=self.key_field)
+        return (self._normalize_row(row) for row in rows)
+
+    def invalidate(self, *keys: Any):
+        """
+        Drop any cached copy of the recipes, including a cached 'not found', and their ETags,
+        and move the table version on, once for all the keys, so that every worker's cached
+        entries for them, cached counts and list page ETags go stale.
+        """
+        keys = [key for key in map(self._canonical_key, keys) if key is not None]
+        for key in keys:
+            version = self.table_version.key_version(key)
+            if self.cache is not None:
+                self.cache.invalidate(self._cache_key(key, version))
+            if self.validators is not None:
+                self.validators.invalidate(f"recipe:{self._cache_key(key, version)}")
+        # Reads already in flight may have started before the write.
+        self.flights.forget()
+        # Shared bodies are keyed by version as well and age out of the shared cache.
+        self.table_version.bump(keys)
+
+    def get_encoded(self, key: Any, variant: str) -> Optional[bytes]:
+        """
+        A recipe's response body as rendered by any worker on this host, see set_encoded().
+
+        :param variant: Everything else the body depends on, e.g. the picture size.
+        :return: The body, or None if it is not cached.
+        """
+        key = self._canonical_key(key)
+        if self.shared_cache is None or key is None:
+            return None
+        body = self.shared_cache.get((key, f"{variant}@{self.table_version.key_version(key)}"))
+        return body if body is not MISSING and body is not NOT_FOUND else None
+
+    def set_encoded(self, key: Any, variant: str, body: bytes, version: Optional[int]):
+        """
+        Share a rendered response body with the other workers. Bodies rendered from the read
+        replica are not shared: it may not have seen the other workers' writes yet.
+
+        :param version: version(key) read before the recipe was fetched. If the recipe was
+            written since, the body may already be stale and is not stored.
+        """
+        key = self._canonical_key(key)
+        if self.shared_cache is None or self.replica is not None or key is None \
+                or version != self.table_version.key_version(key):
+            return
+        self.shared_cache.set((key, f"{variant}@{version}"), body)
+
+    @staticmethod
+    def _canonical_key(key: Any) -> Optional[str]:
+        """
+        The one spelling of a recipe ID that cached entries are keyed by: '007', which the
+        database matches to recipe 7, and 7 both become '7'. None if key is not a recipe ID.
+        """
+        if isinstance(key, int) and not isinstance(key, bool):
+            return str(key) if key >= 0 else None
+        if isinstance(key, str) and key.isascii() and key.isdigit():
+            return str(int(key))
+        return None
+
+    def version(self, key: Any = None) -> Optional[int]:
+        """
+        Version to pass to set_etag(), read before the data is fetched.
+
+        :param key: The recipe ID for a single recipe, None for a list page.
+        :return: The version, or None if key is not a recipe ID.
+        """
+        if key is None:
+            return self.table_version.value
+        key = self._canonical_key(key)
+        return self.table_version.key_version(key) if key is not None else None
+
+    def get_etag(self, key: Any, variant: str) -> Optional[str]:
+        """
+        ETag of a response rendered earlier, if no write has invalidated it since. Lets a
+        conditional GET be answered without reading the recipe.
+
+        :param key: The recipe ID for a single recipe, None for a list page.
+        :param variant: Everything else the body depends on, e.g. the query string.
+        :return: The ETag, or None if unknown.
+        """
+        if self.validators is None:
+            return None
+        if key is not None:
+            key = self._canonical_key(key)
+            if key is None:
+                return None
+            # Keyed by the recipe's version, so a write through any worker makes them stale.
+            etags = self.validators.get(f"recipe:{self._cache_key(key, self.table_version.key_version(key))}")
+            return etags.get(variant) if etags is not MISSING else None
+
+        entry = self.validators.get(f"list:{variant}")
+        if entry is MISSING:
+            return None
+        # Any write may change any list page.
+        version, etag = entry
+        return etag if version == self.table_version.value else None
+
+    def set_etag(self, key: Any, variant: str, etag: str, version: Optional[int]):
+        """
+        Remember the ETag of a rendered response, see get_etag().
+
+        :param version: version(key) read before the data was fetched. If a write happened
+            since, the body may already be stale and the ETag is not stored.
+        """
+        if self.validators is None or version is None:
+            return
+        if key is not None:
+            key = self._canonical_key(key)
+            if key is None or version != self.table_version.key_version(key):
+                return
+            validator_key = f"recipe:{self._cache_key(key, version)}"
+            etags = self.validators.get(validator_key)
+            etags = dict(etags) if etags is not MISSING else {}
+            etags[variant] = etag
+            self.validators.set(validator_key, etags)
+        elif version == self.table_version.value:
+            self.validators.set(f"list:{variant}", (version, etag))
+
+    @staticmethod
+    def _normalize_row(result: dict) -> dict:
+        if "create_time" in result and isinstance(result["create_time"], datetime):
+            result["create_time"] = result["create_time"].strftime("%Y-%m-%d %H:%M:%S")
+        return result
+
+    @staticmethod
+    def _to_model(row: dict) -> RecipeSection:
+        started = time.perf_counter()
+        model = RecipeSection(**row)
+        VALIDATION_SECONDS.labels("RecipeSection").observe(time.perf_counter() - started)
+        return model
+
+    @staticmethod
+    def _to_models(rows: List[dict], raw: bool) -> list:
+        if raw:
+            return rows
+        started = time.perf_counter()
+        models = [RecipeSection(**row) for row in rows]
+        VALIDATION_SECONDS.labels("RecipeSection").observe(time.perf_counter() - started)
+        return models
+
+    def _check_sort_field(self, sort_by: Optional[str]) -> str:
+        sort_by = sort_by or self.key_field
+        if sort_by not in self.sortable_fields:
+            raise ValueError(f"Cannot sort by '{sort_by}'. Allowed: {', '.join(self.sortable_fields)}")
+        return sort_by
+
+    @staticmethod
+    def _check_page(skip: int, limit: int):
+        if skip < 0 or limit < 1:
+            raise ValueError("offset must be at least 0 and limit at least 1")
+
+    def _check_cursor(self, after: dict, sort_by: str):
+        """
+        :raises ValueError: If the cursor's position does not fit the key and sort columns; it
+            would otherwise be compared with them in SQL.
+        """
+        key, sort = after["key"], after.get("sort")
+        if not isinstance(key, int) or isinstance(key, bool) or \
+                (sort is not None and (isinstance(sort, bool) or not isinstance(sort, self.sort_value_types[sort_by]))):
+            raise ValueError("Invalid cursor: position does not match the sort order")
+
+    def _count_cache_key(self, query_filter: dict) -> str:
+        return json.dumps(sorted(query_filter.items()), default=str)
+
+    async def _get_total_count(self, query_filter: dict, strategy: str) -> (int, str):
+        """
+        Count the rows matching query_filter using the given strategy.
+
+        :return: (total_count, total_count_type). Approximate counts only exist for the whole
+            table, so a filtered 'approximate' request is served from the cached count instead.
+        """
+        if strategy == "approximate" and not query_filter:
+            estimate = await self.data_service.get_approximate_count(self.database, self.collection)
+            return estimate, "approximate"
+
+        # Any write can change the count for any filter, so counts are keyed by the table version.
+        version = self.table_version.value
+        if strategy in ("cached", "approximate") and self.count_cache is not None:
+            cache_key = f"{version}:{self._count_cache_key(query_filter)}"
+            total_count = self.count_cache.get(cache_key)
+            if total_count is not MISSING:
+                return total_count, "cached"
+            total_count = await self._count(query_filter, version)
+            # A count that ran while a write happened may not include it.
+            if self.table_version.value == version:
+                self.count_cache.set(cache_key, total_count)
+            return total_count, "exact"
+
+        return await self._count(query_filter, version), "exact"
+
+    async def _count(self, query_filter: dict, version: int) -> int:
+        # Concurrent counts with the same filter, e.g. for different pages, share one query
+        # unless a write happened in between. A failed count raises and is not cached.
+        return await self.flights.do(
+            ("count", version, self._count_cache_key(query_filter)),
+            lambda: self.data_service.get_total_count(
+                database_name=self.database,
+                table_name=self.collection,
+                filters=query_filter
+            )
+        )
+
+    def _check_count_strategy(self, count_strategy: Optional[str]) -> str:
+        count_strategy = count_strategy or self.count_strategy
+        if count_strategy not in self.count_strategies:
+            raise ValueError(f"Unknown count strategy '{count_strategy}'. "
+                             f"Allowed: {', '.join(self.count_strategies)}")
+        return count_strategy
+
+    async def get_paginated(self, skip: int = 0, limit: int = 10, filter_by: Optional[str] = None,
+                            sort_by: Optional[str] = None, descending: bool = False,
+                            count_strategy: Optional[str] = None, raw: bool = False,
+                            fields: Optional[List[str]] = None) -> (List[RecipeSection], Pagination):
+        """
+        :param raw: Return row dicts instead of models, for the serialization fast path. They
+            may be shared with concurrent callers and must not be modified.
+        :param fields: Only read these columns (plus the key), validated with check_fields().
+
+        With the read replica enabled the page and an exact count come from memory, whatever
+        the count strategy. Otherwise concurrent requests for the same page share one query.
+        """
+        self._check_page(skip, limit)
         query_filter = {}
         if filter_by:
             query_filter["recipe_name"] = filter_by
+        sort_by = self._check_sort_field(sort_by)
+        count_strategy = self._check_count_strategy(count_strategy)
+
+        if await self._ensure_replica():
+            results, total_count = self.replica.page(skip, limit, filters=query_filter, sort_field=sort_by,
+                                                     descending=descending, fields=self._columns(fields))
+            pagination = Pagination(offset=skip, limit=limit, total_count=total_count)
+            return self._to_models(results, raw), pagination
+
+        columns = self._columns(fields)
+        page_key = ("page", skip, limit, self._count_cache_key(query_filter), sort_by, descending,
+                    tuple(columns or ()))
+        if count_strategy == "single_query":
+            results, total_count = await self.flights.do(
+                page_key + ("single_query",),
+                lambda: self._fetch_page(skip, limit, query_filter, sort_by, descending, columns, with_count=True)
+            )
+            total_count_type = "exact"
+        else:
+            results = await self.flights.do(
+                page_key, lambda: self._fetch_page(skip, limit, query_filter, sort_by, descending, columns)
+            )
+            total_count, total_count_type = await self._get_total_count(query_filter, count_strategy)
 
-        results = self.data_service.get_paginated_data(
+        pagination = Pagination(offset=skip, limit=limit, total_count=total_count,
+                                total_count_type=total_count_type)
+        return self._to_models(results, raw), pagination
+
+    async def _fetch_page(self, skip: int, limit: int, query_filter: dict, sort_by: str, descending: bool,
+                          columns: Optional[List[str]], with_count: bool = False):
+        # One offset page, normalized; with the total count if with_count.
+        if with_count:
+            results, total_count = await self.data_service.get_paginated_data_with_count(
+                database_name=self.database,
+                table_name=self.collection,
+                offset=skip,
+                limit=limit,
+                filters=query_filter,
+                sort_field=sort_by,
+                descending=descending,
+                columns=columns,
+                key_field=self.key_field
+            )
+            return [self._normalize_row(result) for result in results], total_count
+
+        results = await self.data_service.get_paginated_data(
             database_name=self.database,
             table_name=self.collection,
             offset=skip,
-            limit=limit
+            limit=limit,
+            filters=query_filter,
+            sort_field=sort_by,
+            descending=descending,
+            columns=columns,
+            key_field=self.key_field
         )
+        return [self._normalize_row(result) for result in results]
 
-        total_count = self.data_service.get_total_count(
-            database_name=self.database,
-            table_name=self.collection,
-            filters=query_filter
+    async def get_page_after(self, cursor: Optional[str] = None, limit: int = 10, filter_by: Optional[str] = None,
+                             sort_by: Optional[str] = None, descending: bool = False,
+                             count_strategy: Optional[str] = None, raw: bool = False,
+                             fields: Optional[List[str]] = None) -> (List[RecipeSection], Pagination):
+        """
+        Keyset pagination. The cursor returned with one page is passed back to get the next one;
+        it carries the sort order it was created with, which takes precedence over sort_by and
+        descending.
+
+        :param raw: Return row dicts instead of models, for the serialization fast path.
+        :param fields: Only read these columns (plus the key and sort column).
+        :return: (recipes, pagination), pagination.next_cursor is None on the last page.
+        """
+        self._check_page(0, limit)
+        after = None
+        if cursor:
+            after = decode_cursor(cursor)
+            sort_by = after.get("sort_by", sort_by)
+            descending = after.get("desc", descending)
+        sort_by = self._check_sort_field(sort_by)
+        count_strategy = self._check_count_strategy(count_strategy)
+        if after is not None:
+            self._check_cursor(after, sort_by)
+
+        query_filter = {}
+        if filter_by:
+            query_filter["recipe_name"] = filter_by
+
+        # Ask for one extra row to learn whether another page exists.
+        if await self._ensure_replica():
+            results, total_count = self.replica.page_after(after, limit + 1, filters=query_filter,
+                                                           sort_field=sort_by, descending=descending,
+                                                           fields=self._columns(fields))
+            total_count_type = "exact"
+        else:
+            results = await self.data_service.get_keyset_data(
+                database_name=self.database,
+                table_name=self.collection,
+                key_field=self.key_field,
+                limit=limit + 1,
+                after=after,
+                sort_field=sort_by,
+                descending=descending,
+                filters=query_filter,
+                columns=self._columns(fields)
+            )
+
+            # A window count would only see the rows after the cursor, so single_query counts exactly.
+            total_count, total_count_type = await self._get_total_count(
+                query_filter, "exact" if count_strategy == "single_query" else count_strategy
+            )
+            results = [self._normalize_row(result) for result in results]
+
+        next_cursor = None
+        if results and len(results) > limit:
+            results = results[:limit]
+            last = results[-1]
+            next_cursor = encode_cursor({
+                "key": last[self.key_field],
+                "sort": last.get(sort_by),
+                "sort_by": sort_by,
+                "desc": descending,
+            })
+
+        pagination = Pagination(offset=0, limit=limit, total_count=total_count,
+                                total_count_type=total_count_type, next_cursor=next_cursor)
+        return self._to_models(results, raw), pagination
+
+    async def _scan(self, after_key: Any = None, page_size: int = 1000):
+        """
+        Read the Recipe table in key order, a keyset page at a time.
+
+        :param after_key: Only read rows with a larger key.
+        :return: Async generator of row lists.
+        """
+        after = {"key": after_key} if after_key is not None else None
+        while True:
+            rows = await self.data_service.get_keyset_data(
+                database_name=self.database,
+                table_name=self.collection,
+                key_field=self.key_field,
+                limit=page_size,
+                after=after
+            )
+            if rows:
+                yield rows
+            if len(rows) < page_size:
+                break
+            after = {"key": rows[-1][self.key_field]}
+
+    async def _ensure_replica(self) -> bool:
+        """
+        Load the read replica on first use and reload it after its reload_interval. In between,
+        it is refreshed every refresh_interval, see _refresh_replica(). Writes made through this
+        process are applied right away, see _replicate().
+
+        :return: True if reads should be served from the replica.
+        """
+        if self.replica is None:
+            return False
+        if not self.replica.needs_refresh():
+            return True
+        if _replica_lock.locked() and self.replica.loaded:
+            # Another request is already refreshing; serve the current copy meanwhile.
+            return True
+        async with _replica_lock:
+            if self.replica.needs_reload():
+                await self._load_replica()
+            elif self.replica.needs_refresh():
+                await self._refresh_replica()
+        return True
+
+    async def _load_replica(self):
+        version = self.table_version.value
+        table = self.replica.begin_load()
+        try:
+            async for rows in self._scan():
+                table.extend([self._normalize_row(row) for row in rows])
+        except Exception:
+            self.replica.abort_load()
+            raise
+        written = self.replica.finish_load(table, version=version)
+        # The scan may have read these before they were written.
+        await self._replicate(list(written))
+
+    async def _refresh_replica(self):
+        """
+        Re-read the recipes that any worker on this host wrote since the last refresh, from the
+        table version's change log, or reload if the log does not go back that far. Then apply
+        rows above refresh_after, which picks up most recipes created on other hosts.
+        """
+        version = self.table_version.value
+        changed = self.table_version.changes_since(self.replica.version)
+        if changed is None:
+            await self._load_replica()
+            return
+        await self._replicate(changed)
+        rows = []
+        async for page in self._scan(self.replica.refresh_after):
+            rows.extend(self._normalize_row(row) for row in page)
+        self.replica.apply(rows, refreshed=True, version=version)
+
+    async def _replicate(self, keys: List[Any], deleted: bool = False):
+        """
+        Apply writes made through this process to the read replica, so the next read sees them.
+        Rows are read back from the table to pick up column defaults such as create_time.
+        """
+        keys = [key for key in keys if key is not None]
+        if self.replica is None or not keys or not (self.replica.loaded or self.replica.loading):
+            return
+        if deleted:
+            self.replica.apply(removed=keys)
+            return
+        rows = await self.data_service.get_data_objects(
+            self.database, self.collection, key_field=self.key_field, key_values=keys
+        )
+        rows = [self._normalize_row(row) for row in rows]
+        found = {int(row[self.key_field]) for row in rows}
+        self.replica.apply(rows, removed=[key for key in keys if int(key) not in found])
+
+    async def warm_replica(self):
+        """
+        Load the read replica, if it is enabled, so the first request does not wait for it.
+        """
+        await self._ensure_replica()
+
+    def get_replica_stats(self) -> dict:
+        return self.replica.stats() if self.replica is not None else {"enabled": False}
+
+    def _indexes_fresh(self) -> bool:
+        return all(index.loaded and time.time() - index.built_at < self.search_index_max_age
+                   for index in (self.search_index, self.ingredient_index))
+
+    async def _ensure_indexes(self):
+        """
+        Build the search and ingredient indexes from the Recipe table on first use, and rebuild
+        them once they are older than search_index_max_age to pick up writes made on other
+        hosts. One table scan feeds both indexes. In between, recipes that any worker on this
+        host wrote since the indexes were brought up to date are re-read from the table
+        version's change log and re-indexed; if the log does not go back that far, they are
+        rebuilt.
+        """
+        if self._indexes_fresh() and self._indexed_version == self.table_version.value:
+            return
+        async with _index_lock:
+            version = self.table_version.value
+            if self._indexes_fresh() and self._indexed_version is not None:
+                if self._indexed_version == version:
+                    return
+                changed = self.table_version.changes_since(self._indexed_version)
+                if changed is not None and version > self._indexed_version:
+                    await self._reindex(changed)
+                    self._indexed_version = version
+                    return
+            text_docs = []
+            ingredient_docs = []
+            # Writes made while the table is read are replayed onto the new indexes.
+            for index in (self.search_index, self.ingredient_index):
+                index.begin_rebuild()
+            try:
+                async for rows in self._scan():
+                    for row in rows:
+                        key = row[self.key_field]
+                        text_docs.append((key, {field: row.get(field) for field in self.search_index.fields}))
+                        ingredient_docs.append((key, parse_ingredient_ids(row.get("ingredient_id"))))
+            except Exception:
+                for index in (self.search_index, self.ingredient_index):
+                    index.abort_rebuild()
+                raise
+            # Built off the event loop and without the index locks, which _index_recipe() takes.
+            await asyncio.to_thread(self.search_index.rebuild, text_docs)
+            await asyncio.to_thread(self.ingredient_index.rebuild, ingredient_docs)
+            # Writes logged after version was read are re-indexed by the next search.
+            self._indexed_version = version
+
+    async def _reindex(self, keys: List[Any]):
+        """
+        Re-read the recipes from the table and index them again, or drop the ones that are gone.
+        """
+        rows = await self.data_service.get_data_objects(
+            self.database, self.collection, key_field=self.key_field, key_values=keys
+        )
+        found = {int(row[self.key_field]): row for row in rows}
+        for key in keys:
+            self._index_recipe(key, found.get(int(key)))
+
+    def _index_recipe(self, key: Any, recipe_data: Optional[dict]):
+        # One document each; the indexes ignore updates before their first build.
+        if key is None:
+            return
+        key = int(key)
+        if recipe_data is None:
+            self.search_index.remove(key)
+            self.ingredient_index.remove(key)
+        else:
+            self.search_index.add(key, recipe_data)
+            self.ingredient_index.add(key, parse_ingredient_ids(recipe_data.get("ingredient_id")))
+
+    async def search(self, q: str, skip: int = 0, limit: int = 10, ingredients: Optional[List[int]] = None,
+                     match_all: bool = True, raw: bool = False) -> (List[RecipeSection], Pagination):
+        """
+        Full-text search over recipe_name and content, ranked by BM25 with prefix matching,
+        optionally restricted to recipes containing all (match_all) or any of the ingredients.
+
+        :return: (recipes in rank order, pagination with the total number of matches)
+        """
+        await self._ensure_indexes()
+
+        def query():
+            if ingredients:
+                hits, _ = self.search_index.search(q, offset=0, limit=len(self.search_index))
+                doc_ids = self.ingredient_index.filter([doc_id for doc_id, _ in hits], ingredients, match_all)
+                return doc_ids[skip:skip + limit], len(doc_ids)
+            hits, total_count = self.search_index.search(q, offset=skip, limit=limit)
+            return [doc_id for doc_id, _ in hits], total_count
+
+        recipes, total_count = await self._fetch_hits(query, raw)
+        pagination = Pagination(offset=skip, limit=limit, total_count=total_count)
+        return recipes, pagination
+
+    async def _fetch_hits(self, query, raw: bool, attempts: int = 3) -> (list, int):
+        """
+        Fetch the recipes of a page of index hits. Hits whose recipe is gone, deleted by a
+        worker the indexes have not heard from yet, are dropped from the indexes and the page
+        is queried again, so that pages stay full and the total only counts existing recipes.
+
+        :param query: Returns (doc IDs of the page, total number of hits).
+        :return: (recipes, total number of hits)
+        """
+        for _ in range(attempts):
+            doc_ids, total_count = query()
+            recipes = await self.get_many(doc_ids, raw=raw)
+            missing = [doc_id for doc_id, recipe in zip(doc_ids, recipes) if recipe is None]
+            if not missing:
+                return recipes, total_count
+            for doc_id in missing:
+                self._index_recipe(doc_id, None)
+        # Still racing deletes; return what was found rather than querying forever.
+        return [recipe for recipe in recipes if recipe is not None], total_count - len(missing)
+
+    async def find_by_ingredients(self, ingredients: List[int], match_all: bool = True, skip: int = 0,
+                                  limit: int = 10, raw: bool = False) -> (List[RecipeSection], Pagination):
+        """
+        Recipes containing all (match_all) or any of the ingredient IDs, answered from the
+        ingredient bitmap index instead of scanning and splitting ingredient_id strings.
+        """
+        await self._ensure_indexes()
+        recipes, total_count = await self._fetch_hits(
+            lambda: self.ingredient_index.query(ingredients, match_all=match_all, offset=skip, limit=limit), raw
         )
+        pagination = Pagination(offset=skip, limit=limit, total_count=total_count)
+        return recipes, pagination
 
-        for result in results:
-            if "create_time" in result and isinstance(result["create_time"], datetime):
-                result["create_time"] = result["create_time"].strftime("%Y-%m-%d %H:%M:%S")
+    def get_flight_stats(self) -> dict:
+        return self.flights.get_stats()
 
-        return [RecipeSection(**result) for result in results], total_count
+    def get_search_stats(self) -> dict:
+        return {"text": self.search_index.stats(), "ingredients": self.ingredient_index.stats()}
 
-    def create_recipe(self, recipe_data: dict):
+    async def create_recipe(self, recipe_data: dict):
          d_service = self.data_service
          recipe_data.pop('links', None)
-         new_recipe = d_service.create_data_object(
+         if recipe_data.get(self.key_field) is None:
+             recipe_data[self.key_field] = await self.get_next_recipe_id()
+         new_recipe = await d_service.create_data_object(
              self.database, self.collection, recipe_data
          )
          if not new_recipe:
              raise Exception("Failed to create new recipe")
-         return RecipeSection(**new_recipe)
+         self.invalidate(new_recipe.get(self.key_field))
+         self._index_recipe(new_recipe.get(self.key_field), new_recipe)
+         await self._replicate([new_recipe.get(self.key_field)])
+         return self._to_model(new_recipe)
+
+    async def create_recipes(self, recipes: List[dict], chunk_size: int = 500) -> List[dict]:
+        """
+        Insert many recipes with batched multi-row INSERTs in one transaction.
 
-    def update_recipe(self, key: int, recipe_data: dict):
+        :return: Per-item results, see MySQLRDBDataService.create_data_objects().
+        """
+        for recipe_data in recipes:
+            recipe_data.pop('links', None)
+        # One range of IDs for the whole batch; IDs sent by the client are not used.
+        for recipe_data, recipe_id in zip(recipes, await self.id_allocator.allocate_range(len(recipes))):
+            recipe_data[self.key_field] = recipe_id
+        results = await self.data_service.create_data_objects(
+            self.database, self.collection, recipes, key_field=self.key_field, chunk_size=chunk_size
+        )
+        created = [result[self.key_field] for result in results if result["status"] == "created"]
+        self.invalidate(*created)
+        for recipe_data, result in zip(recipes, results):
+            if result["status"] == "created":
+                self._index_recipe(result[self.key_field], recipe_data)
+        await self._replicate(created)
+        return results
+
+    async def import_stream(self, chunks, start_line: int = 0, batch_size: int = 1000,
+                            chunk_size: int = 500) -> dict:
+        """
+        Import NDJSON recipes from an async stream of byte chunks in batched transactions.
+
+        :return: The import report, see app.services.recipe_import.RecipeImporter.
+        """
+        importer = RecipeImporter(lambda rows: self.create_recipes(rows, chunk_size=chunk_size),
+                                  batch_size=batch_size)
+        return await importer.import_chunks(chunks, start_line=start_line)
+
+    async def update_recipe(self, key: int, recipe_data: dict):
          d_service = self.data_service
-         updated_recipe = d_service.update_data_object(
+         updated_recipe = await d_service.update_data_object(
              self.database, self.collection, key_field=self.key_field, key_value=key, update_data=recipe_data
          )
-         return RecipeSection(**updated_recipe)
+         self.invalidate(key)
+         self._index_recipe(key, updated_recipe)
+         await self._replicate([key])
+         return self._to_model(updated_recipe)
 
-    def delete_recipe(self, key: int) -> Any:
+    async def delete_recipe(self, key: int) -> Any:
          d_service = self.data_service
-         return d_service.delete_data_object(
+         deleted = await d_service.delete_data_object(
              self.database, self.collection, key_field=self.key_field, key_value=key
          )
+         self.invalidate(key)
+         if deleted:
+             self._index_recipe(key, None)
+             await self._replicate([key], deleted=True)
+         return deleted
+
+    def get_cache_stats(self) -> dict:
+        return self.cache.stats() if self.cache is not None else {}
 
-    async def get_next_recipe_id(self):
-        self.current_recipe_id = int(datetime.now().strftime('%Y%m%d%H%M%S')) - 20240000000000
-        return self.current_recipe_id
\ No newline at end of file
+    async def get_next_recipe_id(self) -> int:
+        """
+        A new recipe ID, unique across processes, see BlockIdAllocator.
+        """
+        return await self.id_allocator.allocate()
\ No newline at end of file
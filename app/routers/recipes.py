@@ -1,47 +1,128 @@
-from fastapi import APIRouter, Depends, Query, HTTPException, status, Request, FastAPI, UploadFile
-from app.models.recipe import RecipeSection, PaginatedRecipeResponse
+from fastapi import APIRouter, Depends, Query, HTTPException, status, Request, UploadFile, Response, Header
+from app.models.recipe import RecipeSection, PaginatedRecipeResponse, BatchCreateResponse, MultiRecipeResponse, \
+    parse_ingredient_ids
 from app.resources.recipe_resource import RecipeResource
 from app.services.service_factory import ServiceFactory
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional
-from opentelemetry import trace
-import logging, uuid
+import asyncio
 import datetime
-from app.services.gcs_service import upload_image
+from app.services.image_upload import ImageUploader, UploadTooLargeError, ChecksumMismatchError
+from app.services.image_derivatives import DerivativeQueue, DerivativeQueueFullError, HASHED_NAME, picture_name
+from app.services import recipe_export, recipe_serializer
+from framework.utils.etag import make_etag, etag_matches
 import os 
 
 router = APIRouter()
-app = FastAPI(
-    title="Recipe Management API",
-    description="API for managing and retrieving recipes"
-)
-
-# Middleware to handle correlation ID and logging
-@app.middleware("http")
-async def add_correlation_id_and_logging(request: Request, call_next):
-    # Extract correlation ID from request headers
-    correlation_id = request.headers.get("X-Trace-Id", None)
-    if not correlation_id:
-        correlation_id = generate_correlation_id()
-        request.state.correlation_id = correlation_id
-
-    # Log the incoming request
-    logging.info(f"Incoming request: {request.method} {request.url} - Correlation ID: {correlation_id}")
 
-    # Process the request
-    with trace.get_tracer(__name__).start_as_current_span(f"{request.method} {request.url}", attributes={"correlation_id": correlation_id}):
-        response = await call_next(request)
+MAX_BATCH_SIZE = 10000
+MAX_MULTI_GET_SIZE = 1000
+MAX_PAGE_SIZE = 1000
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Seconds a client is asked to wait after a read gave up waiting for the database.
+RETRY_AFTER_SECONDS = 5
+PICTURE_SIZE_PATTERN = "^(thumb|medium|original)$"
+# Sent with recipe GETs. The default lets clients store responses but makes them revalidate
+# with If-None-Match, which is answered with a body-less 304 while the ETag still matches.
+FIELDS_DESCRIPTION = "comma separated fields to return, e.g. recipe_name,rating,pictures; recipe_id is always included"
+CACHE_CONTROL = os.environ.get("RECIPE_CACHE_CONTROL", "private, no-cache")
 
-    # Log the outgoing response
-    logging.info(f"Outgoing response: {response.status_code} - Correlation ID: {correlation_id}")
+def get_recipe_resource() -> RecipeResource:
+    return ServiceFactory.get_service("RecipeResource")
 
-    return response
+def read_timed_out() -> HTTPException:
+    # Coalesced reads give up after the RecipeReadFlights timeout; the database is overloaded or down.
+    return HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Timed out reading recipes",
+                         headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
 
-def generate_correlation_id() -> str:
-    # Implementation to generate a unique correlation ID
-    return str(uuid.uuid4())
+def picture_url_for(picture_size: str, provisional: Optional[list] = None):
+    """
+    :param provisional: Collects the pictures linked as the original only because their
+        variants are not known to exist yet. A body linking any of them changes once they do,
+        so its ETag and the body itself must not be cached.
+    """
+    storage = ServiceFactory.get_service("ImageStorage")
+    # Variants are only linked once they are known to exist; until then the original is.
+    derivatives = ServiceFactory.get_service("ImageDerivativeQueue")
+
+    def picture_url(pictures: Optional[str]) -> Optional[str]:
+        if not pictures:
+            return pictures
+        name = picture_name(pictures, picture_size, derivatives.has_derivatives)
+        if provisional is not None and name != picture_name(pictures, picture_size):
+            provisional.append(pictures)
+        return storage.public_url(name)
+    return picture_url
+
+def json_response(body: bytes, etag: Optional[str] = None) -> Response:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL} if etag else None
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+def parse_fields(fields: Optional[str], recipe_resource: RecipeResource) -> Optional[List[str]]:
+    field_list = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    try:
+        return recipe_resource.check_fields(field_list)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/recipes_sections/export",
+            tags=["recipes"],
+            summary="export all recipes",
+            description="stream the whole recipe table as NDJSON or CSV with constant memory",
+            responses={200: {"content": {"application/x-ndjson": {}, "text/csv": {}}},
+                       400: {"description": "Unknown field"}})
+async def export_recipes(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    fields: Optional[str] = Query(None, description="comma separated columns to export, e.g. recipe_id,recipe_name"),
+    recipe_resource: RecipeResource = Depends(get_recipe_resource)
+):
+    """
+    Rows are read through a server-side cursor and encoded as they arrive, so the response is
+    streamed without materializing the table or building models.
+    """
+    field_list = parse_fields(fields, recipe_resource)
+    # The query runs before the response starts, so a database failure is a 500, not a cut-off 200.
+    rows = await run_in_threadpool(recipe_export.start, recipe_resource.export_rows(field_list))
+    if format == "csv":
+        body = recipe_export.iter_csv(rows, recipe_export.export_columns(field_list))
+        media_type = "text/csv"
+    else:
+        body = recipe_export.iter_ndjson(rows)
+        media_type = "application/x-ndjson"
+    # A sync iterator is consumed in Starlette's threadpool, off the event loop.
+    return StreamingResponse(body, media_type=media_type,
+                             headers={"Content-Disposition": f"attachment; filename=recipes.{format}"})
+
+@router.get("/recipes_sections/multi",
+            tags=["recipes"],
+            response_model=MultiRecipeResponse,
+            summary="get several recipes",
+            description="retrieve many recipes by ID in one request; results keep the order of ids",
+            responses={400: {"description": "Invalid or too many IDs"}})
+async def get_recipes_multi(
+    ids: str = Query(..., description="comma separated recipe IDs, e.g. 1,2,3"),
+    picture_size: str = Query("thumb", pattern=PICTURE_SIZE_PATTERN),
+    recipe_resource: RecipeResource = Depends(get_recipe_resource)
+):
+    """
+    Fetch many recipes with a single database query. Recipes that do not exist come back as
+    null in data and are listed in missing.
+    """
+    try:
+        keys = [int(key) for key in ids.split(",") if key.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma separated list of integers")
+    if len(keys) > MAX_MULTI_GET_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_MULTI_GET_SIZE} ids per request")
 
-def get_recipe_resource() -> RecipeResource:
-    return RecipeResource(config={})
+    results = await recipe_resource.get_many(keys, raw=True)
+    body = recipe_serializer.encode_many(results, [key for key, result in zip(keys, results) if result is None],
+                                         recipe_serializer.DETAIL_LINKS, picture_url_for(picture_size))
+    return json_response(recipe_serializer.validate_many(body))
 
 @router.get("/recipes_sections/{recipe_id}", 
             tags=["recipes"], 
@@ -63,34 +144,52 @@ def get_recipe_resource() -> RecipeResource:
                         "create_time": "2024-12-15T12:00:00"
                     }
                 },
+                304: {
+                    "description": "Not modified, the If-None-Match ETag is current"
+                },
                 404: {
                     "description": "Recipe not found"
+                },
+                503: {
+                    "description": "Timed out waiting for the database, retry after Retry-After seconds"
                 }
             })
             
-async def get_recipes(recipe_id: str):
+async def get_recipes(recipe_id: str, picture_size: str = Query("medium", pattern=PICTURE_SIZE_PATTERN),
+                      fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+                      if_none_match: Optional[str] = Header(None)):
     res = ServiceFactory.get_service("RecipeResource")
-    result = res.get_by_key(recipe_id)
-    if not result:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
-
-    if isinstance(result, dict):
-        result = RecipeSection(**result)
-
-    if result.pictures:
-        bucket_url = f"https://storage.googleapis.com/jigglypuff-images/"
-        result.pictures = bucket_url + result.pictures
-
-    # HATEOAS
-    result.links = [
-        {"rel": "self", "href": f"/recipes_sections/{recipe_id}", "method": "GET"},
-        {"rel": "update", "href": f"/recipes_sections/{recipe_id}", "method": "PUT"},
-        {"rel": "delete", "href": f"/recipes_sections/{recipe_id}", "method": "DELETE"},
-        {"rel": "comments", "href": f"/recipes_sections/{recipe_id}/comments", "method": "GET"},
-    ]
-    return result
+    field_list = parse_fields(fields, res)
+    variant = f"{picture_size}:{','.join(field_list or [])}"
+    # A known, current ETag is answered without reading the recipe.
+    etag = res.get_etag(recipe_id, variant)
+    if etag and etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    version = res.version(recipe_id)
+    provisional = []
+    # Full bodies may already have been rendered by another worker.
+    body = res.get_encoded(recipe_id, picture_size) if not field_list else None
+    if body is None:
+        try:
+            result = await res.get_by_key(recipe_id, raw=True, fields=field_list)
+        except asyncio.TimeoutError:
+            raise read_timed_out()
+        if not result:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
+
+        body = recipe_serializer.encode_recipe(result, recipe_serializer.DETAIL_LINKS,
+                                               picture_url_for(picture_size, provisional),
+                                               recipe_serializer.output_fields(field_list))
+        if not field_list and not provisional:
+            res.set_encoded(recipe_id, picture_size, body, version)
+    etag = make_etag(body)
+    if not provisional:
+        res.set_etag(recipe_id, variant, etag, version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return json_response(recipe_serializer.validate_recipe(body), etag)
     # TODO: Add error handling (currently getting errors for NoneTypes )
-    # TODO: Do lifecycle management for singleton resource
 
 @router.get("/recipes_sections", 
             tags=["recipes"], 
@@ -124,40 +223,86 @@ async def get_recipes(recipe_id: str):
                     "pagination": {
                         "offset": 0,
                         "limit": 100,
-                        "total_count": 1
+                        "total_count": 1,
+                        "total_count_type": "exact",
+                        "next_cursor": None
                     }
                 }
-            }})
+            },
+            304: {"description": "Not modified, the If-None-Match ETag is current"},
+            503: {"description": "Timed out waiting for the database, retry after Retry-After seconds"}})
 
 async def get_recipe(
-    skip: int = Query(0, alias="offset"),
-    limit: int = Query(100),
+    request: Request,
+    skip: int = Query(0, ge=0, alias="offset"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
     filter_by: Optional[str] = None,
+    paging: str = Query("offset", pattern="^(offset|cursor)$",
+                        description="'cursor' uses keyset pagination; implied when a cursor is given"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    sort_by: Optional[str] = Query(None, pattern="^(recipe_id|create_time|rating)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    count: Optional[str] = Query(None, pattern="^(exact|cached|approximate|single_query)$",
+                                 description="how total_count is computed"),
+    q: Optional[str] = Query(None, min_length=1, max_length=200,
+                             description="full-text search over recipe_name and content, ranked by relevance"),
+    ingredients: Optional[str] = Query(None, pattern=r"^\d+(\s*,\s*\d+)*$",
+                                       description="comma separated ingredient IDs, e.g. 1,2"),
+    match: str = Query("all", pattern="^(all|any)$", description="recipes with all or any of the ingredients"),
+    picture_size: str = Query("thumb", pattern=PICTURE_SIZE_PATTERN),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    if_none_match: Optional[str] = Header(None),
     recipe_resource: RecipeResource = Depends(get_recipe_resource)
 ):
-    results, total_count = recipe_resource.get_paginated(skip=skip, limit=limit, filter_by=filter_by)
+    # The page is identified by its query string. Its ETag is valid until the next write.
+    page_key = "&".join(f"{name}={value}" for name, value in sorted(request.query_params.multi_items()))
+    etag = recipe_resource.get_etag(None, page_key)
+    if etag and etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    version = recipe_resource.version()
+
+    field_list = parse_fields(fields, recipe_resource)
+    ingredient_ids = parse_ingredient_ids(ingredients)
+    try:
+        if (q or ingredient_ids) and (cursor or paging == "cursor"):
+            raise ValueError("Search and ingredient queries only support offset paging")
+        if q:
+            results, pagination = await recipe_resource.search(
+                q, skip=skip, limit=limit, ingredients=ingredient_ids, match_all=match == "all", raw=True
+            )
+        elif ingredient_ids:
+            results, pagination = await recipe_resource.find_by_ingredients(
+                ingredient_ids, match_all=match == "all", skip=skip, limit=limit, raw=True
+            )
+        elif cursor or paging == "cursor":
+            results, pagination = await recipe_resource.get_page_after(
+                cursor=cursor, limit=limit, filter_by=filter_by, sort_by=sort_by, descending=order == "desc",
+                count_strategy=count, raw=True, fields=field_list
+            )
+        else:
+            results, pagination = await recipe_resource.get_paginated(
+                skip=skip, limit=limit, filter_by=filter_by, sort_by=sort_by, descending=order == "desc",
+                count_strategy=count, raw=True, fields=field_list
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except asyncio.TimeoutError:
+        raise read_timed_out()
     if not results:
         raise HTTPException(status_code=404, detail="No recipes found!")
 
-    # Add HATEOAS links to each recipe
-    recipes_with_links = []
-    for recipe in results:
-        recipe_dict = recipe.model_dump()
-        recipe_dict["links"] = [
-            {"rel": "self", "href": f"/recipes_sections/{recipe.recipe_id}", "method": "GET"},
-            {"rel": "update", "href": f"/recipes_sections/{recipe.recipe_id}", "method": "PUT"},
-            {"rel": "delete", "href": f"/recipes_sections/{recipe.recipe_id}", "method": "DELETE"},
-        ]
-        recipes_with_links.append(RecipeSection(**recipe_dict))
-
-    return {
-        "data": recipes_with_links,
-        "pagination": {
-            "offset": skip,
-            "limit": limit,
-            "total_count": total_count
-        },
-    }
+    # Rows are encoded straight to JSON with their HATEOAS links, see recipe_serializer.
+    # Search results come from the recipe cache and are only projected here.
+    provisional = []
+    body = recipe_serializer.encode_page(results, pagination, recipe_serializer.LIST_LINKS,
+                                         picture_url_for(picture_size, provisional),
+                                         recipe_serializer.output_fields(field_list))
+    etag = make_etag(body)
+    if not provisional:
+        recipe_resource.set_etag(None, page_key, etag, version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return json_response(recipe_serializer.validate_page(body), etag)
 
 
 @router.post("/recipes_sections", 
@@ -226,11 +371,70 @@ async def create_recipe(
         "user_id": 5,
         "create_time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
     })
-    new_recipe = recipe_resource.create_recipe(recipe_data_dict)
+    new_recipe = await recipe_resource.create_recipe(recipe_data_dict)
     if not new_recipe:
         raise HTTPException(status_code=400, detail="Recipe creation failed")
     return new_recipe, {"Location": f"/recipes_sections/{new_recipe.recipe_id}"}
 
+@router.post("/recipes_sections/batch",
+             tags=["recipes"],
+             response_model=BatchCreateResponse,
+             status_code=status.HTTP_201_CREATED,
+             summary="create many recipes",
+             description="create recipes in bulk with batched inserts; failures are reported per item",
+             responses={207: {"model": BatchCreateResponse, "description": "Some recipes could not be created"}})
+async def create_recipes_batch(
+        recipes: List[RecipeSection],
+        response: Response,
+        chunk_size: int = Query(500, ge=1, le=5000, description="rows per INSERT statement"),
+        recipe_resource: RecipeResource = Depends(get_recipe_resource)
+):
+    """
+    Create many recipes in one request. All rows are written in a single transaction using
+    multi-row INSERTs; a row that fails is reported in its result without aborting the batch.
+
+    Responses:
+    - **201 Created**: Every recipe was created.
+    - **207 Multi-Status**: At least one recipe failed, see the per-item results.
+    - **413 Payload Too Large**: More than MAX_BATCH_SIZE recipes.
+    """
+    if len(recipes) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_SIZE} recipes per batch")
+
+    create_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    rows = []
+    for recipe in recipes:
+        row = recipe.model_dump()
+        row.update({"user_id": 5, "create_time": create_time})
+        rows.append(row)
+
+    results = await recipe_resource.create_recipes(rows, chunk_size=chunk_size)
+    created = sum(1 for result in results if result["status"] == "created")
+    if created != len(results):
+        response.status_code = status.HTTP_207_MULTI_STATUS
+    return {"created": created, "failed": len(results) - created, "results": results}
+
+@router.post("/recipes_sections/import",
+             tags=["recipes"],
+             summary="bulk import recipes",
+             description="stream NDJSON recipes in the request body and insert them in batched transactions")
+async def import_recipes(
+        request: Request,
+        start_line: int = Query(0, ge=0, description="lines to skip, e.g. last_committed_line of an earlier run"),
+        batch_size: int = Query(1000, ge=1, le=10000, description="rows per transaction"),
+        chunk_size: int = Query(500, ge=1, le=5000, description="rows per INSERT statement"),
+        recipe_resource: RecipeResource = Depends(get_recipe_resource)
+):
+    """
+    Import recipes from a newline-delimited JSON body, one RecipeSection per line. The body is
+    parsed as it arrives, so memory does not grow with the upload size.
+
+    The response reports throughput, row-level errors and last_committed_line; if the upload is
+    interrupted, send the same file again with start_line set to that value to resume.
+    """
+    return await recipe_resource.import_stream(request.stream(), start_line=start_line,
+                                               batch_size=batch_size, chunk_size=chunk_size)
+
 @router.put("/recipes_sections/{recipe_id}", tags=["recipes"], status_code=status.HTTP_202_ACCEPTED, summary="update existing recipe", description="update information in existing recipe")
 async def update_recipe(
     recipe_id: str,
@@ -255,7 +459,7 @@ async def delete_recipe(recipe_id: str, recipe_resource: RecipeResource = Depend
     """
     Delete a recipe by ID.
     """
-    success = recipe_resource.delete_recipe(recipe_id)
+    success = await recipe_resource.delete_recipe(recipe_id)
     if not success:
         raise HTTPException(status_code=404, detail="Recipe not found!")
 
@@ -266,18 +470,132 @@ async def delete_recipe(recipe_id: str, recipe_resource: RecipeResource = Depend
         ],
     }
 
-@router.post("/upload")
-async def upload_file(image: UploadFile):
-    try:
-        temp_path = os.path.join("/tmp", image.filename)
-        with open(temp_path, "wb") as temp_file:
-            content = await image.read()
-            temp_file.write(content)
+def get_image_uploader() -> ImageUploader:
+    return ImageUploader(ServiceFactory.get_service("ImageStorage"))
 
-        public_url = upload_image(temp_path)
+def get_derivative_queue() -> DerivativeQueue:
+    return ServiceFactory.get_service("ImageDerivativeQueue")
 
-        os.remove(temp_path)
+def _job_response(job: dict) -> dict:
+    return {**job, "links": [{"rel": "status", "href": f"/upload/jobs/{job['id']}", "method": "GET"}]}
 
-        return {"message": "Image uploaded successfully", "url": public_url}
+async def _upload(uploader: ImageUploader, queue: DerivativeQueue, chunks, filename, content_type, sha256):
+    try:
+        result = await uploader.upload(chunks, filename=filename, content_type=content_type,
+                                       expected_sha256=sha256)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ChecksumMismatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to upload image: {e}")
+
+    # The upload itself succeeded, so a full derivative queue does not fail it: recipes link
+    # the original until the variants exist, and they can be requested again through
+    # POST /upload/{name}/derivatives. A deduplicated image only gets a job if they are missing.
+    job = None
+    if not result["deduplicated"] or not await queue.derivatives_exist(result["name"]):
+        try:
+            job = _job_response(queue.submit(result["name"]))
+        except DerivativeQueueFullError:
+            pass
+    return {"message": "Image uploaded successfully", **result, "derivatives_job": job}
+
+@router.post("/upload",
+             tags=["images"],
+             summary="upload an image",
+             description="multipart upload; store the returned name in a recipe's pictures field")
+async def upload_file(image: UploadFile,
+                      sha256: Optional[str] = Query(None, pattern="^[0-9a-fA-F]{64}$",
+                                                    description="SHA-256 of the file; skips the upload if already stored"),
+                      uploader: ImageUploader = Depends(get_image_uploader),
+                      queue: DerivativeQueue = Depends(get_derivative_queue)):
+    async def chunks():
+        while chunk := await image.read(UPLOAD_CHUNK_SIZE):
+            yield chunk
+
+    return await _upload(uploader, queue, chunks(), image.filename, image.content_type, sha256)
+
+@router.post("/upload/stream",
+             tags=["images"],
+             summary="upload an image as the raw request body",
+             description="the body is forwarded to storage as it arrives, without multipart parsing or temp files")
+async def upload_stream(request: Request,
+                        filename: Optional[str] = Query(None, description="original file name, used for its extension"),
+                        sha256: Optional[str] = Query(None, pattern="^[0-9a-fA-F]{64}$",
+                                                      description="SHA-256 of the file; skips the upload if already stored"),
+                        uploader: ImageUploader = Depends(get_image_uploader),
+                        queue: DerivativeQueue = Depends(get_derivative_queue)):
+    return await _upload(uploader, queue, request.stream(), filename, request.headers.get("content-type"), sha256)
+
+@router.post("/upload/{name}/derivatives",
+             tags=["images"],
+             status_code=status.HTTP_202_ACCEPTED,
+             summary="generate image variants",
+             description="(re)generate the thumb and medium variants of an uploaded image, e.g. to backfill",
+             responses={400: {"description": "Not an image stored by /upload"},
+                        404: {"description": "Image not found"},
+                        503: {"description": "Too many pending jobs, retry later"}})
+async def create_derivatives(name: str, queue: DerivativeQueue = Depends(get_derivative_queue)):
+    if not HASHED_NAME.match(name):
+        raise HTTPException(status_code=400, detail="Only images stored by /upload have variants")
+    if not await run_in_threadpool(queue.backend.exists, name):
+        raise HTTPException(status_code=404, detail="Image not found")
+    try:
+        job = queue.submit(name)
+    except DerivativeQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return _job_response(job)
+
+@router.get("/upload/jobs/{job_id}",
+            tags=["images"],
+            summary="image variant job status",
+            description="queued, running, done (with the variant URLs) or failed (with the error)",
+            responses={404: {"description": "Unknown or expired job"}})
+async def get_derivative_job(job_id: str, queue: DerivativeQueue = Depends(get_derivative_queue)):
+    job = queue.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/debug/cache",
+            tags=["debug"],
+            summary="recipe cache statistics",
+            description="hit/miss/eviction counters and memory usage of the recipe cache")
+async def get_cache_stats(recipe_resource: RecipeResource = Depends(get_recipe_resource)):
+    return recipe_resource.get_cache_stats()
+
+@router.get("/debug/search",
+            tags=["debug"],
+            summary="search index statistics",
+            description="number of indexed recipes and terms, and when the index was built")
+async def get_search_stats(recipe_resource: RecipeResource = Depends(get_recipe_resource)):
+    return recipe_resource.get_search_stats()
+
+@router.get("/debug/flights",
+            tags=["debug"],
+            summary="request coalescing statistics",
+            description="database reads started, reads saved by joining an identical one in flight, errors "
+                        "and timeouts")
+async def get_flight_stats(recipe_resource: RecipeResource = Depends(get_recipe_resource)):
+    return recipe_resource.get_flight_stats()
+
+@router.get("/debug/replica",
+            tags=["debug"],
+            summary="read replica statistics",
+            description="rows, high-water mark, last refresh and memory use (also per 100k recipes) of the "
+                        "in-process read replica")
+async def get_replica_stats(recipe_resource: RecipeResource = Depends(get_recipe_resource)):
+    return recipe_resource.get_replica_stats()
+
+@router.get("/debug/queries",
+            tags=["debug"],
+            summary="query profile",
+            description="count, total, p95 and max time per normalized SQL statement, the plans of slow "
+                        "SELECTs and the latest executions; needs RECIPE_QUERY_PROFILE=1")
+async def get_query_stats(recent: int = Query(50, ge=0, le=1000),
+                          slow_only: bool = Query(False, description="only list slow executions")):
+    profiler = ServiceFactory.get_service("RecipeQueryProfiler")
+    if profiler is None:
+        return {"enabled": False}
+    return profiler.get_stats(recent=recent, slow_only=slow_only)
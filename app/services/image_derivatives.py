@@ -0,0 +1,235 @@
+import asyncio
+import io
+import multiprocessing
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from framework.services.cache.BaseCache import MISSING, NOT_FOUND
+from framework.services.cache.LRUCache import LRUCache
+from framework.services.storage.BaseStorageBackend import BaseStorageBackend
+
+# Variant name -> bounding box. Images are scaled down to fit, never up.
+VARIANTS: Dict[str, Tuple[int, int]] = {
+    "thumb": (320, 320),
+    "medium": (1024, 1024),
+}
+
+# Only images stored by the upload pipeline (named by content hash) have derivatives.
+HASHED_NAME = re.compile(r"^[0-9a-f]{64}\.[a-z]+$")
+
+
+class DerivativeQueueFullError(Exception):
+    pass
+
+
+def variant_name(name: str, variant: str) -> str:
+    """
+    Object name of a derivative, e.g. <sha256>.png -> <sha256>_thumb.jpg.
+    """
+    return f"{os.path.splitext(name)[0]}_{variant}.jpg"
+
+
+def picture_name(name: Optional[str], variant: str,
+                 ready: Optional[Callable[[str], bool]] = None) -> Optional[str]:
+    """
+    Object name to serve for a view: the variant for pipeline uploads, the original otherwise.
+
+    :param ready: Tells whether an image's variants exist, e.g. DerivativeQueue.has_derivatives;
+        the original is served until they do.
+    """
+    if not name or variant == "original" or not HASHED_NAME.match(name):
+        return name
+    if ready is not None and not ready(name):
+        return name
+    return variant_name(name, variant)
+
+
+def render_derivatives(data: bytes, variants: Dict[str, Tuple[int, int]], quality: int = 82) -> Dict[str, bytes]:
+    """
+    Resize an image to each variant's bounding box and re-encode it as JPEG. EXIF orientation
+    is applied to the pixels and all metadata is dropped. CPU heavy: runs in a worker process.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+
+        results = {}
+        for variant, size in variants.items():
+            resized = image.copy()
+            resized.thumbnail(size, Image.LANCZOS)
+            output = io.BytesIO()
+            # No exif= argument, so no metadata is written.
+            resized.save(output, format="JPEG", quality=quality, optimize=True, progressive=True)
+            results[variant] = output.getvalue()
+        return results
+
+
+class DerivativeQueue:
+    """
+    Generates image derivatives in a process pool so resizing never runs on the API worker.
+
+    At most max_pending jobs may be queued or running; submit() raises DerivativeQueueFullError
+    beyond that so callers can push back. The status of the last max_jobs jobs is kept, and
+    which images are known to have all their variants, see has_derivatives().
+    """
+
+    def __init__(self, backend: BaseStorageBackend, context: Optional[dict] = None):
+        """
+        :param backend: Storage the originals are read from and the variants written to.
+        :param context: Optional settings: max_workers (processes), max_pending, max_jobs,
+            max_known (images remembered by has_derivatives()) and max_checks (storage checks
+            running at once).
+        """
+        context = context or {}
+        self.backend = backend
+        self.max_workers = context.get("max_workers", 2)
+        self.max_pending = context.get("max_pending", 32)
+        self.max_jobs = context.get("max_jobs", 1000)
+        self.variants = context.get("variants", VARIANTS)
+        self.max_checks = context.get("max_checks", 16)
+        # name -> True, or NOT_FOUND for a short while when a variant is missing.
+        self._known = LRUCache(dict(max_entries=context.get("max_known", 100000), ttl=86400, negative_ttl=60))
+        self._checking = set()
+
+        self._executor = None
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._pending = 0
+        self._tasks = set()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, because forking a process that runs threads (uvicorn, pools) is unsafe.
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def submit(self, name: str) -> dict:
+        """
+        Queue derivative generation for a stored image. Must be called on the event loop.
+
+        :return: The job status dict.
+        :raises DerivativeQueueFullError: If max_pending jobs are already queued or running.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise DerivativeQueueFullError(f"{self._pending} derivative jobs pending, try again later")
+            self._pending += 1
+            job = {
+                "id": uuid.uuid4().hex,
+                "name": name,
+                "status": "queued",
+                "variants": {},
+                "error": None,
+                "submitted_at": time.time(),
+                "finished_at": None,
+            }
+            self._jobs[job["id"]] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+
+        task = asyncio.get_running_loop().create_task(self._run(job))
+        # Keep a reference so the task is not garbage collected while it runs.
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return dict(job)
+
+    async def _run(self, job: dict):
+        try:
+            data = await run_in_threadpool(self.backend.read, job["name"])
+            job["status"] = "running"
+            loop = asyncio.get_running_loop()
+            rendered = await loop.run_in_executor(self._get_executor(), render_derivatives, data, self.variants)
+            for variant, output in rendered.items():
+                target = variant_name(job["name"], variant)
+                await run_in_threadpool(self.backend.write_bytes, target, output, "image/jpeg")
+                job["variants"][variant] = self.backend.public_url(target)
+            job["status"] = "done"
+            self._known.set(job["name"], True)
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = str(e)
+        finally:
+            job["finished_at"] = time.time()
+            with self._lock:
+                self._pending -= 1
+
+    async def derivatives_exist(self, name: str) -> bool:
+        """
+        Check storage for every variant of an image and remember the answer.
+
+        :return: False as well if storage could not be checked; that is not remembered.
+        """
+        try:
+            exists = await run_in_threadpool(
+                lambda: all(self.backend.exists(variant_name(name, variant)) for variant in self.variants)
+            )
+        except Exception:
+            return False
+        self._known.set(name, True if exists else NOT_FOUND)
+        return exists
+
+    def has_derivatives(self, name: str) -> bool:
+        """
+        Whether every variant of an image is known to exist. Never waits on storage: an image
+        not checked yet reads as False while a check runs in the background (if called on the
+        event loop), so the original is served until the variants are confirmed.
+        """
+        known = self._known.get(name)
+        if known is MISSING:
+            self._check(name)
+            return False
+        return known is not NOT_FOUND
+
+    def _check(self, name: str):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        with self._lock:
+            if name in self._checking or len(self._checking) >= self.max_checks:
+                return
+            self._checking.add(name)
+        task = loop.create_task(self._run_check(name))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_check(self, name: str):
+        try:
+            await self.derivatives_exist(name)
+        finally:
+            with self._lock:
+                self._checking.discard(name)
+
+    def get_job(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            statuses = {}
+            for job in self._jobs.values():
+                statuses[job["status"]] = statuses.get(job["status"], 0) + 1
+            return {"pending": self._pending, "max_pending": self.max_pending,
+                    "max_workers": self.max_workers, "jobs": statuses}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
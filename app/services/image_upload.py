@@ -0,0 +1,133 @@
+import hashlib
+import os
+import time
+from typing import AsyncIterator, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from framework.services.storage.BaseStorageBackend import BaseStorageBackend
+from framework.utils import metrics
+
+IMAGE_EXTENSIONS = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+}
+CONTENT_TYPE_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+}
+
+
+UPLOAD_SECONDS = metrics.histogram(
+    "image_upload_duration_seconds", "Image uploads by outcome: stored, deduplicated, skipped or failed.",
+    ["outcome"], buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+UPLOAD_BYTES = metrics.histogram(
+    "image_upload_bytes", "Bytes received per image upload.",
+    buckets=(16 * 1024, 64 * 1024, 256 * 1024, 1024 * 1024, 4 * 1024 * 1024, 16 * 1024 * 1024)
+)
+
+
+class UploadTooLargeError(Exception):
+    pass
+
+
+class ChecksumMismatchError(Exception):
+    pass
+
+
+def image_extension(filename: Optional[str], content_type: Optional[str]) -> str:
+    """
+    Pick the stored file extension from the client's filename or content type. Only the
+    extension of the client-supplied name is used; the rest of it never reaches storage.
+    """
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension in IMAGE_EXTENSIONS:
+        return ".jpg" if extension == ".jpeg" else extension
+    if content_type:
+        return CONTENT_TYPE_EXTENSIONS.get(content_type.split(";")[0].strip().lower(), "")
+    return ""
+
+
+class ImageUploader:
+    """
+    Streams an image into a storage backend without buffering it in memory or on local disk.
+
+    Objects are named after the SHA-256 of their content, so identical images are stored once.
+    When the client announces the hash up front and the object already exists, the body is not
+    transferred at all; otherwise the hash is computed while streaming and a duplicate upload
+    is discarded instead of being published a second time. Blocking SDK calls run in the
+    threadpool.
+    """
+
+    def __init__(self, backend: BaseStorageBackend, max_bytes: int = 20 * 1024 * 1024):
+        self.backend = backend
+        self.max_bytes = max_bytes
+
+    async def upload(self,
+                     chunks: AsyncIterator[bytes],
+                     filename: Optional[str] = None,
+                     content_type: Optional[str] = None,
+                     expected_sha256: Optional[str] = None) -> dict:
+        """
+        :param chunks: The image bytes, in order.
+        :param filename: Client-supplied name, only used for its extension.
+        :param content_type: MIME type of the image.
+        :param expected_sha256: Hex digest announced by the client, enables skipping the transfer.
+        :return: {"name", "url", "sha256", "size", "deduplicated"}
+        """
+        started = time.perf_counter()
+        outcome = "failed"
+        try:
+            result = await self._upload(chunks, filename, content_type, expected_sha256)
+            if result["size"] is None:
+                outcome = "skipped"
+            else:
+                outcome = "deduplicated" if result["deduplicated"] else "stored"
+                UPLOAD_BYTES.observe(result["size"])
+            return result
+        finally:
+            UPLOAD_SECONDS.labels(outcome).observe(time.perf_counter() - started)
+
+    async def _upload(self, chunks: AsyncIterator[bytes], filename: Optional[str], content_type: Optional[str],
+                      expected_sha256: Optional[str]) -> dict:
+        extension = image_extension(filename, content_type)
+        content_type = IMAGE_EXTENSIONS.get(extension, content_type)
+
+        if expected_sha256:
+            expected_sha256 = expected_sha256.lower()
+            name = expected_sha256 + extension
+            if await run_in_threadpool(self.backend.exists, name):
+                return {"name": name, "url": self.backend.public_url(name), "sha256": expected_sha256,
+                        "size": None, "deduplicated": True}
+
+        digest = hashlib.sha256()
+        size = 0
+        writer = await run_in_threadpool(self.backend.open_writer, content_type)
+        try:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise UploadTooLargeError(f"Image is larger than {self.max_bytes} bytes")
+                digest.update(chunk)
+                await run_in_threadpool(writer.write, chunk)
+
+            sha256 = digest.hexdigest()
+            if expected_sha256 and expected_sha256 != sha256:
+                raise ChecksumMismatchError("Uploaded content does not match the announced SHA-256")
+        except BaseException:
+            await run_in_threadpool(writer.abort)
+            raise
+
+        name = sha256 + extension
+        created = await run_in_threadpool(writer.commit, name)
+
+        return {"name": name, "url": self.backend.public_url(name), "sha256": sha256,
+                "size": size, "deduplicated": not created}
@@ -0,0 +1,73 @@
+import csv
+import io
+import itertools
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterable, Iterator, List
+
+from app.models.recipe import RecipeSection
+from app.services import recipe_serializer
+
+# Lines buffered into one chunk of the streamed response.
+ROWS_PER_CHUNK = 500
+
+
+def _encode_value(value):
+    # Rows come from RecipeResource.export_rows(), already normalized like API responses.
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    return value
+
+
+def start(rows: Iterable[dict]) -> Iterator[dict]:
+    """
+    Read the first row now, so that failing to connect or to run the query raises before a
+    response is started rather than cutting a 200 short. Blocks; call it in a worker thread.
+    """
+    rows = iter(rows)
+    for first in rows:
+        return itertools.chain([first], rows)
+    return iter(())
+
+
+def iter_ndjson(rows: Iterable[dict]) -> Iterator[bytes]:
+    """
+    Encode rows as newline-delimited JSON with the API's encoder, a few hundred rows per
+    yielded chunk.
+    """
+    lines = []
+    for row in rows:
+        lines.append(recipe_serializer.dumps(row))
+        if len(lines) >= ROWS_PER_CHUNK:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+
+def iter_csv(rows: Iterable[dict], columns: List[str]) -> Iterator[bytes]:
+    """
+    Encode rows as CSV with a header line, a few hundred rows per yielded chunk.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    count = 0
+    for row in rows:
+        writer.writerow([_encode_value(row.get(column)) for column in columns])
+        count += 1
+        if count >= ROWS_PER_CHUNK:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            count = 0
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def export_columns(fields: List[str] = None) -> List[str]:
+    return fields or [name for name in RecipeSection.model_fields if name != "links"]
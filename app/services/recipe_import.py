@@ -0,0 +1,240 @@
+"""
+Chunked bulk import of recipes from NDJSON.
+
+Input is parsed line by line, validated against RecipeSection in batches and written with one
+multi-row insert transaction per batch, so memory stays flat for inputs of any size. After every
+committed batch the number of processed lines can be written to a checkpoint file; passing it
+back as start_line resumes the import where it stopped.
+
+Run from the command line with:
+
+    python -m app.services.recipe_import recipes.ndjson --checkpoint recipes.ckpt
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import sys
+import time
+from typing import AsyncIterable, Callable, Iterable, List, Optional
+
+from pydantic import ValidationError
+
+from app.models.recipe import RecipeSection
+
+
+class LineBuffer:
+    """
+    Splits a stream of byte chunks into complete lines, holding back a trailing partial line.
+    """
+
+    def __init__(self):
+        self._pending = b""
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        data = self._pending + chunk
+        lines = data.split(b"\n")
+        self._pending = lines.pop()
+        return lines
+
+    def flush(self) -> List[bytes]:
+        lines = [self._pending] if self._pending else []
+        self._pending = b""
+        return lines
+
+
+class RecipeImporter:
+    """
+    Validates NDJSON lines as RecipeSection and inserts them in batches through an insert
+    callable with the signature of RecipeResource.create_recipes / create_data_objects:
+    it takes a list of row dicts and returns one {"status", "recipe_id", "error"} per row.
+    """
+
+    def __init__(self,
+                 insert: Callable,
+                 batch_size: int = 1000,
+                 max_errors: int = 100,
+                 checkpoint_path: Optional[str] = None,
+                 progress: Optional[Callable[[dict], None]] = None):
+        """
+        :param insert: Sync or async batch insert callable, see the class docstring.
+        :param batch_size: Rows per validation batch and insert transaction.
+        :param max_errors: Number of row-level errors kept in the report; the rest are only counted.
+        :param checkpoint_path: File that receives the number of processed lines after every batch.
+        :param progress: Optional callback receiving the report after every batch.
+        """
+        self.insert = insert
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.checkpoint_path = checkpoint_path
+        self.progress = progress
+
+        self._line_numbers = []
+        self._rows = []
+        self._started = None
+        self.report = {
+            "lines_read": 0,
+            "rows_imported": 0,
+            "rows_failed": 0,
+            "bytes_read": 0,
+            "last_committed_line": 0,
+            "elapsed_seconds": 0.0,
+            "rows_per_second": 0.0,
+            "errors": [],
+        }
+
+    def _error(self, line_number: int, message: str):
+        self.report["rows_failed"] += 1
+        if len(self.report["errors"]) < self.max_errors:
+            self.report["errors"].append({"line": line_number, "error": message})
+
+    def _add_line(self, line_number: int, line: bytes) -> bool:
+        """
+        Parse and validate one line into the current batch.
+
+        :return: True when the batch is full and should be inserted.
+        """
+        self.report["lines_read"] += 1
+        self.report["bytes_read"] += len(line) + 1
+        line = line.strip()
+        if not line:
+            return False
+        try:
+            recipe = RecipeSection.model_validate(json.loads(line))
+        except (ValueError, ValidationError) as e:
+            self._error(line_number, str(e))
+            return False
+
+        row = recipe.model_dump(exclude={"links"})
+        if not row.get("create_time"):
+            row["create_time"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._line_numbers.append(line_number)
+        self._rows.append(row)
+        return len(self._rows) >= self.batch_size
+
+    def _take_batch(self):
+        line_numbers, rows = self._line_numbers, self._rows
+        self._line_numbers, self._rows = [], []
+        return line_numbers, rows
+
+    def _record(self, line_numbers: List[int], results: List[dict], last_line: int):
+        for line_number, result in zip(line_numbers, results):
+            if result["status"] == "created":
+                self.report["rows_imported"] += 1
+            else:
+                self._error(line_number, result.get("error") or "insert failed")
+        self._commit(last_line)
+
+    def _commit(self, last_line: int):
+        self.report["last_committed_line"] = last_line
+        elapsed = time.monotonic() - self._started
+        self.report["elapsed_seconds"] = round(elapsed, 3)
+        self.report["rows_per_second"] = round(self.report["rows_imported"] / elapsed, 1) if elapsed else 0.0
+        if self.checkpoint_path:
+            temp_path = self.checkpoint_path + ".tmp"
+            with open(temp_path, "w") as checkpoint:
+                json.dump({"line": last_line}, checkpoint)
+            os.replace(temp_path, self.checkpoint_path)
+        if self.progress:
+            self.progress(self.report)
+
+    def import_lines(self, lines: Iterable[bytes], start_line: int = 0) -> dict:
+        """
+        Import from an iterable of lines, e.g. an open binary file. insert must be synchronous.
+
+        :param start_line: Number of lines to skip, e.g. last_committed_line of an earlier run.
+        """
+        self._started = time.monotonic()
+        line_number = 0
+        for line_number, line in enumerate(lines, start=1):
+            if line_number <= start_line:
+                continue
+            if self._add_line(line_number, line):
+                line_numbers, rows = self._take_batch()
+                self._record(line_numbers, self.insert(rows), line_number)
+        line_numbers, rows = self._take_batch()
+        self._record(line_numbers, self.insert(rows) if rows else [], max(line_number, start_line))
+        return self.report
+
+    async def import_chunks(self, chunks: AsyncIterable[bytes], start_line: int = 0) -> dict:
+        """
+        Import from an async stream of byte chunks, e.g. Request.stream(). insert must be async.
+
+        :param start_line: Number of lines to skip, e.g. last_committed_line of an earlier run.
+        """
+        self._started = time.monotonic()
+        buffer = LineBuffer()
+        line_number = 0
+
+        async def add(line: bytes):
+            nonlocal line_number
+            line_number += 1
+            if line_number > start_line and self._add_line(line_number, line):
+                line_numbers, rows = self._take_batch()
+                self._record(line_numbers, await self.insert(rows), line_number)
+
+        async for chunk in chunks:
+            for line in buffer.feed(chunk):
+                await add(line)
+        for line in buffer.flush():
+            await add(line)
+
+        line_numbers, rows = self._take_batch()
+        self._record(line_numbers, await self.insert(rows) if rows else [], max(line_number, start_line))
+        return self.report
+
+
+def read_checkpoint(path: str) -> int:
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path) as checkpoint:
+        return int(json.load(checkpoint).get("line", 0))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import recipes from an NDJSON file.")
+    parser.add_argument("path", help="NDJSON file, one RecipeSection per line ('-' for stdin)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--chunk-size", type=int, default=500, help="rows per INSERT statement")
+    parser.add_argument("--checkpoint", help="checkpoint file; an existing one resumes the import")
+    parser.add_argument("--start-line", type=int, help="lines to skip; overrides the checkpoint")
+    args = parser.parse_args(argv)
+
+    from app.services.service_factory import ServiceFactory
+
+    data_service = ServiceFactory.get_service("RecipeResourceDataService")
+    table_version = ServiceFactory.get_service("RecipeTableVersion")
+
+    def insert(rows):
+        # Keys come from the same IdBlocks counter as BlockIdAllocator, one range per batch, like
+        # RecipeResource.create_recipes(); an auto-increment key could land in a worker's block.
+        first = data_service.lease_id_block("recipe_management", "Recipe", "recipe_id", len(rows))
+        for recipe_id, row in enumerate(rows, start=first):
+            row["recipe_id"] = recipe_id
+        results = data_service.create_data_objects("recipe_management", "Recipe", rows,
+                                                   key_field="recipe_id", chunk_size=args.chunk_size)
+        # Makes the workers on this host see the new recipes in counts, list ETags and replicas.
+        table_version.bump([result["recipe_id"] for result in results if result["status"] == "created"])
+        return results
+
+    def progress(report):
+        print(f"line {report['last_committed_line']}: {report['rows_imported']} imported, "
+              f"{report['rows_failed']} failed, {report['rows_per_second']} rows/s", file=sys.stderr)
+
+    start_line = args.start_line if args.start_line is not None else read_checkpoint(args.checkpoint)
+    importer = RecipeImporter(insert, batch_size=args.batch_size, checkpoint_path=args.checkpoint,
+                              progress=progress)
+    if args.path == "-":
+        report = importer.import_lines(sys.stdin.buffer, start_line=start_line)
+    else:
+        with open(args.path, "rb") as lines:
+            report = importer.import_lines(lines, start_line=start_line)
+    print(json.dumps(report, indent=2))
+    # Closes the services used here and forgets them, so nothing is left holding a closed one.
+    asyncio.run(ServiceFactory.shutdown())
+    return 0 if not report["rows_failed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""
+Fast path from database rows to JSON response bodies.
+
+Rows are encoded straight to bytes, without building a RecipeSection per row, validating it
+and dumping it again. HATEOAS links are encoded once per view and only the recipe ID is
+spliced in per row. Set RECIPE_VALIDATE_RESPONSES=1 to check every body against the response
+models while debugging.
+"""
+import datetime
+import json
+import os
+import time
+from decimal import Decimal
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from app.models.recipe import RecipeSection, PaginatedRecipeResponse, MultiRecipeResponse
+from framework.utils import metrics
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+RECIPE_FIELDS = tuple(name for name in RecipeSection.model_fields if name != "links")
+VALIDATE_RESPONSES = os.environ.get("RECIPE_VALIDATE_RESPONSES", "").lower() in ("1", "true", "yes")
+
+_ID_PLACEHOLDER = "__recipe_id__"
+
+VALIDATION_SECONDS = metrics.histogram(
+    "model_validation_duration_seconds", "Time spent validating rows or bodies against a Pydantic model.", ["model"]
+)
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value) -> bytes:
+    """
+    Encode a value as compact UTF-8 JSON, with orjson when it is installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(value, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class LinkTemplate:
+    """
+    The HATEOAS links of one view, pre-encoded. render() only joins the recipe ID into the
+    encoded fragments.
+    """
+
+    def __init__(self, links: List[Tuple[str, str, str]]):
+        """
+        :param links: (rel, href, method) with {id} in href where the recipe ID goes.
+        """
+        encoded = dumps([{"rel": rel, "href": href.replace("{id}", _ID_PLACEHOLDER), "method": method}
+                         for rel, href, method in links])
+        self._parts = encoded.split(_ID_PLACEHOLDER.encode())
+
+    def render(self, recipe_id) -> bytes:
+        if isinstance(recipe_id, int):
+            recipe_id = str(recipe_id).encode()
+        else:
+            # Strip the quotes, keep the escaping.
+            recipe_id = dumps(str(recipe_id))[1:-1]
+        return recipe_id.join(self._parts)
+
+
+LIST_LINKS = LinkTemplate([
+    ("self", "/recipes_sections/{id}", "GET"),
+    ("update", "/recipes_sections/{id}", "PUT"),
+    ("delete", "/recipes_sections/{id}", "DELETE"),
+])
+DETAIL_LINKS = LinkTemplate([
+    ("self", "/recipes_sections/{id}", "GET"),
+    ("update", "/recipes_sections/{id}", "PUT"),
+    ("delete", "/recipes_sections/{id}", "DELETE"),
+    ("comments", "/recipes_sections/{id}/comments", "GET"),
+])
+
+
+def output_fields(fields: Optional[List[str]]) -> Tuple[str, ...]:
+    """
+    Fields rendered for a sparse fieldset; recipe_id is always included. All fields if None.
+    """
+    if not fields:
+        return RECIPE_FIELDS
+    return tuple(dict.fromkeys(["recipe_id"] + list(fields)))
+
+
+def encode_recipe(row: dict, links: LinkTemplate, picture_url: Optional[Callable] = None,
+                  fields: Tuple[str, ...] = RECIPE_FIELDS) -> bytes:
+    """
+    Encode one row as a RecipeSection JSON object. The row is not modified.
+
+    :param links: The links of the view the recipe is rendered in.
+    :param picture_url: Maps the stored pictures value to the URL returned to the client.
+    :param fields: The fields to render, see output_fields().
+    """
+    record = {field: row.get(field) for field in fields}
+    if picture_url is not None and "pictures" in record:
+        record["pictures"] = picture_url(record["pictures"])
+    body = dumps(record)
+    return body[:-1] + b',"links":' + links.render(record["recipe_id"]) + b"}"
+
+
+def encode_page(rows: Iterable[dict], pagination: BaseModel, links: LinkTemplate,
+                picture_url: Optional[Callable] = None, fields: Tuple[str, ...] = RECIPE_FIELDS) -> bytes:
+    """
+    Encode a PaginatedRecipeResponse body.
+    """
+    data = b",".join(encode_recipe(row, links, picture_url, fields) for row in rows)
+    return b'{"data":[' + data + b'],"pagination":' + dumps(pagination.model_dump()) + b"}"
+
+
+def encode_many(rows: Iterable[Optional[dict]], missing: List[int], links: LinkTemplate,
+                picture_url: Optional[Callable] = None) -> bytes:
+    """
+    Encode a MultiRecipeResponse body; rows that are None are encoded as null.
+    """
+    data = b",".join(encode_recipe(row, links, picture_url) if row is not None else b"null" for row in rows)
+    return b'{"data":[' + data + b'],"missing":' + dumps(missing) + b"}"
+
+
+def validate_recipe(body: bytes) -> bytes:
+    if VALIDATE_RESPONSES:
+        started = time.perf_counter()
+        RecipeSection.model_validate_json(body)
+        VALIDATION_SECONDS.labels("RecipeSection").observe(time.perf_counter() - started)
+    return body
+
+
+def validate_page(body: bytes) -> bytes:
+    if VALIDATE_RESPONSES:
+        started = time.perf_counter()
+        PaginatedRecipeResponse.model_validate_json(body)
+        VALIDATION_SECONDS.labels("PaginatedRecipeResponse").observe(time.perf_counter() - started)
+    return body
+
+
+def validate_many(body: bytes) -> bytes:
+    if VALIDATE_RESPONSES:
+        started = time.perf_counter()
+        MultiRecipeResponse.model_validate_json(body)
+        VALIDATION_SECONDS.labels("MultiRecipeResponse").observe(time.perf_counter() - started)
+    return body
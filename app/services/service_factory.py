@@ -1,35 +1,144 @@
+import os
 from framework.services.service_factory import BaseServiceFactory
-import app.resources.recipe_resource as recipe_resource
-from framework.services.data_access.MySQLRDBDataService import MySQLRDBDataService
 
+# Recipe IDs each worker leases at a time.
+ID_BLOCK_SIZE = 100
 
-# TODO -- Implement this class
-class ServiceFactory(BaseServiceFactory):
-    def __init__(self):
-        super().__init__()
 
+class ServiceFactory(BaseServiceFactory):
+    """
+    The recipe service's services. Each one is built on first use and shared; modules are
+    named as strings so that pymysql, the GCS SDK and Pillow are only imported when needed.
+    The services holding connections, threads or processes are closed by the app lifespan.
+    """
 
     @classmethod
-    def get_service(self, service_name):
-        #
-        # TODO -- The terrible, hardcoding and hacking continues.
-        #
-        if service_name == 'RecipeResource':
-            result = recipe_resource.RecipeResource(config=None)
-        elif service_name == 'RecipeResourceDataService':
-            print("inside get_service")
-            context = dict(user="jigglypuff7", password="Jigglypuff7!",
-                            host="jigglypuff7.c7s86kaawl6v.us-east-2.rds.amazonaws.com", port=3306)
-            print("initialized context.")
-            data_service = MySQLRDBDataService(context=context)
-            print(data_service)
-            result = data_service
-            """
-            context = dict(user="root", password="dbuserdbuser",
-                           host="localhost", port=3306)
-            """
+    def service_definitions(cls) -> dict:
+        if os.environ.get("RECIPE_DATA_SERVICE") == "sqlite":
+            # RECIPE_DATA_SERVICE=sqlite runs against a local SQLite file (or :memory:)
+            # instead of RDS, for benchmarks. See benchmarks/README.md.
+            data_service = dict(
+                factory="framework.services.data_access.SQLiteDataService:SQLiteDataService",
+                kwargs=dict(context=dict(databases={
+                    "recipe_management": os.environ.get("RECIPE_SQLITE_PATH", ":memory:")
+                }))
+            )
+        else:
+            # context = dict(user="root", password="dbuserdbuser", host="localhost", port=3306)
+            data_service = dict(
+                factory="framework.services.data_access.MySQLRDBDataService:MySQLRDBDataService",
+                kwargs=dict(context=dict(user="jigglypuff7", password="Jigglypuff7!",
+                                         host="jigglypuff7.c7s86kaawl6v.us-east-2.rds.amazonaws.com", port=3306,
+                                         pool_min_size=2, pool_max_size=10, pool_idle_timeout=300,
+                                         pool_health_check_interval=30, pool_checkout_timeout=10))
+            )
+
+        # RECIPE_IMAGE_STORAGE=local swaps GCS for the filesystem in tests and benchmarks.
+        if os.environ.get("RECIPE_IMAGE_STORAGE") == "local":
+            image_storage = dict(
+                factory="framework.services.storage.LocalStorageBackend:LocalStorageBackend",
+                kwargs=dict(context=dict(root=os.environ.get("RECIPE_IMAGE_DIR", "/tmp/recipe-images")))
+            )
         else:
-            print("No such service name")
-            result = None
+            image_storage = dict(
+                factory="framework.services.storage.GCSStorageBackend:GCSStorageBackend",
+                kwargs=dict(context=dict(bucket="jigglypuff-images", make_public=True))
+            )
 
-        return result
\ No newline at end of file
+        return {
+            # Loads the read replica, if enabled, before the first request.
+            'RecipeResource': dict(
+                factory="app.resources.recipe_resource:RecipeResource",
+                kwargs=dict(config=None),
+                startup="warm_replica"
+            ),
+            # The data service owns the connection pool; opened at startup, closed at shutdown.
+            'RecipeResourceDataService': dict(data_service, services=dict(profiler='RecipeQueryProfiler'),
+                                              eager=True, shutdown="close"),
+            # Off unless RECIPE_QUERY_PROFILE=1; see /debug/queries.
+            'RecipeQueryProfiler': dict(
+                factory="framework.services.data_access.QueryProfiler:QueryProfiler",
+                enabled=os.environ.get("RECIPE_QUERY_PROFILE", "").lower() in ("1", "true", "yes"),
+                kwargs=dict(context=dict(
+                    slow_query_threshold=float(os.environ.get("RECIPE_SLOW_QUERY_MS", "100")) / 1000,
+                    explain_slow_queries=os.environ.get("RECIPE_EXPLAIN_SLOW_QUERIES", "").lower() in ("1", "true", "yes"),
+                    log_size=1000,
+                    summary_interval=300
+                )),
+                shutdown="close"
+            ),
+            'RecipeResourceAsyncDataService': dict(
+                factory="framework.services.data_access.AsyncDataService:ExecutorDataService",
+                services=dict(data_service='RecipeResourceDataService'),
+                kwargs=dict(context=dict(executor_max_workers=10, executor_max_pending=512)),
+                shutdown="close"
+            ),
+            # Keys for new recipes, leased from the database in blocks; see lease_id_block().
+            'RecipeIdAllocator': dict(
+                factory="framework.services.data_access.IdAllocator:BlockIdAllocator",
+                services=dict(data_service='RecipeResourceAsyncDataService'),
+                kwargs=dict(context=dict(database="recipe_management", table="Recipe", key_field="recipe_id",
+                                         block_size=ID_BLOCK_SIZE)),
+                shutdown="close"
+            ),
+            # Coalesces concurrent identical reads; waiters give up with a TimeoutError after 10s.
+            'RecipeReadFlights': dict(
+                factory="framework.utils.singleflight:SingleFlight",
+                kwargs=dict(name="recipe_reads", timeout=10)
+            ),
+            'RecipeCache': dict(
+                factory="framework.services.cache.LRUCache:LRUCache",
+                kwargs=dict(config=dict(max_entries=10000, max_bytes=64 * 1024 * 1024, ttl=300, negative_ttl=30))
+            ),
+            # Off unless RECIPE_SHARED_CACHE=1. Rendered recipe bodies shared by the workers on a host.
+            'RecipeSharedCache': dict(
+                factory="framework.services.cache.SharedMemoryCache:SharedMemoryCache",
+                enabled=os.environ.get("RECIPE_SHARED_CACHE", "").lower() in ("1", "true", "yes"),
+                kwargs=dict(config=dict(name=os.environ.get("RECIPE_SHARED_CACHE_NAME", "recipe-bodies-v2"),
+                                        slots=8192, ways=8, slot_size=8192, ttl=60)),
+                shutdown="close"
+            ),
+            'RecipeCountCache': dict(
+                factory="framework.services.cache.LRUCache:LRUCache",
+                kwargs=dict(config=dict(max_entries=1000, ttl=60))
+            ),
+            'RecipeValidatorCache': dict(
+                factory="framework.services.cache.LRUCache:LRUCache",
+                kwargs=dict(config=dict(max_entries=50000, ttl=300))
+            ),
+            # Shared by the workers on a host, so a write through any of them makes every worker's
+            # cached recipes, counts and ETags stale.
+            'RecipeTableVersion': dict(
+                factory="framework.utils.etag:SharedChangeCounter",
+                kwargs=dict(name=os.environ.get("RECIPE_CHANGE_COUNTER_NAME", "recipe-changes-v1")),
+                shutdown="close"
+            ),
+            'RecipeSearchIndex': dict(
+                factory="framework.services.search.InvertedIndex:InvertedIndex",
+                kwargs=dict(fields={"recipe_name": 2.0, "content": 1.0})
+            ),
+            'RecipeIngredientIndex': dict(factory="framework.services.search.BitmapIndex:BitmapIndex"),
+            # Off unless RECIPE_READ_REPLICA=1; the resource then reads from the database.
+            'RecipeReplica': dict(
+                factory="framework.services.replica.ColumnarReplica:ColumnarReplica",
+                enabled=os.environ.get("RECIPE_READ_REPLICA", "").lower() in ("1", "true", "yes"),
+                kwargs=dict(context=dict(
+                    key_field="recipe_id",
+                    columns=dict(recipe_id="int", recipe_name="str", user_id="int", content="text",
+                                 rating="float", cuisine_id="int", ingredient_id="text", comment="text",
+                                 cooking_time="int", create_time="text", pictures="text"),
+                    watermark_fields=["create_time"],
+                    refresh_interval=float(os.environ.get("RECIPE_REPLICA_REFRESH", "5")),
+                    reload_interval=3600,
+                    # Other workers' ID blocks can land below the largest replicated key.
+                    refresh_overlap=10 * ID_BLOCK_SIZE
+                ))
+            ),
+            'ImageStorage': image_storage,
+            'ImageDerivativeQueue': dict(
+                factory="app.services.image_derivatives:DerivativeQueue",
+                services=dict(backend='ImageStorage'),
+                kwargs=dict(context=dict(max_workers=2, max_pending=32, max_jobs=1000)),
+                shutdown="shutdown"
+            ),
+        }
@@ -0,0 +1,51 @@
+"""
+Metrics read at scrape time from the counters the caches and the connection pool already keep,
+so the request path pays nothing for them.
+"""
+from typing import Iterable
+
+from app.services.service_factory import ServiceFactory
+from framework.utils import metrics
+
+CACHES = ("RecipeCache", "RecipeSharedCache", "RecipeCountCache", "RecipeValidatorCache")
+
+
+def collect_cache_metrics() -> Iterable[metrics.Family]:
+    lookups, evictions, entries, size, hit_ratio = [], [], [], [], []
+    for name in CACHES:
+        cache = ServiceFactory.get_service(name)
+        if cache is None:
+            continue
+        stats = cache.stats()
+        labels = dict(cache=name)
+        for result, key in (("hit", "hits"), ("negative_hit", "negative_hits"), ("miss", "misses")):
+            lookups.append((dict(labels, result=result), stats[key]))
+        evictions.append((labels, stats["evictions"]))
+        entries.append((labels, stats["entries"]))
+        size.append((labels, stats["bytes"]))
+        hit_ratio.append((labels, stats["hit_rate"]))
+
+    yield "cache_lookups_total", "counter", "Cache lookups by result; negative hits are cached misses.", lookups
+    yield "cache_evictions_total", "counter", "Entries evicted to stay within the cache's limits.", evictions
+    yield "cache_entries", "gauge", "Entries in the cache.", entries
+    yield "cache_bytes", "gauge", "Estimated size of the cached values.", size
+    yield "cache_hit_ratio", "gauge", "Hits, including negative hits, per lookup since start.", hit_ratio
+
+
+def collect_pool_metrics() -> Iterable[metrics.Family]:
+    stats = ServiceFactory.get_service("RecipeResourceAsyncDataService").get_pool_stats()
+    if "in_use" not in stats:
+        # Not a pooled data service, or the pool is not open yet.
+        return
+    yield "db_pool_connections", "gauge", "Open database connections by state.", [
+        (dict(state="in_use"), stats["in_use"]),
+        (dict(state="idle"), stats["idle"]),
+    ]
+    yield "db_pool_checkouts_total", "counter", "Connections checked out of the pool.", [({}, stats["checkouts"])]
+    yield "db_pool_waits_total", "counter", "Checkouts that waited for a free connection.", [({}, stats["waits"])]
+    yield "db_pool_timeouts_total", "counter", "Checkouts that gave up waiting.", [({}, stats["timeouts"])]
+
+
+def register(registry: metrics.Registry = metrics.REGISTRY):
+    registry.add_collector(collect_cache_metrics)
+    registry.add_collector(collect_pool_metrics)
@@ -0,0 +1,103 @@
+"""
+Synthetic recipe data for benchmarks: the Recipe and IdBlocks tables for SQLite and
+deterministic rows, so runs with the same --rows and --seed see the same data.
+"""
+import datetime
+import io
+import random
+from typing import List
+
+DATABASE = "recipe_management"
+TABLE = "Recipe"
+
+RECIPE_TABLE_SQL = f"""
+CREATE TABLE IF NOT EXISTS {DATABASE}.{TABLE} (
+    recipe_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    recipe_name TEXT,
+    user_id INTEGER,
+    content TEXT,
+    rating REAL,
+    cuisine_id INTEGER,
+    ingredient_id TEXT,
+    comment TEXT,
+    cooking_time INTEGER,
+    create_time TEXT,
+    pictures TEXT
+);
+CREATE INDEX IF NOT EXISTS {DATABASE}.idx_recipe_name ON {TABLE} (recipe_name);
+CREATE INDEX IF NOT EXISTS {DATABASE}.idx_recipe_create_time ON {TABLE} (create_time);
+CREATE INDEX IF NOT EXISTS {DATABASE}.idx_recipe_rating ON {TABLE} (rating);
+-- Counters for SQLiteDataService.lease_id_block(), see migrations/001_id_blocks.sql.
+CREATE TABLE IF NOT EXISTS {DATABASE}.IdBlocks (
+    name TEXT PRIMARY KEY,
+    next_id INTEGER NOT NULL
+);
+"""
+
+DISHES = ["pasta", "risotto", "curry", "stew", "salad", "soup", "tacos", "pie", "noodles", "omelette",
+          "dumplings", "paella", "chili", "gnocchi", "lasagna", "ramen", "burrito", "kebab", "tart", "bread"]
+ADJECTIVES = ["spicy", "creamy", "smoky", "quick", "classic", "roasted", "vegan", "crispy", "lemony",
+              "garlic", "herbed", "sweet", "sour", "hearty", "rustic", "grilled", "baked", "fresh"]
+STEPS = ["chop the onions", "heat the oil", "simmer for ten minutes", "season to taste", "stir in the cream",
+         "bake until golden", "rest the dough", "toast the spices", "whisk the eggs", "drain the pasta",
+         "fold in the herbs", "reduce the sauce", "grill on high heat", "serve immediately"]
+INGREDIENT_COUNT = 200
+
+
+def make_recipe(rng: random.Random, index: int) -> dict:
+    """
+    One recipe row without recipe_id. content is a few hundred bytes to a few KB, like real
+    recipes, so projecting it away is measurable.
+    """
+    ingredients = sorted(rng.sample(range(1, INGREDIENT_COUNT + 1), rng.randint(3, 10)))
+    created = datetime.datetime(2024, 1, 1) + datetime.timedelta(minutes=index * 7)
+    return {
+        "recipe_name": f"{rng.choice(ADJECTIVES)} {rng.choice(ADJECTIVES)} {rng.choice(DISHES)}",
+        "user_id": rng.randint(1, 500),
+        "content": ". ".join(rng.choice(STEPS) for _ in range(rng.randint(10, 80))) + ".",
+        "rating": round(rng.uniform(1, 5), 1) if rng.random() > 0.05 else None,
+        "cuisine_id": rng.randint(1, 20),
+        "ingredient_id": ", ".join(str(i) for i in ingredients),
+        "comment": None,
+        "cooking_time": rng.randint(5, 180),
+        "create_time": created.strftime("%Y-%m-%d %H:%M:%S"),
+        "pictures": f"recipe-{index}.jpg",
+    }
+
+
+def make_recipes(count: int, seed: int = 0, start: int = 0) -> List[dict]:
+    rng = random.Random(seed * 1000003 + start)
+    return [make_recipe(rng, start + i) for i in range(count)]
+
+
+def seed_database(data_service, rows: int, seed: int = 0, batch_size: int = 5000) -> int:
+    """
+    Create the Recipe table through an SQLiteDataService and fill it with rows recipes.
+
+    :return: The number of rows inserted.
+    """
+    data_service.execute_script(RECIPE_TABLE_SQL)
+    inserted = 0
+    for start in range(0, rows, batch_size):
+        batch = make_recipes(min(batch_size, rows - start), seed=seed, start=start)
+        results = data_service.create_data_objects(DATABASE, TABLE, batch, chunk_size=500)
+        inserted += sum(1 for result in results if result["status"] == "created")
+    return inserted
+
+
+def make_image(index: int, size: int = 640) -> bytes:
+    """
+    A small JPEG, different for every index so uploads are not deduplicated. Falls back to
+    random bytes if Pillow is not installed; derivative jobs then fail, uploads still work.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return random.Random(index).randbytes(64 * 1024)
+    image = Image.new("RGB", (size, size * 3 // 4), ((index * 37) % 256, (index * 91) % 256, 128))
+    # The colour alone repeats every 256 images, so also write the index into the first row.
+    for x, byte in enumerate(index.to_bytes(4, "big")):
+        image.paste((byte, 255 - byte, 0), (x * 8, 0, x * 8 + 8, 8))
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=85)
+    return output.getvalue()
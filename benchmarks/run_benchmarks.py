@@ -0,0 +1,307 @@
+"""
+Load generator for the recipe API.
+
+By default the app runs in-process on an SQLite copy of the Recipe table and local image
+storage, so nothing touches RDS or GCS. With --base-url it drives a running server instead.
+Every scenario in benchmarks/scenarios.py is run in turn with --concurrency requests in
+flight; throughput and p50/p95/p99 latency are printed and written to --output as JSON.
+Pass an earlier results file with --compare to flag regressions.
+
+    python -m benchmarks.run_benchmarks --rows 10000 --concurrency 16 --output results.json
+    python -m benchmarks.run_benchmarks --compare results.json --fail-on-regression
+"""
+import argparse
+import asyncio
+import contextlib
+import datetime
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import List, Optional
+
+from benchmarks import fixtures, scenarios
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(latencies: List[float], statuses: Counter, errors: int, duration: float) -> dict:
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        "requests": count,
+        "errors": errors,
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(count / duration, 1) if duration else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / count * 1000, 3) if count else 0.0,
+            "p50": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95": round(percentile(latencies, 0.95) * 1000, 3),
+            "p99": round(percentile(latencies, 0.99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3) if count else 0.0,
+        },
+        "status_codes": {str(code): n for code, n in sorted(statuses.items())},
+    }
+
+
+async def run_scenario(client, scenario: scenarios.Scenario, state: dict, requests: int,
+                       concurrency: int, warmup: int) -> dict:
+    """
+    Send requests requests with at most concurrency in flight. The first warmup requests are
+    sent but not measured.
+    """
+    for i in range(min(warmup, requests)):
+        method, url, kwargs = scenario.build(state, -1 - i)
+        await client.request(method, url, **kwargs)
+
+    latencies = []
+    statuses = Counter()
+    errors = 0
+    numbers = itertools.count()
+
+    async def worker():
+        nonlocal errors
+        for i in numbers:
+            if i >= requests:
+                return
+            method, url, kwargs = scenario.build(state, i)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                status_code = response.status_code
+            except Exception:
+                status_code = 0
+            latencies.append(time.perf_counter() - start)
+            statuses[status_code] += 1
+            if status_code not in scenario.expected:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return summarize(latencies, statuses, errors, time.perf_counter() - start)
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[str]:
+    """
+    :param threshold: Allowed relative change, e.g. 0.1 for 10%.
+    :return: One line per scenario whose p95 grew, or throughput dropped, by more than threshold.
+    """
+    regressions = []
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        old_p95, new_p95 = previous["latency_ms"]["p95"], current["latency_ms"]["p95"]
+        old_rps, new_rps = previous["throughput_rps"], current["throughput_rps"]
+        if old_p95 and new_p95 > old_p95 * (1 + threshold):
+            regressions.append(f"{name}: p95 {old_p95:.2f} ms -> {new_p95:.2f} ms")
+        if old_rps and new_rps < old_rps * (1 - threshold):
+            regressions.append(f"{name}: throughput {old_rps:.1f} -> {new_rps:.1f} req/s")
+    return regressions
+
+
+def print_report(results: dict, baseline: Optional[dict], out=sys.stdout):
+    header = f"{'scenario':<26}{'req':>6}{'err':>5}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    if baseline:
+        header += f"{'p95 vs base':>13}"
+    print(header, file=out)
+    for name, result in results["scenarios"].items():
+        latency = result["latency_ms"]
+        line = (f"{name:<26}{result['requests']:>6}{result['errors']:>5}{result['throughput_rps']:>10.1f}"
+                f"{latency['p50']:>10.2f}{latency['p95']:>10.2f}{latency['p99']:>10.2f}")
+        previous = (baseline or {}).get("scenarios", {}).get(name)
+        if previous and previous["latency_ms"]["p95"]:
+            change = latency["p95"] / previous["latency_ms"]["p95"] - 1
+            line += f"{change:>+12.1%}"
+        print(line, file=out)
+
+
+@contextlib.contextmanager
+def silenced_output(enabled: bool):
+    """
+    Point file descriptors 1 and 2 at /dev/null. Log handlers and span exporters hold on to
+    the original streams, so redirecting sys.stdout would not reach them.
+
+    :return: A file object still connected to the real stderr, for progress messages.
+    """
+    if not enabled:
+        yield sys.stderr
+        return
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved = [os.dup(1), os.dup(2)]
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    progress = os.fdopen(os.dup(saved[1]), "w", buffering=1)
+    try:
+        os.dup2(devnull, 1)
+        os.dup2(devnull, 2)
+        yield progress
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(saved[0], 1)
+        os.dup2(saved[1], 2)
+        for fd in saved + [devnull]:
+            os.close(fd)
+        progress.close()
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def in_process_app(args):
+    """
+    Configure the factory for SQLite and local storage, seed the table and import the app.
+    Environment variables have to be set before the app modules are imported.
+    """
+    image_dir = tempfile.mkdtemp(prefix="recipe-bench-images-")
+    os.environ["RECIPE_DATA_SERVICE"] = "sqlite"
+    os.environ["RECIPE_SQLITE_PATH"] = args.database
+    os.environ["RECIPE_IMAGE_STORAGE"] = "local"
+    os.environ["RECIPE_IMAGE_DIR"] = image_dir
+    if args.replica:
+        os.environ["RECIPE_READ_REPLICA"] = "1"
+
+    from app.main import app
+    from app.services.service_factory import ServiceFactory
+
+    data_service = ServiceFactory.get_service("RecipeResourceDataService")
+    existing = 0
+    if args.database != ":memory:":
+        data_service.execute_script(fixtures.RECIPE_TABLE_SQL)
+        existing = data_service.get_total_count(fixtures.DATABASE, fixtures.TABLE)
+    if existing < args.rows:
+        print(f"Seeding {args.rows - existing} recipes...", file=sys.stderr)
+        fixtures.seed_database(data_service, args.rows - existing, seed=args.seed)
+    return app
+
+
+async def run(args) -> dict:
+    import httpx
+
+    selected = scenarios.select(args.scenarios)
+    if args.base_url:
+        transport = None
+        base_url = args.base_url
+    else:
+        transport = httpx.ASGITransport(app=in_process_app(args))
+        base_url = "http://benchmark"
+
+    delete_requests = args.requests
+    state = {
+        "seed": args.seed,
+        "rows": args.rows,
+        # The last rows are reserved for the delete scenario.
+        "read_max_id": args.rows - delete_requests,
+        "image_offset": int(time.time()) % 1_000_000 * 10_000,
+    }
+
+    results = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "target": args.base_url or "in-process (sqlite)",
+            "replica": args.replica,
+            "rows": args.rows,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "seed": args.seed,
+        },
+        "scenarios": {},
+    }
+
+    # The in-process app logs every request and prints spans; keep that cost but not the noise.
+    quiet = transport is not None and not args.show_app_output
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=args.timeout) as client:
+        with silenced_output(quiet) as progress:
+            await scenarios.prepare(client, state)
+            for scenario in selected:
+                requests = min(scenario.requests or args.requests, args.requests)
+                print(f"{scenario.name}: {requests} requests", file=progress)
+                results["scenarios"][scenario.name] = await run_scenario(
+                    client, scenario, state, requests, args.concurrency, args.warmup
+                )
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every route of the recipe API.")
+    parser.add_argument("--base-url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--rows", type=int, default=10000, help="recipes in the table")
+    parser.add_argument("--database", default=":memory:",
+                        help="SQLite file for the in-process app; an existing file is reused")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured requests per scenario")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per request, in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="seed for data and request parameters")
+    parser.add_argument("--scenario", dest="scenarios", action="append",
+                        help="run only this scenario; repeatable")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative change counted as a regression (default 0.10)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit with 1 on a regression")
+    parser.add_argument("--replica", action="store_true", help="serve reads from the in-process read replica")
+    parser.add_argument("--show-app-output", action="store_true", help="do not silence the in-process app")
+    parser.add_argument("--seed-only", action="store_true",
+                        help="create and fill --database, then exit; for use with a separate server")
+    args = parser.parse_args(argv)
+
+    if args.seed_only:
+        if args.database == ":memory:":
+            parser.error("--seed-only needs --database")
+        in_process_app(args)
+        return 0
+    if args.requests >= args.rows:
+        parser.error("--requests must be smaller than --rows; the delete scenario removes that many rows")
+
+    try:
+        results = asyncio.run(run(args))
+    except ValueError as e:
+        parser.error(str(e))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    failed = [name for name, result in results["scenarios"].items() if result["errors"]]
+    if failed:
+        print(f"Unexpected status codes in: {', '.join(failed)}", file=sys.stderr)
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+One scenario per route (or per interesting variant of a route) in app/routers/recipes.py.
+
+A scenario turns a request number into (method, url, httpx keyword arguments). Shared inputs,
+such as ETags, cursors and an uploaded image, are gathered once by prepare() before timing.
+Reads run before writes, and deletes only touch the last rows, so every scenario sees the
+data it expects.
+"""
+import json
+import random
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks import fixtures
+
+
+class Scenario:
+
+    def __init__(self, name: str, build: Callable, expected: Tuple[int, ...] = (200,),
+                 requests: Optional[int] = None):
+        """
+        :param name: Stable identifier, used as the key in results files.
+        :param build: build(state, i) -> (method, url, kwargs) for request number i. Warmup
+            requests get negative numbers.
+        :param expected: Status codes counted as success.
+        :param requests: Fixed number of requests, for scenarios too slow for the default.
+        """
+        self.name = name
+        self.build = build
+        self.expected = expected
+        self.requests = requests
+
+
+def _rng(state: dict, i: int) -> random.Random:
+    return random.Random(state["seed"] * 7919 + i)
+
+
+def _read_id(state: dict, i: int) -> int:
+    return _rng(state, i).randint(1, state["read_max_id"])
+
+
+def _new_recipe(state: dict, i: int) -> dict:
+    recipe = fixtures.make_recipe(_rng(state, i), state["rows"] + i)
+    recipe["recipe_name"] = "benchmark " + recipe["recipe_name"]
+    return recipe
+
+
+def _multi(state, i):
+    rng = _rng(state, i)
+    ids = ",".join(str(rng.randint(1, state["read_max_id"])) for _ in range(20))
+    return "GET", f"/recipes_sections/multi?ids={ids}", {}
+
+
+def _list_offset(state, i, extra=""):
+    offset = _rng(state, i).randint(0, max(state["read_max_id"] - 100, 0))
+    return "GET", f"/recipes_sections?offset={offset}&limit=100{extra}", {}
+
+
+def _list_cursor(state, i):
+    cursor = state["cursors"][i % len(state["cursors"])]
+    return "GET", f"/recipes_sections?paging=cursor&limit=100&cursor={cursor}", {}
+
+
+def _search(state, i):
+    rng = _rng(state, i)
+    return "GET", f"/recipes_sections?q={rng.choice(fixtures.ADJECTIVES)}+{rng.choice(fixtures.DISHES)}&limit=20", {}
+
+
+def _ingredients(state, i):
+    rng = _rng(state, i)
+    ingredients = rng.sample(range(1, 31), 2)
+    return "GET", f"/recipes_sections?ingredients={ingredients[0]},{ingredients[1]}&match=any&limit=20", {}
+
+
+def _conditional(state, i):
+    recipe_id, etag = state["etags"][i % len(state["etags"])]
+    return "GET", f"/recipes_sections/{recipe_id}", {"headers": {"If-None-Match": etag}}
+
+
+def _batch(state, i):
+    return "POST", "/recipes_sections/batch", {"json": [_new_recipe(state, i * 100 + j) for j in range(100)]}
+
+
+def _import(state, i):
+    lines = "\n".join(json.dumps(_new_recipe(state, i * 500 + j)) for j in range(500))
+    return "POST", "/recipes_sections/import", {"content": lines.encode(),
+                                                "headers": {"Content-Type": "application/x-ndjson"}}
+
+
+def _upload(state, i):
+    image = fixtures.make_image(state["image_offset"] + i)
+    return "POST", "/upload", {"files": {"image": (f"bench-{i}.jpg", image, "image/jpeg")}}
+
+
+def _upload_stream(state, i):
+    image = fixtures.make_image(state["image_offset"] + 1_000_000 + i)
+    return "POST", "/upload/stream?filename=bench.jpg", {"content": image,
+                                                         "headers": {"Content-Type": "image/jpeg"}}
+
+
+def _delete(state, i):
+    # Deletes walk down from the last seeded row; reads never ask for these IDs.
+    return "DELETE", f"/recipes_sections/{state['rows'] - i}", {}
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario("get_recipe", lambda s, i: ("GET", f"/recipes_sections/{_read_id(s, i)}", {})),
+    Scenario("get_recipe_fields",
+             lambda s, i: ("GET", f"/recipes_sections/{_read_id(s, i)}?fields=recipe_name,rating,pictures", {})),
+    Scenario("get_recipe_not_modified", _conditional, expected=(304,)),
+    Scenario("get_recipes_multi", _multi),
+    Scenario("list_offset", _list_offset),
+    Scenario("list_offset_fields", lambda s, i: _list_offset(s, i, "&fields=recipe_name,rating,pictures")),
+    Scenario("list_offset_single_query", lambda s, i: _list_offset(s, i, "&count=single_query")),
+    Scenario("list_sorted", lambda s, i: _list_offset(s, i, "&sort_by=rating&order=desc")),
+    Scenario("list_cursor", _list_cursor),
+    Scenario("search", _search, expected=(200, 404)),
+    Scenario("ingredients", _ingredients, expected=(200, 404)),
+    Scenario("export_ndjson", lambda s, i: ("GET", "/recipes_sections/export", {}), requests=5),
+    Scenario("export_csv", lambda s, i: ("GET", "/recipes_sections/export?format=csv", {}), requests=5),
+    Scenario("debug_cache", lambda s, i: ("GET", "/debug/cache", {})),
+    Scenario("debug_search", lambda s, i: ("GET", "/debug/search", {})),
+    Scenario("create_recipe", lambda s, i: ("POST", "/recipes_sections", {"json": _new_recipe(s, i)}),
+             expected=(201,)),
+    Scenario("create_batch", _batch, expected=(201,), requests=20),
+    Scenario("import_ndjson", _import, requests=10),
+    Scenario("update_recipe",
+             lambda s, i: ("PUT", f"/recipes_sections/{_read_id(s, i)}", {"json": _new_recipe(s, i)}),
+             expected=(202,)),
+    Scenario("upload", _upload, requests=50),
+    Scenario("upload_stream", _upload_stream, requests=50),
+    Scenario("create_derivatives",
+             lambda s, i: ("POST", f"/upload/{s['image_name']}/derivatives", {}), expected=(202, 503), requests=20),
+    Scenario("derivative_job_status", lambda s, i: ("GET", f"/upload/jobs/{s['job_id']}", {})),
+    Scenario("delete_recipe", _delete),
+]
+
+
+async def prepare(client, state: dict, pages: int = 20):
+    """
+    Fill state with the inputs some scenarios need: ETags for conditional GETs, cursors for
+    keyset pages and an uploaded image with its derivative job.
+    """
+    state["etags"] = []
+    for recipe_id in range(1, min(100, state["read_max_id"]) + 1):
+        response = await client.get(f"/recipes_sections/{recipe_id}")
+        if response.status_code == 200:
+            state["etags"].append((recipe_id, response.headers["etag"]))
+
+    state["cursors"] = []
+    cursor = ""
+    for _ in range(pages):
+        response = await client.get(f"/recipes_sections?paging=cursor&limit=100&cursor={cursor}")
+        cursor = response.json()["pagination"]["next_cursor"] if response.status_code == 200 else None
+        if not cursor:
+            break
+        state["cursors"].append(cursor)
+
+    response = await client.post("/upload", files={"image": ("prepare.jpg",
+                                                             fixtures.make_image(state["image_offset"] - 1),
+                                                             "image/jpeg")})
+    response.raise_for_status()
+    upload = response.json()
+    state["image_name"] = upload["name"]
+    state["job_id"] = (upload.get("derivatives_job") or {}).get("id", "unknown")
+
+
+def select(names: Optional[List[str]]) -> List[Scenario]:
+    """
+    The scenarios to run, in the standard order.
+
+    :raises ValueError: On an unknown scenario name.
+    """
+    if not names:
+        return list(SCENARIOS)
+    known: Dict[str, Scenario] = {scenario.name: scenario for scenario in SCENARIOS}
+    unknown = [name for name in names if name not in known]
+    if unknown:
+        raise ValueError(f"Unknown scenario(s): {', '.join(unknown)}. Known: {', '.join(known)}")
+    return [scenario for scenario in SCENARIOS if scenario.name in names]
@@ -1,18 +1,97 @@
 import logging
+import time
 import uuid
-from fastapi import Request
+from contextvars import ContextVar
+
+from opentelemetry import trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
 
 logger = logging.getLogger(__name__)
 
-async def correlation_id_middleware(request: Request, call_next):
-    # generate a new correlation id
-    correlation_id = request.headers.get("X-Correlation-ID", str(uuid.uuid4()))
-    request.state.correlation_id = correlation_id
+# One value per request: asyncio tasks and run_in_threadpool copy the context, so log records
+# from anywhere in the request see its own id, unlike a field shared on a logger.
+correlation_id_var: ContextVar[str] = ContextVar("correlation_id", default="N/A")
+
+
+def get_correlation_id() -> str:
+    return correlation_id_var.get()
+
+
+class CorrelationIdFilter(logging.Filter):
+    """
+    Sets record.correlation_id, so formats can use %(correlation_id)s. With a queue handler, add
+    it to the QueueHandler, which runs in the request's context, not to the handlers behind it.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.correlation_id = correlation_id_var.get()
+        return True
+
+
+class CorrelationIdMiddleware:
+    """
+    ASGI middleware: takes the correlation id from the request header (or makes one), sets it
+    for the request, returns it in the response header and wraps the request in a span.
+
+    Plain ASGI rather than @app.middleware("http"), which costs a task and a memory stream
+    per request.
+    """
+
+    def __init__(self, app, header: str = "X-Correlation-ID", request_headers=("X-Trace-Id",),
+                 tracer_name: str = __name__):
+        """
+        :param header: Response header, also read from the request.
+        :param request_headers: Other request headers that may carry the id.
+        """
+        self.app = app
+        self.header = header
+        self.response_header = header.lower().encode("latin-1")
+        self.request_headers = [self.response_header] + [h.lower().encode("latin-1") for h in request_headers]
+        self.tracer = trace.get_tracer(tracer_name)
+
+    def _correlation_id(self, scope) -> str:
+        headers = dict(scope.get("headers") or ())
+        for name in self.request_headers:
+            value = headers.get(name)
+            if value:
+                return value.decode("latin-1")
+        return uuid.uuid4().hex
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-    logger.info(f"Start Request: {request.url.path}, Correlation ID: {correlation_id}")
+        correlation_id = self._correlation_id(scope)
+        scope.setdefault("state", {})["correlation_id"] = correlation_id
+        token = correlation_id_var.set(correlation_id)
+        method = scope["method"]
+        path = scope["path"]
+        started = time.perf_counter()
+        status_code = 500
 
-    response = await call_next(request)
-    response.headers["X-Correlation-ID"] = correlation_id
+        async def send_with_header(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", ())) + [
+                    (self.response_header, correlation_id.encode("latin-1"))
+                ]
+            await send(message)
 
-    logger.info(f"End Request: {request.url.path}, Correlation ID: {correlation_id}")
-    return response
+        # The span is named by method and path only: the full URL makes span names unbounded.
+        with self.tracer.start_as_current_span(f"{method} {path}", kind=SpanKind.SERVER,
+                                               record_exception=True) as span:
+            try:
+                await self.app(scope, receive, send_with_header)
+            finally:
+                if span.is_recording():
+                    span.set_attribute("correlation_id", correlation_id)
+                    span.set_attribute("http.method", method)
+                    span.set_attribute("http.target", path)
+                    span.set_attribute("http.status_code", status_code)
+                    if status_code >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                logger.info("%s %s %s %.1fms", method, path, status_code,
+                            (time.perf_counter() - started) * 1000)
+                correlation_id_var.reset(token)
@@ -0,0 +1,41 @@
+import time
+
+from framework.utils import metrics
+
+REQUEST_SECONDS = metrics.histogram(
+    "http_request_duration_seconds", "Time to the end of the response, by route and status.",
+    ["method", "route", "status"]
+)
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware timing each request. Requests are labelled with the route's path template,
+    e.g. /recipes_sections/{recipe_id}, so the label set stays bounded; requests no route
+    matched are labelled "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router adds the matched route to the scope.
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            REQUEST_SECONDS.labels(scope["method"], route_path, status_code).observe(time.perf_counter() - started)
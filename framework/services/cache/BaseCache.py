@@ -0,0 +1,68 @@
+from abc import ABC, abstractmethod
+from typing import Any, Hashable, Optional
+
+
+class _Sentinel:
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+
+# Returned by get() when the key is not cached.
+MISSING = _Sentinel("MISSING")
+
+# Stored to remember that a key does not exist in the backing store (negative caching).
+NOT_FOUND = _Sentinel("NOT_FOUND")
+
+
+class BaseCache(ABC):
+    """
+    Abstract base class for caches that sit in front of a data service. Concrete classes decide
+    on storage and eviction; callers only rely on get/set/invalidate and the stats counters.
+    """
+
+    def __init__(self, config: Optional[dict] = None):
+        """
+        :param config: Implementation specific settings.
+        """
+        self.config = config or {}
+
+    @abstractmethod
+    def get(self, key: Hashable) -> Any:
+        """
+        :param key: The cache key.
+        :return: The cached value, NOT_FOUND for a cached miss, or MISSING if nothing is cached.
+        """
+        raise NotImplementedError('Abstract method get()')
+
+    @abstractmethod
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """
+        :param key: The cache key.
+        :param value: The value to cache. Pass NOT_FOUND to cache the absence of the key.
+        :param ttl: Seconds until the entry expires; the implementation default if None.
+        """
+        raise NotImplementedError('Abstract method set()')
+
+    @abstractmethod
+    def invalidate(self, key: Hashable):
+        """
+        Drop a single entry, if present.
+        """
+        raise NotImplementedError('Abstract method invalidate()')
+
+    @abstractmethod
+    def clear(self):
+        """
+        Drop every entry.
+        """
+        raise NotImplementedError('Abstract method clear()')
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """
+        :return: Counters such as hits, misses and evictions.
+        """
+        raise NotImplementedError('Abstract method stats()')
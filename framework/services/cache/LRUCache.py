@@ -0,0 +1,118 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from .BaseCache import BaseCache, MISSING, NOT_FOUND
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Rough size in bytes of a cached value. Dicts (DB rows) are measured one level deep, which
+    is good enough to keep the cache inside its memory budget without walking object graphs.
+    """
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+class LRUCache(BaseCache):
+    """
+    Thread-safe in-process LRU cache with per-entry TTL and a bound on both entry count and
+    estimated memory. Cached misses (NOT_FOUND) use their own, usually shorter, TTL.
+    """
+
+    def __init__(self, config: Optional[dict] = None, sizeof: Callable[[Any], int] = estimate_size):
+        """
+        :param config: Optional settings: max_entries, max_bytes, ttl and negative_ttl (seconds).
+        :param sizeof: Function estimating the size of a value in bytes.
+        """
+        super().__init__(config)
+        self.max_entries = self.config.get("max_entries", 10000)
+        self.max_bytes = self.config.get("max_bytes", 64 * 1024 * 1024)
+        self.ttl = self.config.get("ttl", 300.0)
+        self.negative_ttl = self.config.get("negative_ttl", 30.0)
+        self._sizeof = sizeof
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, expires_at, size)
+        self._bytes = 0
+        self._stats = {
+            "hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    def _remove_locked(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return MISSING
+            value, expires_at, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove_locked(key)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            if value is NOT_FOUND:
+                self._stats["negative_hits"] += 1
+            else:
+                self._stats["hits"] += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        if ttl is None:
+            ttl = self.negative_ttl if value is NOT_FOUND else self.ttl
+        size = 0 if value is NOT_FOUND else self._sizeof(value)
+        if size > self.max_bytes:
+            # Never cache a single value that would flush the whole cache.
+            self.invalidate(key)
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove_locked(key)
+            self._entries[key] = (value, time.monotonic() + ttl, size)
+            self._bytes += size
+            self._stats["sets"] += 1
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove_locked(oldest)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            if key in self._entries:
+                self._remove_locked(key)
+                self._stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._stats["invalidations"] += len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            result = dict(self._stats)
+            lookups = result["hits"] + result["negative_hits"] + result["misses"]
+            result.update({
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hit_rate": (result["hits"] + result["negative_hits"]) / lookups if lookups else 0.0,
+            })
+        return result
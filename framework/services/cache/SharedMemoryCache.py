@@ -0,0 +1,248 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Hashable, Optional, Tuple
+
+from .BaseCache import BaseCache, MISSING, NOT_FOUND
+
+_MAGIC = b"RSHMC002"
+# magic, slots, ways, slot size
+_FILE_HEADER = struct.Struct("<8sIII")
+_FILE_HEADER_SIZE = 64
+# sequence, group hash, key hash, stored at, expires at, length, flags
+_SLOT_HEADER = struct.Struct("<QQQddII")
+_SEQUENCE = struct.Struct("<Q")
+
+_EMPTY, _VALUE, _NOT_FOUND = 0, 1, 2
+
+
+def _hash(value: str) -> int:
+    # Never 0, so a zeroed slot matches no key.
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little") or 1
+
+
+def _default_directory() -> str:
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+class SharedMemoryCache(BaseCache):
+    """
+    Cache of byte strings, such as encoded JSON, in a memory-mapped file that every process on
+    the host opens, so worker processes share one copy and one hit rate.
+
+    The file is split into sets of a few fixed-size slots; a key can only live in the set its
+    group hashes to. Reads take no lock: each slot carries a sequence number that writers make
+    odd while they change the slot (a seqlock), and a read that overlaps a write is retried.
+    Writers hold flock() on the file. Reads do not update recency, so a full set evicts the
+    entry stored first. Values larger than a slot are not cached.
+
+    A key is either a plain value or a (group, variant) tuple; invalidating a group drops all
+    its variants. A set() racing an invalidation can still store the old value, so values that
+    go stale should have the version of their source in the key instead, see ChangeCounter;
+    entries of old versions are then never read again and age out.
+    """
+
+    def __init__(self, config: Optional[dict] = None):
+        """
+        :param config: Optional settings: name (of the file), directory (default /dev/shm),
+            slots, ways (slots per set), slot_size (bytes, including a 48 byte header), ttl and
+            negative_ttl (seconds). Every process must use the same
+            settings; the layout is part of the file name, so different ones never share a
+            file. Change name when the format of the stored values changes.
+        """
+        super().__init__(config)
+        self.ways = self.config.get("ways", 8)
+        self.slots = max(self.config.get("slots", 8192) // self.ways, 1) * self.ways
+        self.slot_size = self.config.get("slot_size", 8192)
+        self.ttl = self.config.get("ttl", 60.0)
+        self.negative_ttl = self.config.get("negative_ttl", 30.0)
+        self.capacity = self.slot_size - _SLOT_HEADER.size
+        if self.capacity <= 0:
+            raise ValueError(f"slot_size must be larger than {_SLOT_HEADER.size}")
+
+        name = f"{self.config.get('name', 'cache')}-{self.slots}x{self.slot_size}-{self.ways}"
+        self.path = os.path.join(self.config.get("directory") or _default_directory(), name)
+        self._sets = self.slots // self.ways
+        self._size = _FILE_HEADER_SIZE + self.slots * self.slot_size
+        self._lock = threading.Lock()
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            self._map = self._open()
+        except Exception:
+            os.close(self._fd)
+            raise
+        self._stats = {
+            "hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "too_large": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "read_retries": 0,
+        }
+
+    def _open(self) -> mmap.mmap:
+        header = _FILE_HEADER.pack(_MAGIC, self.slots, self.ways, self.slot_size)
+        with self._write_lock():
+            size = os.fstat(self._fd).st_size
+            if size == 0:
+                # New file; the slots read as empty until written.
+                os.ftruncate(self._fd, self._size)
+                os.pwrite(self._fd, header, 0)
+            elif size != self._size or os.pread(self._fd, len(header), 0) != header:
+                raise ValueError(f"{self.path} is not a cache file with this layout")
+        return mmap.mmap(self._fd, self._size)
+
+    @contextmanager
+    def _write_lock(self):
+        # flock() excludes other processes, not other threads of this one.
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _hashes(key: Hashable) -> Tuple[int, Optional[int]]:
+        # (group, key); the key hash is None for a plain group.
+        if isinstance(key, tuple):
+            return _hash(str(key[0])), _hash("\x1f".join(str(part) for part in key))
+        return _hash(str(key)), None
+
+    def _offsets(self, group: int):
+        first = _FILE_HEADER_SIZE + (group % self._sets) * self.ways * self.slot_size
+        return range(first, first + self.ways * self.slot_size, self.slot_size)
+
+    def _read(self, offset: int, group: int, key: Optional[int]):
+        """
+        :return: (flags, stored_at, expires_at, value bytes) of the slot if it holds the key,
+            else None. Retried while a writer is changing the slot.
+        """
+        for _ in range(8):
+            sequence, slot_group, slot_key, stored_at, expires_at, length, flags = \
+                _SLOT_HEADER.unpack_from(self._map, offset)
+            if sequence & 1:
+                self._stats["read_retries"] += 1
+                continue
+            if flags == _EMPTY or slot_group != group or (key is not None and slot_key != key):
+                return None
+            start = offset + _SLOT_HEADER.size
+            value = self._map[start:start + min(length, self.capacity)]
+            if _SEQUENCE.unpack_from(self._map, offset)[0] == sequence:
+                return flags, stored_at, expires_at, value
+            self._stats["read_retries"] += 1
+        return None
+
+    def _write(self, offset: int, group: int, key: int, stored_at: float, expires_at: float,
+               flags: int, value: bytes = b""):
+        # Caller holds the write lock.
+        sequence = _SEQUENCE.unpack_from(self._map, offset)[0] | 1
+        _SEQUENCE.pack_into(self._map, offset, sequence)
+        self._map[offset + _SLOT_HEADER.size:offset + _SLOT_HEADER.size + len(value)] = value
+        _SLOT_HEADER.pack_into(self._map, offset, sequence, group, key, stored_at, expires_at, len(value), flags)
+        _SEQUENCE.pack_into(self._map, offset, sequence + 1)
+
+    def get(self, key: Hashable) -> Any:
+        group, key_hash = self._hashes(key)
+        now = time.time()
+        for offset in self._offsets(group):
+            slot = self._read(offset, group, key_hash)
+            if slot is None or slot[2] <= now:
+                continue
+            if slot[0] == _NOT_FOUND:
+                self._stats["negative_hits"] += 1
+                return NOT_FOUND
+            self._stats["hits"] += 1
+            return slot[3]
+        self._stats["misses"] += 1
+        return MISSING
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """
+        :param value: bytes, or NOT_FOUND.
+        """
+        if value is not NOT_FOUND and len(value) > self.capacity:
+            self._stats["too_large"] += 1
+            self.invalidate(key)
+            return
+        if ttl is None:
+            ttl = self.negative_ttl if value is NOT_FOUND else self.ttl
+        group, key_hash = self._hashes(key)
+        key_hash = key_hash or group
+        flags, value = (_NOT_FOUND, b"") if value is NOT_FOUND else (_VALUE, value)
+
+        with self._write_lock():
+            now = time.time()
+            target, oldest, oldest_stored_at = None, None, None
+            for offset in self._offsets(group):
+                _, slot_group, slot_key, stored_at, expires_at, _, slot_flags = \
+                    _SLOT_HEADER.unpack_from(self._map, offset)
+                live = slot_flags != _EMPTY and expires_at > now
+                if slot_group == group and slot_key == key_hash:
+                    target = offset
+                elif not live and target is None:
+                    target = offset
+                if live and (oldest is None or stored_at < oldest_stored_at):
+                    oldest, oldest_stored_at = offset, stored_at
+            if target is None:
+                target = oldest
+                self._stats["evictions"] += 1
+            self._write(target, group, key_hash, now, now + ttl, flags, value)
+            self._stats["sets"] += 1
+
+    def invalidate(self, key: Hashable):
+        """
+        Drop the entry, or for a plain key every (key, variant) entry.
+        """
+        group, key_hash = self._hashes(key)
+        with self._write_lock():
+            for offset in self._offsets(group):
+                _, slot_group, slot_key, _, _, _, flags = _SLOT_HEADER.unpack_from(self._map, offset)
+                if flags != _EMPTY and slot_group == group and (key_hash is None or slot_key == key_hash):
+                    self._write(offset, 0, 0, 0.0, 0.0, _EMPTY)
+                    self._stats["invalidations"] += 1
+
+    def clear(self):
+        with self._write_lock():
+            for offset in range(_FILE_HEADER_SIZE, self._size, self.slot_size):
+                if _SLOT_HEADER.unpack_from(self._map, offset)[6] != _EMPTY:
+                    self._write(offset, 0, 0, 0.0, 0.0, _EMPTY)
+                    self._stats["invalidations"] += 1
+
+    def stats(self) -> dict:
+        """
+        Counters are this process's; entries and bytes are read from the shared file.
+        """
+        now = time.time()
+        entries = size = 0
+        for offset in range(_FILE_HEADER_SIZE, self._size, self.slot_size):
+            _, _, _, _, expires_at, length, flags = _SLOT_HEADER.unpack_from(self._map, offset)
+            if flags != _EMPTY and expires_at > now:
+                entries += 1
+                size += length
+        result = dict(self._stats)
+        lookups = result["hits"] + result["negative_hits"] + result["misses"]
+        result.update({
+            "entries": entries,
+            "bytes": size,
+            "max_entries": self.slots,
+            "max_bytes": self.slots * self.capacity,
+            "hit_rate": (result["hits"] + result["negative_hits"]) / lookups if lookups else 0.0,
+            "path": self.path,
+        })
+        return result
+
+    def close(self):
+        """
+        Unmap the file. It is left in place for the other processes.
+        """
+        self._map.close()
+        os.close(self._fd)
@@ -0,0 +1,191 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional
+
+from framework.utils import metrics
+from .BaseDataService import DataDataService
+
+QUERY_SECONDS = metrics.histogram(
+    "db_query_duration_seconds", "Time a data service method ran, not counting the wait for a thread.", ["method"]
+)
+QUERY_ERRORS = metrics.counter("db_query_errors_total", "Data service methods that raised.", ["method"])
+ROWS_RETURNED = metrics.histogram(
+    "db_rows_returned", "Rows returned by the data service's get_ methods.", ["method"],
+    buckets=(0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000, 10000)
+)
+
+
+def _row_count(result: Any) -> Optional[int]:
+    if result is None:
+        return 0
+    if isinstance(result, dict):
+        return 1
+    if isinstance(result, tuple) and result and isinstance(result[0], list):
+        # get_paginated_data_with_count returns (rows, total).
+        return len(result[0])
+    if isinstance(result, list):
+        return len(result)
+    return None
+
+
+def _timed_call(method_name: str, method, args, kwargs) -> Any:
+    started = time.perf_counter()
+    try:
+        result = method(*args, **kwargs)
+    except BaseException:
+        QUERY_ERRORS.labels(method_name).inc()
+        raise
+    finally:
+        QUERY_SECONDS.labels(method_name).observe(time.perf_counter() - started)
+    if method_name.startswith("get_"):
+        rows = _row_count(result)
+        if rows is not None:
+            ROWS_RETURNED.labels(method_name).observe(rows)
+    return result
+
+
+class AsyncDataDataService(ABC):
+    """
+    Async counterpart of DataDataService. Application code running on the event loop
+    awaits these methods instead of calling a blocking driver directly.
+    """
+
+    def __init__(self, context):
+        """
+        :param context: Configuration information the instance needs.
+        """
+        self.context = context
+
+    @abstractmethod
+    async def get_data_object(self,
+                              database_name: str,
+                              collection_name: str,
+                              key_field: str,
+                              key_value: str,
+                              columns: Optional[List[str]] = None):
+        """
+        See DataDataService.get_data_object().
+        """
+        raise NotImplementedError('Abstract method get_data_object()')
+
+
+class ExecutorDataService(AsyncDataDataService):
+    """
+    Adapts a synchronous DataDataService to the async interface by running each call on a
+    bounded thread pool. The number of calls queued or running at once is capped as well, so
+    a slow database applies backpressure to callers instead of growing an unbounded backlog.
+    """
+
+    def __init__(self, data_service: DataDataService, context: Optional[dict] = None):
+        """
+        :param data_service: The synchronous data service to wrap.
+        :param context: Optional settings. 'executor_max_workers' is the number of threads
+            (defaults to the wrapped service's pool_max_size) and 'executor_max_pending' is
+            the number of calls allowed to be queued or running at once.
+        """
+        context = context or {}
+        super().__init__(context)
+        self.data_service = data_service
+
+        max_workers = context.get("executor_max_workers",
+                                  data_service.context.get("pool_max_size", 10))
+        self.max_workers = max_workers
+        self.max_pending = context.get("executor_max_pending", max_workers * 16)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="data-service")
+        self._pending = asyncio.Semaphore(self.max_pending)
+
+    async def run(self, method_name: str, *args, **kwargs) -> Any:
+        """
+        Run any method of the wrapped data service off the event loop. Its duration, and for
+        get_ methods the number of rows returned, are recorded in the db_ metrics.
+
+        :param method_name: Name of the synchronous method to call.
+        :return: Whatever the synchronous method returns.
+        """
+        method = getattr(self.data_service, method_name)
+        async with self._pending:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, _timed_call, method_name, method, args, kwargs)
+
+    async def get_data_object(self, database_name: str, collection_name: str, key_field: str, key_value: str,
+                              columns: Optional[List[str]] = None):
+        return await self.run("get_data_object", database_name, collection_name,
+                              key_field=key_field, key_value=key_value, columns=columns)
+
+    async def get_data_objects(self, database_name: str, collection_name: str, key_field: str,
+                               key_values: List[Any]) -> List[dict]:
+        return await self.run("get_data_objects", database_name, collection_name,
+                              key_field=key_field, key_values=key_values)
+
+    async def create_data_object(self, database_name: str, collection_name: str, data: dict):
+        return await self.run("create_data_object", database_name, collection_name, data)
+
+    async def create_data_objects(self, database_name: str, collection_name: str, rows: List[dict],
+                                  key_field: str = "recipe_id", chunk_size: int = 500) -> List[dict]:
+        return await self.run("create_data_objects", database_name, collection_name, rows,
+                              key_field=key_field, chunk_size=chunk_size)
+
+    async def update_data_object(self, database_name: str, collection_name: str, key_field: str, key_value: Any,
+                                 update_data: dict):
+        return await self.run("update_data_object", database_name, collection_name,
+                              key_field=key_field, key_value=key_value, update_data=update_data)
+
+    async def delete_data_object(self, database_name: str, table_name: str, key_field: str, key_value: Any) -> bool:
+        return await self.run("delete_data_object", database_name, table_name,
+                              key_field=key_field, key_value=key_value)
+
+    async def lease_id_block(self, database_name: str, table_name: str, key_field: str, size: int,
+                             sequence: Optional[str] = None) -> int:
+        return await self.run("lease_id_block", database_name, table_name, key_field=key_field, size=size,
+                              sequence=sequence)
+
+    async def get_total_count(self, database_name: str, table_name: str, filters: Optional[dict] = None) -> int:
+        return await self.run("get_total_count", database_name, table_name, filters=filters)
+
+    async def get_paginated_data(self, database_name: str, table_name: str, offset: int = 0, limit: int = 10,
+                                 filters: Optional[dict] = None, sort_field: Optional[str] = None,
+                                 descending: bool = False, columns: Optional[List[str]] = None,
+                                 key_field: Optional[str] = None):
+        return await self.run("get_paginated_data", database_name, table_name, offset=offset, limit=limit,
+                              filters=filters, sort_field=sort_field, descending=descending, columns=columns,
+                              key_field=key_field)
+
+    async def get_paginated_data_with_count(self, database_name: str, table_name: str, offset: int = 0,
+                                            limit: int = 10, filters: Optional[dict] = None,
+                                            sort_field: Optional[str] = None, descending: bool = False,
+                                            columns: Optional[List[str]] = None, key_field: Optional[str] = None):
+        return await self.run("get_paginated_data_with_count", database_name, table_name, offset=offset,
+                              limit=limit, filters=filters, sort_field=sort_field, descending=descending,
+                              columns=columns, key_field=key_field)
+
+    async def get_approximate_count(self, database_name: str, table_name: str) -> int:
+        return await self.run("get_approximate_count", database_name, table_name)
+
+    async def get_keyset_data(self, database_name: str, table_name: str, key_field: str, limit: int = 10,
+                              after: Optional[dict] = None, sort_field: Optional[str] = None,
+                              descending: bool = False, filters: Optional[dict] = None,
+                              columns: Optional[List[str]] = None):
+        return await self.run("get_keyset_data", database_name, table_name, key_field=key_field, limit=limit,
+                              after=after, sort_field=sort_field, descending=descending, filters=filters,
+                              columns=columns)
+
+    def stream_data(self, database_name: str, table_name: str, columns: Optional[List[str]] = None,
+                    order_by: Optional[str] = None, fetch_size: int = 1000):
+        """
+        Returns the wrapped service's synchronous row generator as is. It must be consumed off
+        the event loop, e.g. by a StreamingResponse, which iterates sync iterators in a thread.
+        """
+        return self.data_service.stream_data(database_name, table_name, columns=columns,
+                                             order_by=order_by, fetch_size=fetch_size)
+
+    def get_pool_stats(self) -> dict:
+        stats = self.data_service.get_pool_stats()
+        stats["executor_max_workers"] = self.max_workers
+        stats["executor_max_pending"] = self.max_pending
+        return stats
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.data_service.close()
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod, abstractclassmethod
+from typing import List, Optional
 
 # TODO -- Add support for standard exceptions.
 
@@ -10,13 +11,35 @@ class DataDataService(ABC):
     independent from specific database choices.
     """
 
-    def __init__(self, context):
+    def __init__(self, context, profiler=None):
         """
         This is a simple approach to dependency injection. The context will contain references
         to configuration information that an instance needs.
         :param context:
+        :param profiler: Optional QueryProfiler that times every statement run by _execute().
         """
         self.context = context
+        self.profiler = profiler
+
+    def _execute(self, cursor, sql_statement: str, params=None):
+        """
+        Run a statement. Subclasses run every statement through here so that it is profiled
+        when a profiler is set; without one this is cursor.execute().
+
+        :param cursor: A DB-API cursor, or anything with the same execute().
+        :return: What cursor.execute() returns.
+        """
+        if self.profiler is None:
+            if params is None:
+                return cursor.execute(sql_statement)
+            return cursor.execute(sql_statement, params)
+        return self.profiler.execute(self, cursor, sql_statement, params, explain=self._explain)
+
+    def _explain(self, cursor, sql_statement: str, params=None) -> list:
+        """
+        The query plan of a SELECT that has just run on cursor, for the profiler.
+        """
+        raise NotImplementedError('_explain()')
 
     @abstractmethod
     def _get_connection(self):
@@ -31,7 +54,8 @@ class DataDataService(ABC):
                         database_name: str,
                         collection_name: str,
                         key_field: str,
-                        key_value: str):
+                        key_value: str,
+                        columns: Optional[List[str]] = None):
         """
         Gets a single data object from a table in a database. Collection is an abstraction of a
         table in the relational model, collection in MongoDB, etc.
@@ -40,6 +64,8 @@ class DataDataService(ABC):
         :param collection_name: The name of the collection, table, etc. in the database.
         :param key_field: A single column, field, ... that is a unique key/identifier.
         :param key_value: The value for the column, field, ... ...
-        :return: The single object identified by the unique field.
+        :param columns: Only return these fields; all fields if None.
+        :return: The single object identified by the unique field, or None if there is none.
+            A failed query raises; callers cache None as 'not found'.
         """
         raise NotImplementedError('Abstract method get_data_object()')
\ No newline at end of file
@@ -0,0 +1,263 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+
+class PoolExhaustedError(Exception):
+    """
+    Raised when no connection could be checked out of the pool before the timeout expired.
+    """
+    pass
+
+
+class PooledConnection:
+    """
+    Thin proxy around a raw DB-API connection. Everything is delegated to the raw connection
+    except close(), which hands the connection back to the pool instead of tearing it down.
+    This keeps the existing 'finally: connection.close()' code in the data services working.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._released = False
+
+    @property
+    def raw(self):
+        return self._raw
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            self._pool.release(self._raw)
+
+    def discard(self):
+        """
+        Return the slot to the pool but throw the underlying connection away, e.g. after an
+        error that leaves the connection in an unknown state.
+        """
+        if not self._released:
+            self._released = True
+            self._pool.release(self._raw, broken=True)
+
+    def __getattr__(self, item):
+        return getattr(self._raw, item)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    A bounded, thread-safe pool of DB-API connections.
+
+    Connections are created on demand up to max_size and kept warm down to min_size. Idle
+    connections older than idle_timeout are evicted, and a connection that has been idle for
+    longer than health_check_interval is pinged on checkout instead of probing on every call.
+    """
+
+    def __init__(self,
+                 connect: Callable,
+                 min_size: int = 1,
+                 max_size: int = 10,
+                 idle_timeout: float = 300.0,
+                 health_check_interval: float = 30.0,
+                 checkout_timeout: float = 10.0,
+                 ping: Optional[Callable] = None):
+        """
+        :param connect: Zero-argument callable returning a new raw connection.
+        :param min_size: Number of idle connections kept open when the pool is quiet.
+        :param max_size: Hard upper bound on open connections (idle + checked out).
+        :param idle_timeout: Seconds after which an idle connection above min_size is closed.
+        :param health_check_interval: Idle seconds after which a connection is pinged on checkout.
+        :param checkout_timeout: Seconds to wait for a free connection before giving up.
+        :param ping: Callable(raw_connection) that raises if the connection is dead.
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        if min_size < 0 or min_size > max_size:
+            raise ValueError("min_size must be between 0 and max_size")
+
+        self._connect = connect
+        self._ping = ping
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.checkout_timeout = checkout_timeout
+
+        self._lock = threading.Condition(threading.Lock())
+        self._idle = deque()  # (raw_connection, last_used_monotonic)
+        self._size = 0        # open connections, idle and checked out
+        self._in_use = 0
+        self._closed = False
+
+        self._stats = {
+            "created": 0,
+            "closed": 0,
+            "checkouts": 0,
+            "reused": 0,
+            "health_checks": 0,
+            "health_check_failures": 0,
+            "idle_evictions": 0,
+            "timeouts": 0,
+            "waits": 0,
+            "wait_time_total": 0.0,
+        }
+
+    def _open(self):
+        raw = self._connect()
+        with self._lock:
+            self._stats["created"] += 1
+        return raw
+
+    def _close_raw(self, raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._stats["closed"] += 1
+
+    def _evict_idle_locked(self, now: float) -> list:
+        """
+        Pop idle connections that exceeded idle_timeout, keeping at least min_size open.
+        The caller closes the returned connections outside the lock.
+        """
+        evicted = []
+        # The oldest idle connections sit at the left of the deque.
+        while self._idle and self._size > self.min_size:
+            raw, last_used = self._idle[0]
+            if now - last_used < self.idle_timeout:
+                break
+            self._idle.popleft()
+            self._size -= 1
+            self._stats["idle_evictions"] += 1
+            evicted.append(raw)
+        return evicted
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledConnection:
+        """
+        Check a connection out of the pool.
+
+        :param timeout: Seconds to wait for a free slot; defaults to checkout_timeout.
+        :return: A PooledConnection. Call close() on it to return it to the pool.
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited_from = None
+
+        while True:
+            raw = None
+            last_used = None
+            must_open = False
+
+            with self._lock:
+                if self._closed:
+                    raise PoolExhaustedError("Connection pool is closed.")
+
+                evicted = self._evict_idle_locked(time.monotonic())
+
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolExhaustedError(
+                            f"Timed out after {timeout}s waiting for a database connection "
+                            f"(max_size={self.max_size})."
+                        )
+                    if waited_from is None:
+                        waited_from = time.monotonic()
+                        self._stats["waits"] += 1
+                    self._lock.wait(remaining)
+
+                if self._idle:
+                    # LIFO checkout keeps the hot connections hot and lets the cold ones age out.
+                    raw, last_used = self._idle.pop()
+                else:
+                    # Reserve the slot now so concurrent callers cannot overshoot max_size.
+                    must_open = True
+                    self._size += 1
+                self._in_use += 1
+                self._stats["checkouts"] += 1
+                if waited_from is not None:
+                    self._stats["wait_time_total"] += time.monotonic() - waited_from
+                    waited_from = None
+
+            for conn in evicted:
+                self._close_raw(conn)
+
+            if must_open:
+                try:
+                    raw = self._open()
+                except Exception:
+                    self._release_slot()
+                    raise
+                return PooledConnection(self, raw)
+
+            if self._ping is not None and time.monotonic() - last_used >= self.health_check_interval:
+                with self._lock:
+                    self._stats["health_checks"] += 1
+                try:
+                    self._ping(raw)
+                except Exception:
+                    with self._lock:
+                        self._stats["health_check_failures"] += 1
+                    self._close_raw(raw)
+                    self._release_slot()
+                    continue
+
+            with self._lock:
+                self._stats["reused"] += 1
+            return PooledConnection(self, raw)
+
+    def _release_slot(self):
+        with self._lock:
+            self._size -= 1
+            self._in_use -= 1
+            self._lock.notify()
+
+    def release(self, raw, broken: bool = False):
+        """
+        Return a raw connection to the pool. Broken connections are closed and their slot freed.
+        """
+        # A connection whose socket was dropped mid-query is not worth keeping.
+        if broken or self._closed or not getattr(raw, "open", True):
+            self._close_raw(raw)
+            self._release_slot()
+            return
+
+        with self._lock:
+            self._in_use -= 1
+            self._idle.append((raw, time.monotonic()))
+            self._lock.notify()
+
+    def close(self):
+        """
+        Close every idle connection and refuse further checkouts. Checked-out connections are
+        closed when they are released.
+        """
+        with self._lock:
+            self._closed = True
+            idle = [raw for raw, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._lock.notify_all()
+        for raw in idle:
+            self._close_raw(raw)
+
+    def stats(self) -> dict:
+        with self._lock:
+            result = dict(self._stats)
+            result.update({
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+            })
+        return result
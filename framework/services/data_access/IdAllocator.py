@@ -0,0 +1,112 @@
+import asyncio
+import logging
+from typing import Optional
+
+from .AsyncDataService import AsyncDataDataService
+
+logger = logging.getLogger(__name__)
+
+
+class BlockIdAllocator:
+    """
+    Hands out keys for a table from blocks leased from the database (see the data service's
+    lease_id_block()), so IDs are unique across processes and hosts while taking one ID costs
+    no database round trip. When the current block runs low the next one is leased in the
+    background.
+
+    IDs are increasing within a process but not across processes, and IDs left in a block when
+    a process stops are never used. Meant to be used from one event loop.
+    """
+
+    def __init__(self, data_service: AsyncDataDataService, context: dict):
+        """
+        :param data_service: Async data service with lease_id_block().
+        :param context: database, table and key_field, plus the optional block_size (IDs per
+            lease, default 100), prefetch_below (IDs left when the next block is leased, default
+            a quarter of block_size) and sequence (counter name).
+        """
+        self.data_service = data_service
+        self.database = context["database"]
+        self.table = context["table"]
+        self.key_field = context["key_field"]
+        self.sequence = context.get("sequence")
+        self.block_size = context.get("block_size", 100)
+        self.prefetch_below = context.get("prefetch_below", self.block_size // 4)
+
+        self._next = 0
+        self._end = 0
+        self._prefetch: Optional[asyncio.Future] = None
+        self._lock = asyncio.Lock()
+        self._stats = {"allocated": 0, "leases": 0, "prefetches": 0, "range_leases": 0}
+
+    async def _lease(self, size: int) -> range:
+        first = await self.data_service.lease_id_block(self.database, self.table, self.key_field, size,
+                                                       sequence=self.sequence)
+        self._stats["leases"] += 1
+        return range(first, first + size)
+
+    def _take(self, count: int) -> range:
+        ids = range(self._next, self._next + count)
+        self._next += count
+        self._stats["allocated"] += count
+        if self._end - self._next < self.prefetch_below and self._prefetch is None:
+            self._prefetch = asyncio.ensure_future(self._lease(self.block_size))
+            self._stats["prefetches"] += 1
+        return ids
+
+    async def _next_block(self) -> range:
+        prefetch, self._prefetch = self._prefetch, None
+        if prefetch is not None:
+            try:
+                return await prefetch
+            except Exception as e:
+                logger.warning("Prefetching an ID block failed, leasing again: %s", e)
+        return await self._lease(self.block_size)
+
+    async def allocate(self) -> int:
+        """
+        :return: A new ID.
+        """
+        if self._next < self._end:
+            return self._take(1)[0]
+        return (await self.allocate_range(1))[0]
+
+    async def allocate_range(self, count: int) -> range:
+        """
+        Allocate count consecutive IDs, e.g. for a bulk insert. Ranges larger than the block size
+        get a block of their own, leased in one round trip.
+
+        :return: The IDs, as a range.
+        """
+        if count <= 0:
+            return range(0)
+        if count <= self._end - self._next:
+            return self._take(count)
+
+        if count > self.block_size:
+            ids = await self._lease(count)
+            self._stats["range_leases"] += 1
+            self._stats["allocated"] += count
+            return ids
+
+        async with self._lock:
+            # Another caller may have switched blocks while this one waited.
+            if count > self._end - self._next:
+                # The rest of the current block is skipped; gaps are harmless.
+                block = await self._next_block()
+                self._next, self._end = block.start, block.stop
+            return self._take(count)
+
+    async def close(self):
+        """
+        Drop the block being prefetched, if any; its IDs are not used.
+        """
+        prefetch, self._prefetch = self._prefetch, None
+        if prefetch is not None and not prefetch.done():
+            prefetch.cancel()
+
+    def get_stats(self) -> dict:
+        stats = dict(self._stats)
+        stats.update({"block_size": self.block_size, "remaining": self._end - self._next,
+                      "prefetch_pending": self._prefetch is not None})
+        return stats
@@ -1,7 +1,18 @@
+import logging
+import threading
+import time
 import pymysql
+from framework.utils import metrics
 from .BaseDataService import DataDataService
+from .ConnectionPool import ConnectionPool, PoolExhaustedError
 from pymysql import Error
-from typing import Optional, Any
+from typing import Optional, Any, List
+
+logger = logging.getLogger(__name__)
+
+ACQUIRE_SECONDS = metrics.histogram(
+    "db_connection_acquire_seconds", "Time to check a connection out of the pool, including opening it."
+)
 
 class MySQLRDBDataService(DataDataService):
     """
@@ -10,57 +21,145 @@ class MySQLRDBDataService(DataDataService):
     can subclass, reuse methods and extend.
     """
 
-    def __init__(self, context):
-        super().__init__(context)
+    def __init__(self, context, profiler=None):
+        super().__init__(context, profiler)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._id_sequences = set()
+
+    def _connect(self):
+        return pymysql.connect(
+            host=self.context["host"],
+            port=self.context["port"],
+            user=self.context["user"],
+            passwd=self.context["password"],
+            cursorclass=pymysql.cursors.DictCursor,
+            autocommit=True
+        )
+
+    @staticmethod
+    def _ping(connection):
+        # reconnect=False so a dead connection raises and is replaced by the pool.
+        connection.ping(reconnect=False)
+
+    def _get_pool(self) -> ConnectionPool:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ConnectionPool(
+                        connect=self._connect,
+                        ping=self._ping,
+                        min_size=self.context.get("pool_min_size", 1),
+                        max_size=self.context.get("pool_max_size", 10),
+                        idle_timeout=self.context.get("pool_idle_timeout", 300.0),
+                        health_check_interval=self.context.get("pool_health_check_interval", 30.0),
+                        checkout_timeout=self.context.get("pool_checkout_timeout", 10.0),
+                    )
+        return self._pool
 
     def _get_connection(self):
-        try: 
-            self.connection = pymysql.connect(
-                host=self.context["host"],
-                port=self.context["port"],
-                user=self.context["user"],
-                passwd=self.context["password"],
-                cursorclass=pymysql.cursors.DictCursor,
-                autocommit=True
-            )
-            if self.connection:
-                print("Successfully connected to the database")
-                cursor = self.connection.cursor()
-                cursor.execute("SELECT 1;")  # Simple query to test the connection
-                print("Test query executed successfully")
-            else:
-                print("Connection failed!")
-            return self.connection
-        except Error as e:
-            print(f"Error while connecting to MySQL: {e}")
-            self.connection = None
+        """
+        Check a connection out of the pool. Closing the returned connection hands it back
+        to the pool; the connection is only health checked if it has been idle for a while.
+        """
+        started = time.perf_counter()
+        try:
+            return self._get_pool().acquire()
+        except (Error, PoolExhaustedError) as e:
+            logger.error("Error while connecting to MySQL: %s", e)
+            return None
+        finally:
+            ACQUIRE_SECONDS.observe(time.perf_counter() - started)
+
+    def _explain(self, cursor, sql_statement: str, params=None) -> list:
+        if isinstance(cursor, pymysql.cursors.SSCursor):
+            # The unbuffered result is still being read; the connection cannot run EXPLAIN yet.
+            return []
+        with cursor.connection.cursor() as explain_cursor:
+            explain_cursor.execute("EXPLAIN " + sql_statement, params)
+            return list(explain_cursor.fetchall())
+
+    def get_pool_stats(self) -> dict:
+        """
+        Counters and gauges for the connection pool, e.g. size, in_use, reused, timeouts.
+        """
+        if self._pool is None:
+            return {}
+        return self._pool.stats()
+
+    def close(self):
+        """
+        Close all pooled connections.
+        """
+        if self._pool is not None:
+            self._pool.close()
+
+    @staticmethod
+    def _column_list(columns: Optional[List[str]]) -> str:
+        return ', '.join(f"`{c}`" for c in columns) if columns else "*"
 
     def get_data_object(self,
                         database_name: str,
                         collection_name: str,
                         key_field: str,
-                        key_value: str):
+                        key_value: str,
+                        columns: Optional[List[str]] = None):
         """
         See base class for comments.
         """
 
-        connection = None
-        result = None
+        connection = self._get_connection()
+        if not connection:
+            raise Exception("Failed to establish a database connection.")
 
         try:
-            sql_statement = f"SELECT * FROM {database_name}.{collection_name} " + \
-                        f"where {key_field}=%s"
-            connection = self._get_connection()
+            sql_statement = f"SELECT {self._column_list(columns)} FROM {database_name}.{collection_name} " + \
+                f"where {key_field}=%s"
             cursor = connection.cursor()
-            print("SQL = ", cursor.mogrify(sql_statement, [key_value]))
-            cursor.execute(sql_statement, [key_value])
-            result = cursor.fetchone()
+            self._execute(cursor, sql_statement, [key_value])
+            return cursor.fetchone()
         except Exception as e:
-            if connection:
-                connection.close()
-            print("Something is wrong with your connection!")
+            logger.error("Error fetching data object: %s", e)
+            raise
+        finally:
+            connection.close()
+
+    def get_data_objects(self,
+                         database_name: str,
+                         collection_name: str,
+                         key_field: str,
+                         key_values: List[Any],
+                         chunk_size: int = 1000) -> List[dict]:
+        """
+        Gets many data objects by key with WHERE key_field IN (...), one statement per chunk_size keys.
 
-        return result
+        :param key_values: The keys to look up. Duplicates are fetched once.
+        :return: The rows found, in no particular order. Missing keys are simply absent.
+        :raises Exception: If a query fails, rather than returning the rows found so far.
+        """
+        results = []
+        keys = list(dict.fromkeys(key_values))
+        if not keys:
+            return results
+
+        connection = self._get_connection()
+        if not connection:
+            raise Exception("Failed to establish a database connection.")
+        try:
+            with connection.cursor() as cursor:
+                for start in range(0, len(keys), chunk_size):
+                    chunk = keys[start:start + chunk_size]
+                    placeholders = ', '.join(['%s'] * len(chunk))
+                    sql_statement = f"SELECT * FROM {database_name}.{collection_name} " + \
+                                    f"WHERE {key_field} IN ({placeholders})"
+                    self._execute(cursor, sql_statement, chunk)
+                    results.extend(cursor.fetchall())
+        except Exception as e:
+            logger.error("Error fetching data objects: %s", e)
+            raise
+        finally:
+            connection.close()
+        return results
 
     def create_data_object(self, database_name: str, collection_name: str, data: dict):
         connection = self._get_connection()
@@ -68,26 +167,147 @@ class MySQLRDBDataService(DataDataService):
             if not connection:
                 raise Exception("Failed to establish a database connection.")
 
-            # Remove 'recipe_id' if present in the payload
-            data.pop('recipe_id', None)
+            # Without a recipe_id, the database assigns one (AUTO_INCREMENT).
+            if data.get('recipe_id') is None:
+                data.pop('recipe_id', None)
 
             columns = ', '.join(data.keys())
             placeholders = ', '.join(['%s'] * len(data))
             sql_statement = f"INSERT INTO `{database_name}`.`{collection_name}` ({columns}) VALUES ({placeholders})"
 
             with connection.cursor() as cursor:
-                cursor.execute(sql_statement, list(data.values()))
+                self._execute(cursor, sql_statement, list(data.values()))
                 connection.commit()
-                new_id = cursor.lastrowid  # Retrieve the auto-generated ID
-                data['recipe_id'] = new_id
+                if data.get('recipe_id') is None:
+                    data['recipe_id'] = cursor.lastrowid  # Retrieve the auto-generated ID
                 return data
         except pymysql.MySQLError as e:
-            print(f"MySQL Error: {e}")
+            logger.error("MySQL Error: %s", e)
             return None
         finally:
             if connection:
                 connection.close()
 
+    def create_data_objects(self, database_name: str, collection_name: str, rows: List[dict],
+                            key_field: str = "recipe_id", chunk_size: int = 500) -> List[dict]:
+        """
+        Insert many rows in one transaction using multi-row INSERT statements of up to chunk_size
+        rows. Each chunk runs under a savepoint; if a chunk fails it is rolled back and retried row
+        by row, so a bad row is reported without aborting the rest of the batch.
+
+        Rows with a key_field value are inserted with it, e.g. IDs from lease_id_block(). For the
+        others the database assigns one; the IDs of a multi-row INSERT are taken from
+        LAST_INSERT_ID() onwards, which relies on InnoDB handing out consecutive auto-increment
+        values for a single statement.
+
+        :param rows: The rows to insert.
+        :param key_field: The auto-increment column.
+        :param chunk_size: Maximum number of rows per INSERT statement.
+        :return: One result per input row, in order:
+            {"index": i, "status": "created" | "failed", key_field: id or None, "error": str or None}
+        """
+        results = [{"index": i, "status": "failed", key_field: None, "error": None} for i in range(len(rows))]
+        if not rows:
+            return results
+
+        connection = self._get_connection()
+        if not connection:
+            raise Exception("Failed to establish a database connection.")
+
+        table = f"`{database_name}`.`{collection_name}`"
+
+        def insert_sql(columns, count):
+            column_list = ', '.join(f"`{c}`" for c in columns)
+            row_placeholders = '(' + ', '.join(['%s'] * len(columns)) + ')'
+            return f"INSERT INTO {table} ({column_list}) VALUES " + ', '.join([row_placeholders] * count)
+
+        try:
+            connection.begin()
+            with connection.cursor() as cursor:
+                for start in range(0, len(rows), chunk_size):
+                    # A multi-row INSERT needs one column list, so split the chunk on column changes.
+                    groups = []
+                    for index in range(start, min(start + chunk_size, len(rows))):
+                        data = {k: v for k, v in rows[index].items() if k != key_field or v is not None}
+                        columns = tuple(data.keys())
+                        if groups and groups[-1][0] == columns:
+                            groups[-1][1].append((index, data))
+                        else:
+                            groups.append((columns, [(index, data)]))
+
+                    for columns, members in groups:
+                        params = [v for _, data in members for v in data.values()]
+                        self._execute(cursor, "SAVEPOINT batch_chunk")
+                        try:
+                            self._execute(cursor, insert_sql(columns, len(members)), params)
+                            if key_field in columns:
+                                ids = [data[key_field] for _, data in members]
+                            else:
+                                ids = range(cursor.lastrowid, cursor.lastrowid + len(members))
+                            for (index, _), new_id in zip(members, ids):
+                                results[index].update({"status": "created", key_field: new_id})
+                            continue
+                        except pymysql.MySQLError as e:
+                            self._execute(cursor, "ROLLBACK TO SAVEPOINT batch_chunk")
+                            logger.warning("Batch chunk failed, retrying row by row: %s", e)
+
+                        for index, data in members:
+                            self._execute(cursor, "SAVEPOINT batch_row")
+                            try:
+                                self._execute(cursor, insert_sql(columns, 1), list(data.values()))
+                                new_id = data[key_field] if key_field in data else cursor.lastrowid
+                                results[index].update({"status": "created", key_field: new_id})
+                            except pymysql.MySQLError as e:
+                                self._execute(cursor, "ROLLBACK TO SAVEPOINT batch_row")
+                                results[index]["error"] = str(e)
+            connection.commit()
+        except Exception as e:
+            logger.error("Batch insert failed: %s", e)
+            try:
+                connection.rollback()
+            except Exception:
+                pass
+            for result in results:
+                result.update({"status": "failed", key_field: None, "error": result["error"] or str(e)})
+        finally:
+            connection.close()
+        return results
+
+    def lease_id_block(self, database_name: str, table_name: str, key_field: str, size: int,
+                       sequence: Optional[str] = None) -> int:
+        """
+        Reserve size consecutive IDs for inserts into table_name with explicit keys, see
+        framework.services.data_access.IdAllocator. Safe across processes and hosts: the
+        reservation is a single UPDATE of a counter row in database_name.IdBlocks.
+
+        The IdBlocks table must exist, see migrations/001_id_blocks.sql. A missing counter row is
+        added on first use, starting above the largest key in the table. From then on every insert
+        into the table must take its key from here, or an auto-increment key could land in a
+        leased block.
+
+        :param sequence: Name of the counter; defaults to 'table_name.key_field'.
+        :return: The first ID of the block [first, first + size).
+        """
+        sequence = sequence or f"{table_name}.{key_field}"
+        connection = self._get_connection()
+        if not connection:
+            raise Exception("Failed to establish a database connection.")
+        try:
+            with connection.cursor() as cursor:
+                if (database_name, sequence) not in self._id_sequences:
+                    self._execute(cursor, f"INSERT IGNORE INTO `{database_name}`.`IdBlocks` (name, next_id) "
+                                          f"SELECT %s, COALESCE(MAX(`{key_field}`), 0) + 1 "
+                                          f"FROM `{database_name}`.`{table_name}`", [sequence])
+                    self._id_sequences.add((database_name, sequence))
+                # LAST_INSERT_ID(expr) hands the new value back on this connection, atomically.
+                self._execute(cursor, f"UPDATE `{database_name}`.`IdBlocks` "
+                                      "SET next_id = LAST_INSERT_ID(next_id + %s) WHERE name = %s", [size, sequence])
+                if cursor.rowcount != 1:
+                    raise Exception(f"No ID sequence {sequence} in {database_name}.IdBlocks")
+                return cursor.lastrowid - size
+        finally:
+            connection.close()
+
     def get_total_count(self, database_name: str, table_name: str, filters: Optional[dict] = None) -> int:
         """
         Get the total count of rows in the table, optionally applying filters.
@@ -111,46 +331,259 @@ class MySQLRDBDataService(DataDataService):
 
             # execute query
             with connection.cursor() as cursor:
-                cursor.execute(sql_statement, params)
+                self._execute(cursor, sql_statement, params)
                 result = cursor.fetchone()
                 total_count = result["total"] if result else 0
         except Exception as e:
-            print(f"Error fetching total count: {e}")
+            logger.error("Error fetching total count: %s", e)
+            raise
         finally:
             if connection:
                 connection.close()
-                print("Connection closed.")
         return total_count
 
-    def get_paginated_data(self, database_name: str, table_name: str, offset: int = 0, limit: int = 10, filters: Optional[dict] = None):
+    def get_paginated_data(self, database_name: str, table_name: str, offset: int = 0, limit: int = 10,
+                           filters: Optional[dict] = None, sort_field: Optional[str] = None,
+                           descending: bool = False, columns: Optional[List[str]] = None,
+                           key_field: Optional[str] = None):
+        """
+        :param columns: Columns to select; all columns if None. Callers must validate the names.
+        :param key_field: Unique column that breaks ties between rows with equal sort values, so
+            that consecutive pages neither repeat nor skip rows.
+        :raises Exception: If the query fails, rather than returning an empty page.
+        """
         connection = self._get_connection()
         if not connection:
             raise Exception("Failed to establish a database connection.")
         results = []
         try:
-            sql_statement = f"SELECT * FROM {database_name}.{table_name}"
+            sql_statement = f"SELECT {self._column_list(columns)} FROM {database_name}.{table_name}"
             params = []
             if filters:
                 conditions = " AND ".join([f"{key}=%s" for key in filters.keys()])
-                sql_statement += f"WHERE {conditions}"
+                sql_statement += f" WHERE {conditions}"
                 params.extend(filters.values())
 
+            sql_statement += self._order_by(sort_field, key_field, descending)
+
             sql_statement += " LIMIT %s OFFSET %s"
             params.extend([limit, offset])
 
             with connection.cursor() as cursor:
-                cursor.execute(sql_statement, [limit, offset])
+                self._execute(cursor, sql_statement, params)
                 results = cursor.fetchall()
 
         except Exception as e:
-            print(f"error with the paginated query: {e}")
+            logger.error("Error with the paginated query: %s", e)
+            raise
+        finally:
+            if connection:
+                connection.close()
+        return results
+
+    def get_paginated_data_with_count(self, database_name: str, table_name: str, offset: int = 0, limit: int = 10,
+                                      filters: Optional[dict] = None, sort_field: Optional[str] = None,
+                                      descending: bool = False, columns: Optional[List[str]] = None,
+                                      key_field: Optional[str] = None):
+        """
+        Same as get_paginated_data() but also returns the number of rows matching the filters,
+        computed by a COUNT(*) OVER() window in the same statement (MySQL 8+). Only when the page
+        is empty, e.g. an offset past the end, is a separate COUNT(*) issued on the same connection.
+
+        :return: (rows, total_count)
+        """
+        connection = self._get_connection()
+        if not connection:
+            raise Exception("Failed to establish a database connection.")
+        results = []
+        total_count = 0
+        try:
+            where = ""
+            params = []
+            if filters:
+                where = " WHERE " + " AND ".join([f"{key}=%s" for key in filters.keys()])
+                params.extend(filters.values())
+
+            sql_statement = f"SELECT {self._column_list(columns)}, COUNT(*) OVER() AS _total_count " + \
+                            f"FROM {database_name}.{table_name}{where}"
+            sql_statement += self._order_by(sort_field, key_field, descending)
+            sql_statement += " LIMIT %s OFFSET %s"
+
+            with connection.cursor() as cursor:
+                self._execute(cursor, sql_statement, params + [limit, offset])
+                results = cursor.fetchall()
+                if results:
+                    total_count = results[0]["_total_count"]
+                    for row in results:
+                        row.pop("_total_count", None)
+                else:
+                    self._execute(cursor, f"SELECT COUNT(*) AS total FROM {database_name}.{table_name}{where}",
+                                  params)
+                    row = cursor.fetchone()
+                    total_count = row["total"] if row else 0
+        except Exception as e:
+            logger.error("Error with the paginated count query: %s", e)
+            raise
+        finally:
+            if connection:
+                connection.close()
+        return results, total_count
+
+    def get_approximate_count(self, database_name: str, table_name: str) -> int:
+        """
+        Row count estimate from the table statistics (information_schema.TABLES.TABLE_ROWS).
+        This does not scan the table; for InnoDB it can be off by a few tens of percent.
+        """
+        connection = self._get_connection()
+        if not connection:
+            raise Exception("Failed to establish a database connection.")
+        estimate = 0
+        try:
+            sql_statement = "SELECT TABLE_ROWS AS estimate FROM information_schema.TABLES " + \
+                            "WHERE TABLE_SCHEMA=%s AND TABLE_NAME=%s"
+            with connection.cursor() as cursor:
+                self._execute(cursor, sql_statement, [database_name, table_name])
+                result = cursor.fetchone()
+                estimate = (result["estimate"] or 0) if result else 0
+        except Exception as e:
+            logger.error("Error fetching approximate count: %s", e)
+            raise
+        finally:
+            if connection:
+                connection.close()
+        return estimate
+
+    @staticmethod
+    def _order_by(sort_field: Optional[str], key_field: Optional[str], descending: bool) -> str:
+        """
+        ORDER BY clause for offset pages: the sort column, then the key, in the same direction.
+        """
+        direction = "DESC" if descending else "ASC"
+        fields = list(dict.fromkeys(field for field in (sort_field, key_field) if field))
+        if not fields:
+            return ""
+        return " ORDER BY " + ", ".join(f"`{field}` {direction}" for field in fields)
+
+    @staticmethod
+    def _keyset_condition(key_field: str, sort_field: Optional[str], descending: bool, after: dict):
+        """
+        Build the WHERE clause that selects rows strictly after the cursor position for
+        ORDER BY sort_field, key_field. MySQL sorts NULLs first ascending and last descending,
+        so a nullable sort column needs its own branches.
+        """
+        op = "<" if descending else ">"
+        key = f"`{key_field}`"
+        if not sort_field or sort_field == key_field:
+            return f"{key} {op} %s", [after["key"]]
+
+        col = f"`{sort_field}`"
+        last_sort, last_key = after.get("sort"), after["key"]
+        if last_sort is None:
+            if descending:
+                return f"({col} IS NULL AND {key} < %s)", [last_key]
+            return f"(({col} IS NULL AND {key} > %s) OR {col} IS NOT NULL)", [last_key]
+
+        condition = f"({col} {op} %s OR ({col} = %s AND {key} {op} %s)"
+        if descending:
+            condition += f" OR {col} IS NULL"
+        return condition + ")", [last_sort, last_sort, last_key]
+
+    def get_keyset_data(self, database_name: str, table_name: str, key_field: str, limit: int = 10,
+                        after: Optional[dict] = None, sort_field: Optional[str] = None,
+                        descending: bool = False, filters: Optional[dict] = None,
+                        columns: Optional[List[str]] = None):
+        """
+        Keyset (cursor) pagination. Instead of OFFSET, the query seeks past the last row of the
+        previous page, so every page costs the same regardless of how deep it is.
+
+        :param key_field: Unique column used as the tie breaker and default sort.
+        :param limit: Maximum number of rows to return.
+        :param after: Position of the last row already seen: {"key": ..., "sort": ...}, or None
+            for the first page.
+        :param sort_field: Optional column to sort by before key_field.
+        :param descending: Sort direction for both columns.
+        :param filters: Optional equality filters.
+        :param columns: Columns to select; all columns if None. key_field and sort_field are
+            always selected since the caller needs them to build the next cursor.
+        :return: List of rows.
+        :raises Exception: If the query fails, rather than returning an empty page.
+        """
+        connection = self._get_connection()
+        if not connection:
+            raise Exception("Failed to establish a database connection.")
+        results = []
+        try:
+            conditions = []
+            params = []
+            if filters:
+                conditions.extend([f"{key}=%s" for key in filters.keys()])
+                params.extend(filters.values())
+            if after is not None:
+                condition, condition_params = self._keyset_condition(key_field, sort_field, descending, after)
+                conditions.append(condition)
+                params.extend(condition_params)
 
+            direction = "DESC" if descending else "ASC"
+            order_by = f"`{key_field}` {direction}"
+            if sort_field and sort_field != key_field:
+                order_by = f"`{sort_field}` {direction}, " + order_by
+
+            if columns:
+                columns = list(dict.fromkeys([key_field] + ([sort_field] if sort_field else []) + list(columns)))
+            sql_statement = f"SELECT {self._column_list(columns)} FROM {database_name}.{table_name}"
+            if conditions:
+                sql_statement += " WHERE " + " AND ".join(conditions)
+            sql_statement += f" ORDER BY {order_by} LIMIT %s"
+            params.append(limit)
+
+            with connection.cursor() as cursor:
+                self._execute(cursor, sql_statement, params)
+                results = cursor.fetchall()
+        except Exception as e:
+            logger.error("Error with the keyset query: %s", e)
+            raise
         finally:
             if connection:
                 connection.close()
-                print("connection closed")
         return results
 
+    def stream_data(self, database_name: str, table_name: str, columns: Optional[List[str]] = None,
+                    order_by: Optional[str] = None, fetch_size: int = 1000):
+        """
+        Yield every row of a table through an unbuffered server-side cursor (SSDictCursor), so
+        memory stays constant no matter how large the table is. The pooled connection is held
+        until the generator finishes; if the consumer stops early the connection is discarded
+        rather than draining the rest of the result set.
+
+        :param columns: Columns to select; all columns if None. Callers must validate the names.
+        :param order_by: Optional column to order by.
+        :param fetch_size: Rows read from the socket per fetchmany() call.
+        """
+        connection = self._get_connection()
+        if not connection:
+            raise Exception("Failed to establish a database connection.")
+
+        sql_statement = f"SELECT {self._column_list(columns)} FROM {database_name}.{table_name}"
+        if order_by:
+            sql_statement += f" ORDER BY `{order_by}`"
+
+        completed = False
+        try:
+            cursor = connection.cursor(pymysql.cursors.SSDictCursor)
+            self._execute(cursor, sql_statement)
+            while True:
+                rows = cursor.fetchmany(fetch_size)
+                if not rows:
+                    break
+                yield from rows
+            cursor.close()
+            completed = True
+        finally:
+            if completed:
+                connection.close()
+            else:
+                connection.discard()
+
     def delete_data_object(self, database_name: str, table_name: str, key_field: str, key_value: Any) -> bool:
         connection = self._get_connection()
         if not connection:
@@ -159,13 +592,12 @@ class MySQLRDBDataService(DataDataService):
         try:
             sql_statement = f"DELETE FROM {database_name}.{table_name} WHERE {key_field}=%s"
             with connection.cursor() as cursor:
-                cursor.execute(sql_statement, [key_value])
+                self._execute(cursor, sql_statement, [key_value])
                 connection.commit()
                 return cursor.rowcount > 0  # returns True if a row was deleted
         except Exception as e:
-            print(f"Error deleting data: {e}")
+            logger.error("Error deleting data: %s", e)
             return False
         finally:
             if connection:
                 connection.close()
-                print("Connection closed.")
@@ -0,0 +1,232 @@
+import functools
+import logging
+import re
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_LITERALS = re.compile(r"'(?:[^'\\]|\\.|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_REPEATED_LISTS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+
+
+@functools.lru_cache(maxsize=2048)
+def normalize_statement(sql_statement: str) -> str:
+    """
+    The statement with literals and placeholders replaced by ? and placeholder lists, such as
+    IN (%s, %s, ...) or the rows of a multi-row INSERT, collapsed, so that statements differing
+    only in their values or batch size are counted together.
+    """
+    statement = _WHITESPACE.sub(" ", sql_statement.strip())
+    statement = _LITERALS.sub("?", statement).replace("%s", "?")
+    statement = _PLACEHOLDER_LIST.sub("(...)", statement)
+    return _REPEATED_LISTS.sub("(...), ...", statement)
+
+
+def _caller(service) -> str:
+    # The first public method up the stack: the data service method that ran the statement.
+    frame = sys._getframe(2)
+    for _ in range(5):
+        if frame is None:
+            break
+        if not frame.f_code.co_name.startswith("_"):
+            return f"{type(service).__name__}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return type(service).__name__
+
+
+class _StatementStats:
+    __slots__ = ("count", "total", "max", "rows", "slow", "durations", "explain")
+
+    def __init__(self, samples: int):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.slow = 0
+        # The most recent durations, for percentiles.
+        self.durations = deque(maxlen=samples)
+        self.explain = None
+
+
+class QueryProfiler:
+    """
+    Times every statement a data service executes, see DataDataService._execute().
+
+    Keeps the most recent executions (normalized statement, duration, rows, calling method) in
+    a ring buffer, and count, total, max and p95 duration per normalized statement. Statements
+    slower than slow_query_threshold are logged, and SELECTs can be EXPLAINed the first time they
+    are slow. A summary of the most expensive statements is logged every summary_interval by a
+    daemon thread, whether or not statements run meanwhile; close() stops it.
+
+    Data services without a profiler skip all of this.
+    """
+
+    def __init__(self, context: Optional[dict] = None):
+        """
+        :param context: Optional settings: 'slow_query_threshold' (seconds, default 0.1),
+            'explain_slow_queries' (default False), 'log_size' (executions kept, default 1000),
+            'max_statements' (distinct statements tracked, default 500), 'samples' (durations
+            kept per statement for percentiles, default 1000) and 'summary_interval' (seconds
+            between summary logs, default 300; 0 turns them off).
+        """
+        context = context or {}
+        self.slow_query_threshold = context.get("slow_query_threshold", 0.1)
+        self.explain_slow_queries = context.get("explain_slow_queries", False)
+        self.max_statements = context.get("max_statements", 500)
+        self.samples = context.get("samples", 1000)
+        self.summary_interval = context.get("summary_interval", 300)
+        self._log = deque(maxlen=context.get("log_size", 1000))
+        self._statements: Dict[str, _StatementStats] = {}
+        self._untracked = 0
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._closed = threading.Event()
+        self._summary_thread = None
+        if self.summary_interval:
+            self._summary_thread = threading.Thread(target=self._log_summaries, name="query-profiler-summary",
+                                                    daemon=True)
+            self._summary_thread.start()
+
+    def execute(self, service, cursor, sql_statement: str, params: Any,
+                explain: Optional[Callable[[Any, str, Any], Any]] = None) -> Any:
+        """
+        Run cursor.execute() and record it.
+
+        :param explain: Called as explain(cursor, sql_statement, params) to get the plan of a
+            slow SELECT.
+        """
+        started = time.perf_counter()
+        try:
+            if params is None:
+                return cursor.execute(sql_statement)
+            return cursor.execute(sql_statement, params)
+        finally:
+            duration = time.perf_counter() - started
+            rowcount = getattr(cursor, "rowcount", -1)
+            # -1 or, for unbuffered cursors, an unsigned -1: not known yet.
+            rows = rowcount if 0 <= rowcount < 2 ** 63 else None
+            self._record(normalize_statement(sql_statement), duration, rows, _caller(service),
+                         cursor, sql_statement, params, explain)
+
+    def _record(self, statement: str, duration: float, rows: Optional[int], caller: str,
+                cursor, sql_statement: str, params: Any, explain: Optional[Callable]):
+        slow = duration >= self.slow_query_threshold
+        plan = None
+        with self._lock:
+            stats = self._statements.get(statement)
+            if stats is None and len(self._statements) < self.max_statements:
+                stats = self._statements[statement] = _StatementStats(self.samples)
+            if stats is None:
+                self._untracked += 1
+            else:
+                stats.count += 1
+                stats.total += duration
+                stats.max = max(stats.max, duration)
+                stats.rows += rows or 0
+                stats.durations.append(duration)
+                if slow:
+                    stats.slow += 1
+            is_select = statement[:6].upper() == "SELECT"
+            needs_plan = slow and self.explain_slow_queries and explain is not None and is_select
+            needs_plan = needs_plan and stats is not None and stats.explain is None
+            if needs_plan:
+                # Claimed under the lock so concurrent slow executions explain it once.
+                stats.explain = []
+
+        if needs_plan:
+            try:
+                plan = explain(cursor, sql_statement, params)
+            except Exception as e:
+                plan = [{"error": str(e)}]
+            with self._lock:
+                stats.explain = plan
+
+        entry = {"time": time.time(), "statement": statement, "duration_ms": round(duration * 1000, 3),
+                 "rows": rows, "caller": caller, "slow": slow}
+        if plan is not None:
+            entry["explain"] = plan
+        self._log.append(entry)
+
+        if slow:
+            logger.warning("Slow query, %.1f ms, %s rows, in %s: %s", duration * 1000, rows, caller, statement)
+
+    @staticmethod
+    def _percentile(durations, fraction: float) -> float:
+        ordered = sorted(durations)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def get_statement_stats(self, limit: Optional[int] = None) -> list:
+        """
+        :return: Per statement stats, most total time first.
+        """
+        with self._lock:
+            items = [(statement, stats.count, stats.total, stats.max, stats.rows, stats.slow,
+                      list(stats.durations), stats.explain) for statement, stats in self._statements.items()]
+        items.sort(key=lambda item: item[2], reverse=True)
+        result = []
+        for statement, count, total, longest, rows, slow, durations, explain in items[:limit]:
+            entry = {
+                "statement": statement,
+                "count": count,
+                "total_ms": round(total * 1000, 3),
+                "mean_ms": round(total * 1000 / count, 3),
+                "p95_ms": round(self._percentile(durations, 0.95) * 1000, 3),
+                "max_ms": round(longest * 1000, 3),
+                "rows": rows,
+                "slow": slow,
+            }
+            if explain:
+                entry["explain"] = explain
+            result.append(entry)
+        return result
+
+    def get_stats(self, recent: int = 50, slow_only: bool = False) -> dict:
+        """
+        :param recent: Number of the latest executions to include.
+        :param slow_only: Only include slow executions among those.
+        """
+        log = [entry for entry in list(self._log) if entry["slow"] or not slow_only]
+        return {
+            "enabled": True,
+            "since": self._started,
+            "slow_query_threshold_ms": self.slow_query_threshold * 1000,
+            "untracked_executions": self._untracked,
+            "statements": self.get_statement_stats(),
+            "recent": log[-recent:] if recent else [],
+        }
+
+    def log_summary(self, limit: int = 5):
+        for entry in self.get_statement_stats(limit):
+            logger.info("Query profile: %d x %.1f ms mean, p95 %.1f ms, total %.1f ms: %s", entry["count"],
+                        entry["mean_ms"], entry["p95_ms"], entry["total_ms"], entry["statement"])
+
+    def _log_summaries(self):
+        while not self._closed.wait(self.summary_interval):
+            try:
+                self.log_summary()
+            except Exception as e:
+                logger.warning(f"Logging the query profile failed: {e}")
+
+    def close(self):
+        """
+        Stop the summary thread.
+        """
+        self._closed.set()
+        if self._summary_thread is not None:
+            self._summary_thread.join(timeout=1)
+            self._summary_thread = None
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self._log.clear()
+            self._untracked = 0
+            self._started = time.time()
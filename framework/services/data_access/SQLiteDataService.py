@@ -0,0 +1,337 @@
+import logging
+import sqlite3
+import threading
+from .BaseDataService import DataDataService
+from .MySQLRDBDataService import MySQLRDBDataService
+from typing import Optional, Any, List
+
+logger = logging.getLogger(__name__)
+
+
+def _dict_factory(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class SQLiteDataService(DataDataService):
+    """
+    A data service backed by SQLite, with the same methods and return values as
+    MySQLRDBDataService. Used for benchmarks and local development without the RDS instance.
+
+    Each database name is ATTACHed to the connection, so statements keep the database.table
+    form used with MySQL. There is a single connection and calls are serialized on it, which
+    also lets ':memory:' databases be shared by every thread.
+    """
+
+    def __init__(self, context, profiler=None):
+        """
+        :param context: 'databases' maps each database name to an SQLite file, or ':memory:'.
+        :param profiler: See DataDataService. Only the execute() step is timed, which for SQLite
+            produces the first row; the rest are produced while fetching.
+        """
+        super().__init__(context, profiler)
+        self._connection = None
+        self._lock = threading.RLock()
+        self._id_sequences = set()
+
+    def _get_connection(self):
+        if self._connection is None:
+            with self._lock:
+                if self._connection is None:
+                    # isolation_level=None: autocommit, transactions are started explicitly.
+                    connection = sqlite3.connect(":memory:", check_same_thread=False, isolation_level=None)
+                    connection.row_factory = _dict_factory
+                    for name, path in self.context.get("databases", {}).items():
+                        connection.execute("ATTACH DATABASE ? AS " + name, [path])
+                    self._connection = connection
+        return self._connection
+
+    def _query(self, sql_statement: str, params: Optional[list] = None) -> List[dict]:
+        with self._lock:
+            return self._execute(self._get_connection(), sql_statement, params or []).fetchall()
+
+    def _explain(self, cursor, sql_statement: str, params=None) -> list:
+        # cursor is the connection, and the caller holds the lock.
+        return cursor.execute("EXPLAIN QUERY PLAN " + sql_statement, params or []).fetchall()
+
+    def get_pool_stats(self) -> dict:
+        return {}
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def execute_script(self, sql_script: str):
+        """
+        Run several ; separated statements, e.g. to create tables.
+        """
+        with self._lock:
+            self._get_connection().executescript(sql_script)
+
+    @staticmethod
+    def _column_list(columns: Optional[List[str]]) -> str:
+        return ', '.join(f"`{c}`" for c in columns) if columns else "*"
+
+    @staticmethod
+    def _where(filters: Optional[dict]) -> (str, list):
+        if not filters:
+            return "", []
+        return " WHERE " + " AND ".join([f"{key}=?" for key in filters.keys()]), list(filters.values())
+
+    def get_data_object(self,
+                        database_name: str,
+                        collection_name: str,
+                        key_field: str,
+                        key_value: str,
+                        columns: Optional[List[str]] = None):
+        """
+        See base class for comments.
+        """
+        rows = self._query(f"SELECT {self._column_list(columns)} FROM {database_name}.{collection_name} "
+                           f"WHERE {key_field}=?", [key_value])
+        return rows[0] if rows else None
+
+    def get_data_objects(self,
+                         database_name: str,
+                         collection_name: str,
+                         key_field: str,
+                         key_values: List[Any],
+                         chunk_size: int = 500) -> List[dict]:
+        """
+        See MySQLRDBDataService.get_data_objects().
+        """
+        results = []
+        keys = list(dict.fromkeys(key_values))
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            placeholders = ', '.join(['?'] * len(chunk))
+            results.extend(self._query(f"SELECT * FROM {database_name}.{collection_name} "
+                                       f"WHERE {key_field} IN ({placeholders})", chunk))
+        return results
+
+    def create_data_object(self, database_name: str, collection_name: str, data: dict):
+        # Same contract as MySQLRDBDataService: without a recipe_id, the database assigns one.
+        if data.get('recipe_id') is None:
+            data.pop('recipe_id', None)
+
+        columns = ', '.join(f"`{c}`" for c in data.keys())
+        placeholders = ', '.join(['?'] * len(data))
+        sql_statement = f"INSERT INTO {database_name}.{collection_name} ({columns}) VALUES ({placeholders})"
+        try:
+            with self._lock:
+                cursor = self._execute(self._get_connection(), sql_statement, list(data.values()))
+                if data.get('recipe_id') is None:
+                    data['recipe_id'] = cursor.lastrowid
+                return data
+        except sqlite3.Error as e:
+            logger.error("SQLite Error: %s", e)
+            return None
+
+    def create_data_objects(self, database_name: str, collection_name: str, rows: List[dict],
+                            key_field: str = "recipe_id", chunk_size: int = 500) -> List[dict]:
+        """
+        See MySQLRDBDataService.create_data_objects(); the same transaction, savepoint and
+        row-by-row fallback logic.
+        """
+        results = [{"index": i, "status": "failed", key_field: None, "error": None} for i in range(len(rows))]
+        if not rows:
+            return results
+
+        table = f"{database_name}.{collection_name}"
+
+        def insert_sql(columns, count):
+            column_list = ', '.join(f"`{c}`" for c in columns)
+            row_placeholders = '(' + ', '.join(['?'] * len(columns)) + ')'
+            return f"INSERT INTO {table} ({column_list}) VALUES " + ', '.join([row_placeholders] * count)
+
+        with self._lock:
+            connection = self._get_connection()
+            try:
+                self._execute(connection, "BEGIN")
+                for start in range(0, len(rows), chunk_size):
+                    groups = []
+                    for index in range(start, min(start + chunk_size, len(rows))):
+                        data = {k: v for k, v in rows[index].items() if k != key_field or v is not None}
+                        columns = tuple(data.keys())
+                        if groups and groups[-1][0] == columns:
+                            groups[-1][1].append((index, data))
+                        else:
+                            groups.append((columns, [(index, data)]))
+
+                    for columns, members in groups:
+                        params = [v for _, data in members for v in data.values()]
+                        self._execute(connection, "SAVEPOINT batch_chunk")
+                        try:
+                            cursor = self._execute(connection, insert_sql(columns, len(members)), params)
+                            if key_field in columns:
+                                ids = [data[key_field] for _, data in members]
+                            else:
+                                # lastrowid is the ID of the last row of a multi-row INSERT.
+                                ids = range(cursor.lastrowid - len(members) + 1, cursor.lastrowid + 1)
+                            for (index, _), new_id in zip(members, ids):
+                                results[index].update({"status": "created", key_field: new_id})
+                            self._execute(connection, "RELEASE SAVEPOINT batch_chunk")
+                            continue
+                        except sqlite3.Error as e:
+                            self._execute(connection, "ROLLBACK TO SAVEPOINT batch_chunk")
+                            self._execute(connection, "RELEASE SAVEPOINT batch_chunk")
+                            logger.warning("Batch chunk failed, retrying row by row: %s", e)
+
+                        for index, data in members:
+                            try:
+                                cursor = self._execute(connection, insert_sql(columns, 1), list(data.values()))
+                                new_id = data[key_field] if key_field in data else cursor.lastrowid
+                                results[index].update({"status": "created", key_field: new_id})
+                            except sqlite3.Error as e:
+                                # A failed single-row INSERT leaves nothing behind in SQLite.
+                                results[index]["error"] = str(e)
+                self._execute(connection, "COMMIT")
+            except Exception as e:
+                logger.error("Batch insert failed: %s", e)
+                if connection.in_transaction:
+                    self._execute(connection, "ROLLBACK")
+                for result in results:
+                    result.update({"status": "failed", key_field: None, "error": result["error"] or str(e)})
+        return results
+
+    def lease_id_block(self, database_name: str, table_name: str, key_field: str, size: int,
+                       sequence: Optional[str] = None) -> int:
+        """
+        See MySQLRDBDataService.lease_id_block(). BEGIN IMMEDIATE makes the read and update of
+        the counter atomic for other processes using the same file. The IdBlocks table must
+        exist, see benchmarks.fixtures.RECIPE_TABLE_SQL.
+        """
+        sequence = sequence or f"{table_name}.{key_field}"
+        with self._lock:
+            connection = self._get_connection()
+            if (database_name, sequence) not in self._id_sequences:
+                self._execute(connection, f"INSERT OR IGNORE INTO {database_name}.IdBlocks (name, next_id) "
+                                          f"SELECT ?, COALESCE(MAX(`{key_field}`), 0) + 1 "
+                                          f"FROM {database_name}.{table_name}", [sequence])
+                self._id_sequences.add((database_name, sequence))
+            self._execute(connection, "BEGIN IMMEDIATE")
+            try:
+                row = self._execute(connection, f"SELECT next_id FROM {database_name}.IdBlocks WHERE name = ?",
+                                    [sequence]).fetchone()
+                if row is None:
+                    raise Exception(f"No ID sequence {sequence} in {database_name}.IdBlocks")
+                self._execute(connection, f"UPDATE {database_name}.IdBlocks SET next_id = ? WHERE name = ?",
+                              [row["next_id"] + size, sequence])
+                self._execute(connection, "COMMIT")
+            except Exception:
+                self._execute(connection, "ROLLBACK")
+                raise
+            return row["next_id"]
+
+    def get_total_count(self, database_name: str, table_name: str, filters: Optional[dict] = None) -> int:
+        where, params = self._where(filters)
+        rows = self._query(f"SELECT COUNT(*) AS total FROM {database_name}.{table_name}{where}", params)
+        return rows[0]["total"] if rows else 0
+
+    def get_paginated_data(self, database_name: str, table_name: str, offset: int = 0, limit: int = 10,
+                           filters: Optional[dict] = None, sort_field: Optional[str] = None,
+                           descending: bool = False, columns: Optional[List[str]] = None,
+                           key_field: Optional[str] = None):
+        """
+        See MySQLRDBDataService.get_paginated_data().
+        """
+        where, params = self._where(filters)
+        sql_statement = f"SELECT {self._column_list(columns)} FROM {database_name}.{table_name}{where}"
+        sql_statement += MySQLRDBDataService._order_by(sort_field, key_field, descending)
+        sql_statement += " LIMIT ? OFFSET ?"
+        return self._query(sql_statement, params + [limit, offset])
+
+    def get_paginated_data_with_count(self, database_name: str, table_name: str, offset: int = 0, limit: int = 10,
+                                      filters: Optional[dict] = None, sort_field: Optional[str] = None,
+                                      descending: bool = False, columns: Optional[List[str]] = None,
+                                      key_field: Optional[str] = None):
+        """
+        See MySQLRDBDataService.get_paginated_data_with_count().
+        """
+        where, params = self._where(filters)
+        sql_statement = f"SELECT {self._column_list(columns)}, COUNT(*) OVER() AS _total_count " + \
+                        f"FROM {database_name}.{table_name}{where}"
+        sql_statement += MySQLRDBDataService._order_by(sort_field, key_field, descending)
+        sql_statement += " LIMIT ? OFFSET ?"
+
+        results = self._query(sql_statement, params + [limit, offset])
+        if not results:
+            return results, self.get_total_count(database_name, table_name, filters)
+        total_count = results[0]["_total_count"]
+        for row in results:
+            row.pop("_total_count", None)
+        return results, total_count
+
+    def get_approximate_count(self, database_name: str, table_name: str) -> int:
+        """
+        SQLite keeps no row count statistics; the largest rowid is the cheap estimate. It
+        overestimates after deletes.
+        """
+        rows = self._query(f"SELECT MAX(rowid) AS estimate FROM {database_name}.{table_name}")
+        return (rows[0]["estimate"] or 0) if rows else 0
+
+    def get_keyset_data(self, database_name: str, table_name: str, key_field: str, limit: int = 10,
+                        after: Optional[dict] = None, sort_field: Optional[str] = None,
+                        descending: bool = False, filters: Optional[dict] = None,
+                        columns: Optional[List[str]] = None):
+        """
+        See MySQLRDBDataService.get_keyset_data(). SQLite orders NULLs like MySQL, so the same
+        keyset condition applies.
+        """
+        conditions = []
+        params = []
+        if filters:
+            conditions.extend([f"{key}=?" for key in filters.keys()])
+            params.extend(filters.values())
+        if after is not None:
+            condition, condition_params = MySQLRDBDataService._keyset_condition(key_field, sort_field,
+                                                                                descending, after)
+            conditions.append(condition.replace("%s", "?"))
+            params.extend(condition_params)
+
+        direction = "DESC" if descending else "ASC"
+        order_by = f"`{key_field}` {direction}"
+        if sort_field and sort_field != key_field:
+            order_by = f"`{sort_field}` {direction}, " + order_by
+
+        if columns:
+            columns = list(dict.fromkeys([key_field] + ([sort_field] if sort_field else []) + list(columns)))
+        sql_statement = f"SELECT {self._column_list(columns)} FROM {database_name}.{table_name}"
+        if conditions:
+            sql_statement += " WHERE " + " AND ".join(conditions)
+        sql_statement += f" ORDER BY {order_by} LIMIT ?"
+        return self._query(sql_statement, params + [limit])
+
+    def stream_data(self, database_name: str, table_name: str, columns: Optional[List[str]] = None,
+                    order_by: Optional[str] = None, fetch_size: int = 1000):
+        """
+        Yield every row of a table. The connection is only held while a batch of fetch_size
+        rows is read, so other calls are not blocked for the whole export.
+        """
+        sql_statement = f"SELECT {self._column_list(columns)} FROM {database_name}.{table_name}"
+        if order_by:
+            sql_statement += f" ORDER BY `{order_by}`"
+
+        with self._lock:
+            cursor = self._execute(self._get_connection(), sql_statement)
+        try:
+            while True:
+                with self._lock:
+                    rows = cursor.fetchmany(fetch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+
+    def delete_data_object(self, database_name: str, table_name: str, key_field: str, key_value: Any) -> bool:
+        try:
+            with self._lock:
+                cursor = self._execute(
+                    self._get_connection(), f"DELETE FROM {database_name}.{table_name} WHERE {key_field}=?", [key_value]
+                )
+                return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            logger.error("Error deleting data: %s", e)
+            return False
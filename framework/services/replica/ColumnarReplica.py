@@ -0,0 +1,591 @@
+import bisect
+import sys
+import threading
+import time
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from framework.services.cache.LRUCache import estimate_size
+
+
+class Record:
+    """
+    Base class of the rows returned by ColumnarReplica. Subclasses have one slot per column,
+    so a row costs one pointer per field instead of a dict. Supports the read-only part of the
+    dict interface (get, [], keys, items), so dict(record) and Model(**record) work.
+    """
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for field, value in zip(self.__slots__, values):
+            setattr(self, field, value)
+
+    def get(self, field: str, default: Any = None) -> Any:
+        return getattr(self, field, default) if field in self.__slots__ else default
+
+    def __getitem__(self, field: str) -> Any:
+        if field not in self.__slots__:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __contains__(self, field: str) -> bool:
+        return field in self.__slots__
+
+    def keys(self) -> Tuple[str, ...]:
+        return self.__slots__
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return [(field, getattr(self, field)) for field in self.__slots__]
+
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self):
+        return f"Record({self.to_dict()!r})"
+
+
+def _sort_value(value) -> tuple:
+    # NULLs sort first, as in MySQL.
+    return (0, 0) if value is None else (1, value)
+
+
+class _NumberColumn:
+    """
+    Fixed-width numbers in an array plus a NULL flag per row.
+    """
+
+    def __init__(self, typecode: str, convert):
+        self.values = array(typecode)
+        self.nulls = bytearray()
+        self._convert = convert
+
+    def append(self, value):
+        self.values.append(0 if value is None else self._convert(value))
+        self.nulls.append(value is None)
+
+    def extend(self, values: List[Any]):
+        convert = self._convert
+        self.values.extend([0 if value is None else convert(value) for value in values])
+        self.nulls.extend([value is None for value in values])
+
+    def insert(self, position: int, value):
+        self.values.insert(position, 0 if value is None else self._convert(value))
+        self.nulls.insert(position, value is None)
+
+    def set(self, position: int, value):
+        self.values[position] = 0 if value is None else self._convert(value)
+        self.nulls[position] = value is None
+
+    def delete(self, position: int):
+        del self.values[position]
+        del self.nulls[position]
+
+    def get(self, position: int):
+        return None if self.nulls[position] else self.values[position]
+
+    def matching(self, value) -> List[int]:
+        return [position for position in range(len(self.nulls)) if self.get(position) == value]
+
+    def sort(self, positions: Iterable[int]) -> List[int]:
+        # NULLs first, as in MySQL; sorted() is stable, so ties stay in the given order.
+        nulls = self.nulls
+        present = sorted([position for position in positions if not nulls[position]], key=self.values.__getitem__)
+        return [position for position in positions if nulls[position]] + present
+
+    def nbytes(self) -> int:
+        return sys.getsizeof(self.values) + sys.getsizeof(self.nulls)
+
+
+class _StringColumn:
+    """
+    Dictionary encoded strings for low-cardinality columns: each distinct value is interned
+    and stored once, rows hold a 4 byte code. Code 0 is NULL. Values that are no longer used
+    stay in the dictionary until the next full load.
+    """
+
+    def __init__(self):
+        self.codes = array("I")
+        self.strings = [None]
+        self._index = {None: 0}
+
+    def _code(self, value) -> int:
+        if value is not None:
+            value = str(value)
+        code = self._index.get(value)
+        if code is None:
+            value = sys.intern(value)
+            code = len(self.strings)
+            self.strings.append(value)
+            self._index[value] = code
+        return code
+
+    def append(self, value):
+        self.codes.append(self._code(value))
+
+    def extend(self, values: List[Any]):
+        code = self._code
+        self.codes.extend([code(value) for value in values])
+
+    def insert(self, position: int, value):
+        self.codes.insert(position, self._code(value))
+
+    def set(self, position: int, value):
+        self.codes[position] = self._code(value)
+
+    def delete(self, position: int):
+        del self.codes[position]
+
+    def get(self, position: int):
+        return self.strings[self.codes[position]]
+
+    def matching(self, value) -> List[int]:
+        # Case-insensitive, like the default MySQL collation. Only the distinct values are
+        # compared as strings; rows are matched on their codes.
+        folded = str(value).casefold()
+        codes = {code for code, string in enumerate(self.strings) if string and string.casefold() == folded}
+        if not codes:
+            return []
+        return [position for position, code in enumerate(self.codes) if code in codes]
+
+    def sort(self, positions: Iterable[int]) -> List[int]:
+        codes, strings = self.codes, self.strings
+        present = sorted([position for position in positions if codes[position]],
+                         key=lambda position: strings[codes[position]])
+        return [position for position in positions if not codes[position]] + present
+
+    def nbytes(self) -> int:
+        strings = sum(sys.getsizeof(string) for string in self.strings if string is not None)
+        return sys.getsizeof(self.codes) + sys.getsizeof(self.strings) + sys.getsizeof(self._index) + strings
+
+
+class _TextColumn:
+    """
+    Free text that rarely repeats (descriptions, comments), kept as a plain list of strings.
+    """
+
+    def __init__(self):
+        self.values = []
+
+    def append(self, value):
+        self.values.append(value)
+
+    def extend(self, values: List[Any]):
+        self.values.extend(values)
+
+    def insert(self, position: int, value):
+        self.values.insert(position, value)
+
+    def set(self, position: int, value):
+        self.values[position] = value
+
+    def delete(self, position: int):
+        del self.values[position]
+
+    def get(self, position: int):
+        return self.values[position]
+
+    def matching(self, value) -> List[int]:
+        return [position for position, stored in enumerate(self.values) if stored == value]
+
+    def sort(self, positions: Iterable[int]) -> List[int]:
+        values = self.values
+        present = sorted([position for position in positions if values[position] is not None],
+                         key=values.__getitem__)
+        return [position for position in positions if values[position] is None] + present
+
+    def nbytes(self) -> int:
+        return sys.getsizeof(self.values) + sum(sys.getsizeof(value) for value in self.values if value is not None)
+
+
+_COLUMN_TYPES = {
+    "int": lambda: _NumberColumn("q", int),
+    "float": lambda: _NumberColumn("d", float),
+    "str": _StringColumn,
+    "text": _TextColumn,
+}
+
+
+class ColumnarTable:
+    """
+    Column-oriented copy of a table with an integer primary key. Rows are kept in key order,
+    so key lookups are a binary search over one array and new auto-increment rows are appended.
+    Not thread-safe; see ColumnarReplica.
+    """
+
+    def __init__(self, key_field: str, columns: Dict[str, str], watermark_fields: Iterable[str] = ()):
+        """
+        :param columns: Field name -> 'int', 'float', 'str' (interned, for repeated values) or 'text'.
+        :param watermark_fields: Fields whose largest value is tracked, see high_water_mark.
+        """
+        self.key_field = key_field
+        self.keys = array("q")
+        self.columns = {field: _COLUMN_TYPES[kind]() for field, kind in columns.items() if field != key_field}
+        self.fields = (key_field,) + tuple(self.columns)
+        # Largest value ever seen per field; deleting the newest row does not move it back.
+        self.high_water_mark = {field: None for field in (key_field,) + tuple(watermark_fields)}
+        self.version = 0
+        self._orders = {}
+        self._record_types = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def position(self, key: int) -> Optional[int]:
+        position = bisect.bisect_left(self.keys, key)
+        if position < len(self.keys) and self.keys[position] == key:
+            return position
+        return None
+
+    def upsert(self, row: dict):
+        key = int(row[self.key_field])
+        position = bisect.bisect_left(self.keys, key)
+        if position < len(self.keys) and self.keys[position] == key:
+            for field, column in self.columns.items():
+                column.set(position, row.get(field))
+        elif position == len(self.keys):
+            self.keys.append(key)
+            for field, column in self.columns.items():
+                column.append(row.get(field))
+        else:
+            self.keys.insert(position, key)
+            for field, column in self.columns.items():
+                column.insert(position, row.get(field))
+        self._track([row])
+        self._changed()
+
+    def extend(self, rows: List[dict]):
+        """
+        Add many rows. Rows in ascending key order above the current last key, as read by a
+        table scan, are appended a column at a time; any others go through upsert().
+        """
+        last = self.keys[-1] if self.keys else None
+        keys = [int(row[self.key_field]) for row in rows]
+        if any(key <= previous for previous, key in zip([last] + keys, keys) if previous is not None):
+            for row in rows:
+                self.upsert(row)
+            return
+        self.keys.extend(keys)
+        for field, column in self.columns.items():
+            column.extend([row.get(field) for row in rows])
+        self._track(rows)
+        self._changed()
+
+    def _track(self, rows: List[dict]):
+        for field, highest in self.high_water_mark.items():
+            values = [row.get(field) for row in rows]
+            values = [int(value) if field == self.key_field else value for value in values if value is not None]
+            if values and (highest is None or max(values) > highest):
+                self.high_water_mark[field] = max(values)
+
+    def remove(self, key: int) -> bool:
+        position = self.position(key)
+        if position is None:
+            return False
+        del self.keys[position]
+        for column in self.columns.values():
+            column.delete(position)
+        self._changed()
+        return True
+
+    def _changed(self):
+        self.version += 1
+        self._orders.clear()
+
+    def record_type(self, fields: Optional[Iterable[str]] = None) -> type:
+        fields = tuple(fields) if fields else self.fields
+        record_type = self._record_types.get(fields)
+        if record_type is None:
+            unknown = [field for field in fields if field not in self.fields]
+            if unknown:
+                raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+            record_type = type("Record", (Record,), {"__slots__": fields})
+            self._record_types[fields] = record_type
+        return record_type
+
+    def records(self, positions: Iterable[int], fields: Optional[Iterable[str]] = None) -> List[Record]:
+        record_type = self.record_type(fields)
+        getters = [self.keys.__getitem__ if field == self.key_field else self.columns[field].get
+                   for field in record_type.__slots__]
+        return [record_type(*[get(position) for get in getters]) for position in positions]
+
+    def _matching(self, filters: Optional[dict]) -> Iterable[int]:
+        """
+        Positions of the rows equal to every filter value, in key order.
+        """
+        if not filters:
+            return range(len(self.keys))
+        positions = None
+        for field, value in filters.items():
+            if field == self.key_field:
+                position = self.position(int(value))
+                matched = [] if position is None else [position]
+            else:
+                matched = self.columns[field].matching(value)
+            positions = matched if positions is None else sorted(set(positions).intersection(matched))
+        return positions
+
+    def _sort_key(self, sort_field: Optional[str]):
+        keys = self.keys
+        if not sort_field or sort_field == self.key_field:
+            return keys.__getitem__
+        get = self.columns[sort_field].get
+        return lambda position: (_sort_value(get(position)), keys[position])
+
+    def ordered(self, sort_field: Optional[str] = None, filters: Optional[dict] = None) -> Iterable[int]:
+        """
+        Positions of the rows matching filters in ascending (sort_field, key) order. Cached
+        until the next change.
+        """
+        cache_key = (sort_field, tuple(sorted((filters or {}).items())))
+        order = self._orders.get(cache_key)
+        if order is None:
+            order = self._matching(filters)
+            if sort_field and sort_field != self.key_field:
+                order = self.columns[sort_field].sort(order)
+            if len(self._orders) >= 32:
+                self._orders.clear()
+            self._orders[cache_key] = order
+        return order
+
+    def page(self, offset: int, limit: int, filters: Optional[dict] = None, sort_field: Optional[str] = None,
+             descending: bool = False) -> Tuple[Iterable[int], int]:
+        """
+        :return: (positions of one page, number of matching rows)
+        """
+        order = self.ordered(sort_field, filters)
+        total = len(order)
+        if descending:
+            end = max(total - offset, 0)
+            return order[max(end - limit, 0):end][::-1], total
+        return order[offset:offset + limit], total
+
+    def page_after(self, after: Optional[dict], limit: int, filters: Optional[dict] = None,
+                   sort_field: Optional[str] = None, descending: bool = False) -> Tuple[Iterable[int], int]:
+        """
+        Keyset page: the rows after after = {"key": ..., "sort": ...} in (sort_field, key) order.
+
+        :return: (positions of one page, number of matching rows)
+        """
+        if after is None:
+            return self.page(0, limit, filters, sort_field, descending)
+        order = self.ordered(sort_field, filters)
+        if not sort_field or sort_field == self.key_field:
+            target = after["key"]
+        else:
+            target = (_sort_value(after.get("sort")), after["key"])
+        sort_key = self._sort_key(sort_field)
+        if descending:
+            end = bisect.bisect_left(order, target, key=sort_key)
+            return order[max(end - limit, 0):end][::-1], len(order)
+        start = bisect.bisect_right(order, target, key=sort_key)
+        return order[start:start + limit], len(order)
+
+    def nbytes(self) -> Dict[str, int]:
+        sizes = {self.key_field: sys.getsizeof(self.keys)}
+        sizes.update({field: column.nbytes() for field, column in self.columns.items()})
+        return sizes
+
+
+class ColumnarReplica:
+    """
+    Thread-safe, in-process read replica of one table, held in a ColumnarTable.
+
+    The owner loads it with begin_load()/finish_load(), then keeps it current by applying new
+    rows above refresh_after (refresh_interval) and the rows changed since version, e.g. a
+    ChangeCounter value, with apply(). Changes the owner cannot see otherwise are only picked
+    up by a full reload (reload_interval).
+    """
+
+    def __init__(self, context: dict):
+        """
+        :param context: key_field and columns (see ColumnarTable), plus the optional
+            watermark_fields, refresh_interval and reload_interval (seconds), and refresh_overlap:
+            how far below the high-water mark refreshes scan for new rows, e.g. when keys are
+            handed out in blocks by several processes (default 0).
+        """
+        self.context = context
+        self.key_field = context["key_field"]
+        self.columns = context["columns"]
+        self.watermark_fields = tuple(context.get("watermark_fields", ()))
+        self.refresh_interval = context.get("refresh_interval", 5.0)
+        self.reload_interval = context.get("reload_interval", 3600.0)
+        self.refresh_overlap = context.get("refresh_overlap", 0)
+
+        self._lock = threading.RLock()
+        self._table = self.new_table()
+        self.loading = False
+        self._dirty = set()
+        self.loaded = False
+        self.loaded_at = None
+        self.refreshed_at = None
+        # Set by the owner: up to where its record of changes has been applied.
+        self.version = None
+
+    def new_table(self) -> ColumnarTable:
+        return ColumnarTable(self.key_field, self.columns, self.watermark_fields)
+
+    def begin_load(self) -> ColumnarTable:
+        """
+        Start a full load. Fill the returned table with extend() and pass it to finish_load();
+        reads are served from the current table meanwhile.
+        """
+        with self._lock:
+            self.loading = True
+            self._dirty = set()
+        return self.new_table()
+
+    def finish_load(self, table: ColumnarTable, version: Any = None) -> set:
+        """
+        Swap in a loaded table.
+
+        :param version: The owner's version the load started at.
+        :return: Keys written while the load ran. The scan may have read them before the write,
+            so the caller should read them again and apply() them.
+        """
+        with self._lock:
+            self._table = table
+            self.version = version
+            self.loading = False
+            dirty, self._dirty = self._dirty, set()
+            self.loaded = True
+            self.loaded_at = self.refreshed_at = time.time()
+        return dirty
+
+    def abort_load(self):
+        with self._lock:
+            self.loading = False
+            self._dirty = set()
+
+    def needs_reload(self) -> bool:
+        return not self.loaded or time.time() - self.loaded_at >= self.reload_interval
+
+    def needs_refresh(self) -> bool:
+        return self.needs_reload() or time.time() - self.refreshed_at >= self.refresh_interval
+
+    @property
+    def high_water_mark(self) -> int:
+        """
+        The largest key loaded so far; rows above it are new.
+        """
+        with self._lock:
+            return self._table.high_water_mark[self.key_field] or 0
+
+    @property
+    def refresh_after(self) -> int:
+        """
+        Refreshes scan rows above this key. Rows below it created since the last load, e.g. in
+        an ID block another process leased earlier, are missed until the next reload, so a key
+        missing from the replica may still exist.
+        """
+        return max(self.high_water_mark - self.refresh_overlap, 0)
+
+    def apply(self, rows: Iterable[dict] = (), removed: Iterable[Any] = (), refreshed: bool = False,
+              version: Any = None):
+        """
+        Insert or replace rows and drop the removed keys.
+
+        :param refreshed: The rows are the result of a refresh.
+        :param version: The owner's version the refresh started at.
+        """
+        with self._lock:
+            table = self._table
+            rows = list(rows)
+            if self.loading:
+                self._dirty.update(int(row[self.key_field]) for row in rows)
+            table.extend(rows)
+            for key in removed:
+                if self.loading:
+                    self._dirty.add(int(key))
+                table.remove(int(key))
+            if refreshed:
+                self.refreshed_at = time.time()
+            if version is not None:
+                self.version = version
+
+    @staticmethod
+    def _as_key(key: Any) -> Optional[int]:
+        try:
+            return int(key)
+        except (TypeError, ValueError):
+            return None
+
+    def get(self, key: Any, fields: Optional[List[str]] = None) -> Optional[Record]:
+        key = self._as_key(key)
+        with self._lock:
+            position = self._table.position(key) if key is not None else None
+            if position is None:
+                return None
+            return self._table.records([position], fields)[0]
+
+    def get_many(self, keys: Iterable[Any], fields: Optional[List[str]] = None) -> Dict[int, Record]:
+        """
+        :return: key -> record for the keys that exist.
+        """
+        with self._lock:
+            table = self._table
+            positions = {}
+            for key in keys:
+                key = self._as_key(key)
+                position = table.position(key) if key is not None else None
+                if position is not None:
+                    positions[key] = position
+            records = table.records(positions.values(), fields)
+        return dict(zip(positions, records))
+
+    def count(self, filters: Optional[dict] = None) -> int:
+        with self._lock:
+            return len(self._table.ordered(None, filters))
+
+    def page(self, offset: int = 0, limit: int = 10, filters: Optional[dict] = None,
+             sort_field: Optional[str] = None, descending: bool = False,
+             fields: Optional[List[str]] = None) -> Tuple[List[Record], int]:
+        """
+        Same rows and order as an ORDER BY sort_field, key LIMIT/OFFSET query.
+
+        :return: (records, number of rows matching filters)
+        """
+        with self._lock:
+            positions, total = self._table.page(offset, limit, filters, sort_field, descending)
+            return self._table.records(positions, fields), total
+
+    def page_after(self, after: Optional[dict] = None, limit: int = 10, filters: Optional[dict] = None,
+                   sort_field: Optional[str] = None, descending: bool = False,
+                   fields: Optional[List[str]] = None) -> Tuple[List[Record], int]:
+        """
+        Same rows and order as MySQLRDBDataService.get_keyset_data(), which also always returns
+        the key and sort columns; the next cursor is made from them.
+
+        :return: (records, number of rows matching filters)
+        """
+        if fields:
+            fields = list(dict.fromkeys([self.key_field] + ([sort_field] if sort_field else []) + list(fields)))
+        with self._lock:
+            positions, total = self._table.page_after(after, limit, filters, sort_field, descending)
+            return self._table.records(positions, fields), total
+
+    def stats(self, sample_size: int = 1000) -> dict:
+        """
+        Row count, freshness and memory use. Memory is also given per 100k rows, next to an
+        estimate for the same rows held as dicts (from a sample), for capacity planning.
+        """
+        with self._lock:
+            table = self._table
+            rows = len(table)
+            columns = table.nbytes()
+            sample = [record.to_dict() for record in table.records(range(min(rows, sample_size)))]
+            high_water_mark = dict(table.high_water_mark)
+        total = sum(columns.values())
+        dict_bytes = sum(estimate_size(row) for row in sample) / len(sample) * rows if sample else 0
+        per_100k = 100_000 / rows if rows else 0
+        return {
+            "enabled": True,
+            "loaded": self.loaded,
+            "loaded_at": self.loaded_at,
+            "refreshed_at": self.refreshed_at,
+            "rows": rows,
+            "high_water_mark": high_water_mark,
+            "memory_bytes": total,
+            "memory_bytes_per_100k": round(total * per_100k),
+            "dict_rows_bytes_per_100k": round(dict_bytes * per_100k),
+            "column_bytes": columns,
+        }
@@ -0,0 +1,173 @@
+import threading
+import time
+from typing import Any, Iterable, List, Tuple
+
+
+class BitmapIndex:
+    """
+    Inverted index from a value (e.g. an ingredient ID) to the documents containing it.
+    Query results come back in ordinal order, i.e. the order documents were added in.
+
+    Each document gets a dense ordinal on insertion and every posting list is a bitmap over those
+    ordinals, stored as a Python int. Intersection and union are then a single big-integer & or |,
+    which runs in C over machine words instead of walking sorted lists in Python.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+        self._changes = None  # doc_id -> values, or None if removed, while a rebuild reads its docs
+        self.loaded = False
+        self.built_at = None
+
+    def _reset(self):
+        self._bitmaps = {}      # value -> bitmap of ordinals
+        self._ordinals = {}     # doc_id -> ordinal
+        self._doc_ids = []      # ordinal -> doc_id, None once removed
+        self._doc_values = {}   # doc_id -> values, needed to remove a document
+
+    def _remove_locked(self, doc_id):
+        ordinal = self._ordinals.pop(doc_id, None)
+        if ordinal is None:
+            return
+        mask = ~(1 << ordinal)
+        for value in self._doc_values.pop(doc_id):
+            bitmap = self._bitmaps[value] & mask
+            if bitmap:
+                self._bitmaps[value] = bitmap
+            else:
+                del self._bitmaps[value]
+        self._doc_ids[ordinal] = None
+
+    def _add_locked(self, doc_id, values: Iterable[Any]):
+        self._remove_locked(doc_id)
+        values = tuple(dict.fromkeys(values))
+        ordinal = len(self._doc_ids)
+        self._doc_ids.append(doc_id)
+        self._ordinals[doc_id] = ordinal
+        self._doc_values[doc_id] = values
+        bit = 1 << ordinal
+        for value in values:
+            self._bitmaps[value] = self._bitmaps.get(value, 0) | bit
+
+        # Replaced and removed documents leave unused ordinals; compact once they dominate.
+        if len(self._doc_ids) > 2 * len(self._ordinals) + 1024:
+            self._compact_locked()
+
+    def _compact_locked(self):
+        # Re-number in doc_id order, which is also the order new auto-increment IDs arrive in.
+        docs = sorted((doc_id, values) for doc_id, values in self._doc_values.items())
+        self._reset()
+        for doc_id, values in docs:
+            self._add_locked(doc_id, values)
+
+    def add(self, doc_id, values: Iterable[Any]):
+        """
+        Index a document under each of its values, replacing any previous version. Before the
+        first rebuild there is nothing to keep current, and the call is ignored.
+        """
+        values = tuple(values)
+        with self._lock:
+            if not self.loaded and self._changes is None:
+                return
+            self._add_locked(doc_id, values)
+            if self._changes is not None:
+                self._changes[doc_id] = values
+
+    def remove(self, doc_id):
+        with self._lock:
+            if not self.loaded and self._changes is None:
+                return
+            self._remove_locked(doc_id)
+            if self._changes is not None:
+                self._changes[doc_id] = None
+
+    def begin_rebuild(self):
+        """
+        Record add() and remove() calls from now on, so that rebuild() can replay the ones made
+        while its documents were read.
+        """
+        with self._lock:
+            self._changes = {}
+
+    def abort_rebuild(self):
+        with self._lock:
+            self._changes = None
+
+    def rebuild(self, docs: Iterable[Tuple[Any, Iterable[Any]]]):
+        """
+        Replace the whole index with (doc_id, values) pairs. This also compacts the ordinals
+        left unused by removed documents. The new index is built without the lock, so queries
+        and updates go on meanwhile, and swapped in once complete.
+        """
+        fresh = BitmapIndex()
+        for doc_id, values in docs:
+            fresh._add_locked(doc_id, values)
+        with self._lock:
+            for doc_id, values in (self._changes or {}).items():
+                if values is None:
+                    fresh._remove_locked(doc_id)
+                else:
+                    fresh._add_locked(doc_id, values)
+            self._changes = None
+            self._bitmaps, self._ordinals = fresh._bitmaps, fresh._ordinals
+            self._doc_ids, self._doc_values = fresh._doc_ids, fresh._doc_values
+            self.loaded = True
+            self.built_at = time.time()
+
+    def _match_locked(self, values: Iterable[Any], match_all: bool) -> int:
+        result = None
+        for value in dict.fromkeys(values):
+            bitmap = self._bitmaps.get(value, 0)
+            if result is None:
+                result = bitmap
+            elif match_all:
+                result &= bitmap
+            else:
+                result |= bitmap
+            if match_all and not result:
+                break
+        return result or 0
+
+    def query(self, values: Iterable[Any], match_all: bool = True, offset: int = 0,
+              limit: int = 10) -> Tuple[List[Any], int]:
+        """
+        Find the documents containing all (match_all) or any of the values.
+
+        :return: (a page of doc IDs in ordinal order, total number of matching documents)
+        """
+        page = []
+        with self._lock:
+            bitmap = self._match_locked(values, match_all)
+            # bin() reversed puts ordinal 0 first; str.find skips the zero runs in C.
+            bits = bin(bitmap)[:1:-1]
+            total = bits.count("1")
+            position = bits.find("1")
+            skipped = 0
+            while position != -1 and len(page) < limit:
+                if skipped < offset:
+                    skipped += 1
+                else:
+                    page.append(self._doc_ids[position])
+                position = bits.find("1", position + 1)
+        return page, total
+
+    def filter(self, doc_ids: Iterable[Any], values: Iterable[Any], match_all: bool = True) -> List[Any]:
+        """
+        Keep the doc IDs, in their given order, that contain all (match_all) or any of the values.
+        """
+        with self._lock:
+            bitmap = self._match_locked(values, match_all)
+            ordinals = self._ordinals
+            return [doc_id for doc_id in doc_ids
+                    if doc_id in ordinals and bitmap >> ordinals[doc_id] & 1]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "documents": len(self._ordinals),
+                "values": len(self._bitmaps),
+                "ordinals": len(self._doc_ids),
+                "loaded": self.loaded,
+                "built_at": self.built_at,
+            }
@@ -0,0 +1,211 @@
+import bisect
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Lower-case, strip accents and split on anything that is not a letter or digit.
+    """
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class InvertedIndex:
+    """
+    In-memory inverted index with BM25 ranking over one or more weighted text fields.
+
+    Term frequencies of the fields are combined with their weights before BM25 saturation
+    (a simplified BM25F). Query terms also match indexed terms they are a prefix of, at a
+    discount, which gives search-as-you-type behaviour. Documents can be added, replaced and
+    removed one at a time, so the index is kept current without rebuilding it.
+    """
+
+    def __init__(self,
+                 fields: Dict[str, float],
+                 k1: float = 1.2,
+                 b: float = 0.75,
+                 prefix_weight: float = 0.5,
+                 min_prefix_length: int = 2,
+                 max_expansions: int = 50):
+        """
+        :param fields: Field name -> weight, e.g. {"recipe_name": 2.0, "content": 1.0}.
+        :param k1: BM25 term frequency saturation.
+        :param b: BM25 document length normalization.
+        :param prefix_weight: Score multiplier for terms matched by prefix only.
+        :param min_prefix_length: Shorter query terms are matched exactly.
+        :param max_expansions: Maximum number of indexed terms a prefix expands to.
+        """
+        self.fields = fields
+        self.k1 = k1
+        self.b = b
+        self.prefix_weight = prefix_weight
+        self.min_prefix_length = min_prefix_length
+        self.max_expansions = max_expansions
+
+        self._lock = threading.RLock()
+        self._reset()
+        self._changes = None  # doc_id -> doc, or None if removed, while a rebuild reads its docs
+        self.loaded = False
+        self.built_at = None
+
+    def _reset(self):
+        self._postings = defaultdict(dict)  # term -> {doc_id: weighted term frequency}
+        self._doc_terms = {}                # doc_id -> terms, needed to remove a document
+        self._doc_len = {}                  # doc_id -> weighted length
+        self._total_len = 0.0
+        self._terms = []                    # sorted vocabulary for prefix lookups
+
+    def _analyze(self, doc: Dict[str, Any]) -> Tuple[Dict[str, float], float]:
+        frequencies = defaultdict(float)
+        length = 0.0
+        for field, weight in self.fields.items():
+            tokens = tokenize(doc.get(field))
+            length += weight * len(tokens)
+            for token in tokens:
+                frequencies[token] += weight
+        return frequencies, length
+
+    def _remove_locked(self, doc_id):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self._total_len -= self._doc_len.pop(doc_id)
+        for term in terms:
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+                position = bisect.bisect_left(self._terms, term)
+                if position < len(self._terms) and self._terms[position] == term:
+                    del self._terms[position]
+
+    def _add_locked(self, doc_id, doc: Dict[str, Any]):
+        self._remove_locked(doc_id)
+        frequencies, length = self._analyze(doc)
+        for term, frequency in frequencies.items():
+            if term not in self._postings:
+                bisect.insort(self._terms, term)
+            self._postings[term][doc_id] = frequency
+        self._doc_terms[doc_id] = tuple(frequencies)
+        self._doc_len[doc_id] = length
+        self._total_len += length
+
+    def add(self, doc_id, doc: Dict[str, Any]):
+        """
+        Index a document, replacing any previous version with the same id. Before the first
+        rebuild there is nothing to keep current, and the call is ignored.
+        """
+        with self._lock:
+            if not self.loaded and self._changes is None:
+                return
+            self._add_locked(doc_id, doc)
+            if self._changes is not None:
+                self._changes[doc_id] = doc
+
+    def remove(self, doc_id):
+        with self._lock:
+            if not self.loaded and self._changes is None:
+                return
+            self._remove_locked(doc_id)
+            if self._changes is not None:
+                self._changes[doc_id] = None
+
+    def begin_rebuild(self):
+        """
+        Record add() and remove() calls from now on, so that rebuild() can replay the ones made
+        while its documents were read.
+        """
+        with self._lock:
+            self._changes = {}
+
+    def abort_rebuild(self):
+        with self._lock:
+            self._changes = None
+
+    def rebuild(self, docs: Iterable[Tuple[Any, Dict[str, Any]]]):
+        """
+        Replace the whole index with (doc_id, doc) pairs. The new index is built without the
+        lock, so searches and updates go on meanwhile, and swapped in once complete.
+        """
+        fresh = InvertedIndex(self.fields, self.k1, self.b, self.prefix_weight, self.min_prefix_length,
+                              self.max_expansions)
+        for doc_id, doc in docs:
+            fresh._add_locked(doc_id, doc)
+        with self._lock:
+            for doc_id, doc in (self._changes or {}).items():
+                if doc is None:
+                    fresh._remove_locked(doc_id)
+                else:
+                    fresh._add_locked(doc_id, doc)
+            self._changes = None
+            self._postings, self._doc_terms, self._doc_len = fresh._postings, fresh._doc_terms, fresh._doc_len
+            self._total_len, self._terms = fresh._total_len, fresh._terms
+            self.loaded = True
+            self.built_at = time.time()
+
+    def __len__(self):
+        return len(self._doc_len)
+
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        matches = []
+        if token in self._postings:
+            matches.append((token, 1.0))
+        if len(token) < self.min_prefix_length:
+            return matches
+        position = bisect.bisect_right(self._terms, token)
+        while position < len(self._terms) and len(matches) < self.max_expansions:
+            term = self._terms[position]
+            if not term.startswith(token):
+                break
+            matches.append((term, self.prefix_weight))
+            position += 1
+        return matches
+
+    def search(self, query: str, offset: int = 0, limit: int = 10) -> Tuple[List[Tuple[Any, float]], int]:
+        """
+        Rank documents against a free-text query.
+
+        :return: ([(doc_id, score), ...] for the requested page, total number of matches)
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return [], 0
+
+        with self._lock:
+            doc_count = len(self._doc_len)
+            if not doc_count:
+                return [], 0
+            average_len = self._total_len / doc_count or 1.0
+
+            scores = defaultdict(float)
+            for token in tokens:
+                for term, boost in self._expand(token):
+                    postings = self._postings[term]
+                    idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for doc_id, frequency in postings.items():
+                        norm = self.k1 * (1 - self.b + self.b * self._doc_len[doc_id] / average_len)
+                        scores[doc_id] += boost * idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        # Ties broken on doc_id so pages are stable.
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[offset:offset + limit], len(ranked)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "documents": len(self._doc_len),
+                "terms": len(self._terms),
+                "loaded": self.loaded,
+                "built_at": self.built_at,
+            }
@@ -1,20 +1,179 @@
 #
-# Placeholder for implementing the service factory and service locator patterns.
+# Service factory and service locator.
 #
 # https://medium.com/javarevisited/service-locator-factory-pattern-7bb9e835b709
 #
-from abc import ABC, abstractmethod
+import asyncio
+import importlib
+import inspect
+import logging
+import threading
+from abc import ABC
+from contextlib import asynccontextmanager
+from typing import Any, Dict
 
-# TODO -- Implement the framework.
-#
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def import_string(path: str) -> Any:
+    """
+    Import 'package.module:attribute'. Services are named this way so that their module, and
+    any SDK it imports, is only loaded when the service is first built.
+    """
+    module_name, _, attribute = path.partition(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, attribute) if attribute else module
+
+
+async def _call_hook(instance: Any, hook: str):
+    method = getattr(instance, hook)
+    if inspect.iscoroutinefunction(method):
+        await method()
+    else:
+        # Closing pools and executors can block.
+        await asyncio.to_thread(method)
 
 
 class BaseServiceFactory(ABC):
+    """
+    Registry of named services, built on first use and then shared (lazy singletons).
+
+    Subclasses return their definitions from service_definitions(), name -> dict with:
+
+        factory: 'package.module:Class' (imported on first use) or any callable
+        kwargs: keyword arguments for the factory
+        services: factory keyword -> name of another service to pass in
+        enabled: False makes get_service() return None (default True)
+        singleton: False builds a new instance on every get_service() (default True)
+        eager: build during startup() instead of on first use
+        startup: method called by startup(), awaited if it is a coroutine
+        shutdown: method called by shutdown()
+
+    startup() and shutdown() are meant to run from the application lifespan, see lifespan().
+    """
 
     def __init__(self):
         pass
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._definitions = None
+        cls._instances = {}
+        cls._created = []
+        cls._building = set()
+        # Reentrant: building a service builds the services it depends on.
+        cls._registry_lock = threading.RLock()
+
+    @classmethod
+    def service_definitions(cls) -> Dict[str, dict]:
+        """
+        :return: name -> definition, see the class docstring. Called once, on first use.
+        """
+        return {}
+
+    @classmethod
+    def definitions(cls) -> Dict[str, dict]:
+        if cls._definitions is None:
+            with cls._registry_lock:
+                if cls._definitions is None:
+                    cls._definitions = cls.service_definitions()
+        return cls._definitions
+
+    @classmethod
+    def register(cls, name: str, definition: dict):
+        """
+        Add or replace a definition, e.g. to swap in a fake in tests. An instance already built
+        under that name is forgotten, not shut down.
+        """
+        with cls._registry_lock:
+            cls.definitions()[name] = definition
+            if cls._instances.pop(name, _MISSING) is not _MISSING:
+                cls._created.remove(name)
+
+    @classmethod
+    def get_service(cls, service_name: str) -> Any:
+        """
+        :return: The service, or None if its definition is disabled.
+        :raises KeyError: For an unknown service name.
+        """
+        instance = cls._instances.get(service_name, _MISSING)
+        if instance is not _MISSING:
+            return instance
+
+        definition = cls.definitions().get(service_name)
+        if definition is None:
+            raise KeyError(f"No such service: {service_name}")
+        if not definition.get("enabled", True):
+            return None
+        if not definition.get("singleton", True):
+            return cls._build(service_name, definition)
+
+        with cls._registry_lock:
+            instance = cls._instances.get(service_name, _MISSING)
+            if instance is _MISSING:
+                instance = cls._build(service_name, definition)
+                cls._instances[service_name] = instance
+                cls._created.append(service_name)
+        return instance
+
+    @classmethod
+    def _build(cls, name: str, definition: dict) -> Any:
+        with cls._registry_lock:
+            if name in cls._building:
+                raise RuntimeError(f"Circular service dependency on {name}")
+            cls._building.add(name)
+            try:
+                factory = definition["factory"]
+                if isinstance(factory, str):
+                    factory = import_string(factory)
+                kwargs = dict(definition.get("kwargs", {}))
+                for argument, dependency in definition.get("services", {}).items():
+                    kwargs[argument] = cls.get_service(dependency)
+                return factory(**kwargs)
+            finally:
+                cls._building.discard(name)
+
+    @classmethod
+    async def startup(cls):
+        """
+        Build the eager services and run the startup hooks, in definition order.
+        """
+        for name, definition in cls.definitions().items():
+            if not (definition.get("eager") or definition.get("startup")):
+                continue
+            instance = cls.get_service(name)
+            if instance is not None and definition.get("startup"):
+                await _call_hook(instance, definition["startup"])
+
+    @classmethod
+    async def shutdown(cls):
+        """
+        Run the shutdown hooks of the services built so far, newest first, and forget them, so a
+        later get_service() builds new ones. A failing hook is logged and the others still run.
+        """
+        with cls._registry_lock:
+            created, cls._created = cls._created, []
+            instances, cls._instances = cls._instances, {}
+        definitions = cls.definitions()
+        for name in reversed(created):
+            hook = definitions.get(name, {}).get("shutdown")
+            if not hook:
+                continue
+            try:
+                await _call_hook(instances[name], hook)
+            except Exception as e:
+                logger.warning(f"Shutting down service {name} failed: {e}")
+
     @classmethod
-    @abstractmethod
-    def get_service(cls, service_name):
-        raise NotImplementedError()
\ No newline at end of file
+    @asynccontextmanager
+    async def lifespan(cls, app):
+        """
+        FastAPI lifespan handler: FastAPI(lifespan=ServiceFactory.lifespan).
+        """
+        await cls.startup()
+        try:
+            yield
+        finally:
+            await cls.shutdown()
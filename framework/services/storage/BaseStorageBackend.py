@@ -0,0 +1,71 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+
+class StorageWriter(ABC):
+    """
+    Incremental upload into a temporary object. Chunks are forwarded as they are written; the
+    object only becomes visible under its final name on commit(). All methods may block.
+    """
+
+    @abstractmethod
+    def write(self, chunk: bytes):
+        raise NotImplementedError('Abstract method write()')
+
+    @abstractmethod
+    def commit(self, name: str, overwrite: bool = False) -> bool:
+        """
+        Publish the uploaded bytes under name.
+
+        :param overwrite: Replace an existing object of the same name.
+        :return: False if an object named name already existed and was kept; the upload is
+            then discarded.
+        """
+        raise NotImplementedError('Abstract method commit()')
+
+    @abstractmethod
+    def abort(self):
+        """
+        Discard everything written so far.
+        """
+        raise NotImplementedError('Abstract method abort()')
+
+
+class BaseStorageBackend(ABC):
+    """
+    Abstract base class for object storage, so the application does not depend on one
+    provider. Methods may block on network or disk I/O; call them off the event loop.
+    """
+
+    def __init__(self, context: Optional[dict] = None):
+        """
+        :param context: Implementation specific settings.
+        """
+        self.context = context or {}
+
+    @abstractmethod
+    def open_writer(self, content_type: Optional[str] = None) -> StorageWriter:
+        raise NotImplementedError('Abstract method open_writer()')
+
+    @abstractmethod
+    def exists(self, name: str) -> bool:
+        raise NotImplementedError('Abstract method exists()')
+
+    @abstractmethod
+    def read(self, name: str) -> bytes:
+        raise NotImplementedError('Abstract method read()')
+
+    @abstractmethod
+    def write_bytes(self, name: str, data: bytes, content_type: Optional[str] = None):
+        raise NotImplementedError('Abstract method write_bytes()')
+
+    @abstractmethod
+    def delete(self, name: str):
+        raise NotImplementedError('Abstract method delete()')
+
+    @abstractmethod
+    def public_url(self, name: str) -> str:
+        """
+        URL clients use to download the object. Must not perform I/O.
+        """
+        raise NotImplementedError('Abstract method public_url()')
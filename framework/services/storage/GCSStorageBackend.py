@@ -0,0 +1,91 @@
+import threading
+import uuid
+from typing import Optional
+
+from .BaseStorageBackend import BaseStorageBackend, StorageWriter
+
+
+class GCSStorageWriter(StorageWriter):
+    """
+    Streams chunks into a temporary blob through a resumable upload (Blob.open("wb")), then
+    copies it to its final name on commit.
+    """
+
+    def __init__(self, backend: "GCSStorageBackend", content_type: Optional[str]):
+        self._backend = backend
+        self._temp_blob = backend.bucket.blob(f"{backend.temp_prefix}{uuid.uuid4().hex}")
+        self._file = self._temp_blob.open("wb", content_type=content_type, chunk_size=backend.chunk_size)
+
+    def write(self, chunk: bytes):
+        self._file.write(chunk)
+
+    def commit(self, name: str, overwrite: bool = False) -> bool:
+        self._file.close()
+        try:
+            bucket = self._backend.bucket
+            if not overwrite and bucket.blob(name).exists():
+                return False
+            blob = bucket.copy_blob(self._temp_blob, bucket, name)
+            if self._backend.make_public:
+                blob.make_public()
+            return True
+        finally:
+            self._temp_blob.delete()
+
+    def abort(self):
+        try:
+            self._file.close()
+        finally:
+            self._temp_blob.delete()
+
+
+class GCSStorageBackend(BaseStorageBackend):
+    """
+    Google Cloud Storage backend. The SDK is imported and the client created on first use,
+    so importing this module, and building public URLs, costs nothing.
+    """
+
+    def __init__(self, context: Optional[dict] = None):
+        """
+        :param context: 'bucket' is the bucket name, 'make_public' makes every committed object
+            publicly readable (not needed for buckets that are public already), 'chunk_size' is
+            the resumable upload chunk size and 'temp_prefix' where uploads are staged.
+        """
+        super().__init__(context)
+        self.bucket_name = self.context["bucket"]
+        self.make_public = self.context.get("make_public", False)
+        # Resumable upload chunks must be a multiple of 256 KiB.
+        self.chunk_size = self.context.get("chunk_size", 1024 * 1024)
+        self.temp_prefix = self.context.get("temp_prefix", "uploads/tmp/")
+        self._bucket = None
+        self._lock = threading.Lock()
+
+    @property
+    def bucket(self):
+        if self._bucket is None:
+            with self._lock:
+                if self._bucket is None:
+                    from google.cloud import storage
+                    self._bucket = storage.Client().bucket(self.bucket_name)
+        return self._bucket
+
+    def open_writer(self, content_type: Optional[str] = None) -> StorageWriter:
+        return GCSStorageWriter(self, content_type)
+
+    def exists(self, name: str) -> bool:
+        return self.bucket.blob(name).exists()
+
+    def read(self, name: str) -> bytes:
+        return self.bucket.blob(name).download_as_bytes()
+
+    def write_bytes(self, name: str, data: bytes, content_type: Optional[str] = None):
+        blob = self.bucket.blob(name)
+        blob.upload_from_string(data, content_type=content_type)
+        if self.make_public:
+            blob.make_public()
+
+    def delete(self, name: str):
+        self.bucket.blob(name).delete()
+
+    def public_url(self, name: str) -> str:
+        return f"https://storage.googleapis.com/{self.bucket_name}/{name}"
@@ -0,0 +1,78 @@
+import os
+import uuid
+from typing import Optional
+
+from .BaseStorageBackend import BaseStorageBackend, StorageWriter
+
+
+class LocalStorageWriter(StorageWriter):
+
+    def __init__(self, backend: "LocalStorageBackend"):
+        self._backend = backend
+        self._temp_path = os.path.join(backend.temp_dir, uuid.uuid4().hex)
+        self._file = open(self._temp_path, "wb")
+
+    def write(self, chunk: bytes):
+        self._file.write(chunk)
+
+    def commit(self, name: str, overwrite: bool = False) -> bool:
+        self._file.close()
+        path = self._backend.path(name)
+        if not overwrite and os.path.exists(path):
+            os.remove(self._temp_path)
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(self._temp_path, path)
+        return True
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
+
+
+class LocalStorageBackend(BaseStorageBackend):
+    """
+    Stores objects as files under a root directory. Intended as a stand-in for cloud storage
+    in tests, benchmarks and local development.
+    """
+
+    def __init__(self, context: Optional[dict] = None):
+        """
+        :param context: 'root' is the directory objects are stored in and 'base_url' the URL
+            prefix returned by public_url().
+        """
+        super().__init__(context)
+        self.root = os.path.abspath(self.context.get("root", "/tmp/recipe-images"))
+        self.base_url = self.context.get("base_url", "file://" + self.root + "/")
+        self.temp_dir = os.path.join(self.root, ".uploads")
+        os.makedirs(self.temp_dir, exist_ok=True)
+
+    def path(self, name: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, name))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid object name: {name}")
+        return path
+
+    def open_writer(self, content_type: Optional[str] = None) -> StorageWriter:
+        return LocalStorageWriter(self)
+
+    def exists(self, name: str) -> bool:
+        return os.path.exists(self.path(name))
+
+    def read(self, name: str) -> bytes:
+        with open(self.path(name), "rb") as f:
+            return f.read()
+
+    def write_bytes(self, name: str, data: bytes, content_type: Optional[str] = None):
+        writer = self.open_writer(content_type)
+        writer.write(data)
+        writer.commit(name, overwrite=True)
+
+    def delete(self, name: str):
+        path = self.path(name)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def public_url(self, name: str) -> str:
+        return self.base_url + name
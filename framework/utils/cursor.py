@@ -0,0 +1,40 @@
+import base64
+import json
+
+
+def encode_cursor(position: dict) -> str:
+    """
+    Turn a pagination position into an opaque, URL-safe token.
+
+    :param position: JSON-serializable dict, e.g. {"key": 42, "sort": "2024-01-01 10:00:00"}.
+    :return: The cursor string.
+    """
+    raw = json.dumps(position, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """
+    Inverse of encode_cursor().
+
+    :param cursor: The cursor string supplied by a client.
+    :return: The position dict.
+    :raises ValueError: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(position, dict) or "key" not in position:
+        raise ValueError("Invalid cursor: missing position")
+    # The position ends up in a WHERE clause, so only scalars are accepted.
+    if not _is_scalar(position["key"]) or (position.get("sort") is not None and not _is_scalar(position["sort"])):
+        raise ValueError("Invalid cursor: position must be a number or a string")
+    if not isinstance(position.get("desc", False), bool) or not isinstance(position.get("sort_by", ""), str):
+        raise ValueError("Invalid cursor: bad sort order")
+    return position
+
+
+def _is_scalar(value) -> bool:
+    return isinstance(value, (str, int, float)) and not isinstance(value, bool)
@@ -0,0 +1,226 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import zlib
+from collections import deque
+from contextlib import contextmanager
+from typing import Hashable, Iterable, List, Optional
+
+
+def make_etag(body: bytes) -> str:
+    """
+    Strong ETag for a response body.
+
+    :param body: The exact bytes sent to the client.
+    :return: The quoted entity tag.
+    """
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Evaluate an If-None-Match header against the current ETag. Uses the weak comparison the
+    header calls for, so W/"x" matches "x".
+
+    :param if_none_match: The header value, a comma separated list of tags or *.
+    :param etag: The current ETag of the resource.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class ChangeCounter:
+    """
+    Monotonic counter bumped on every write to a table, with a version per key: the counter
+    value at the last write to that key. Anything derived from the table, or from one key's
+    row, can remember the version it was computed at and is stale once it has moved on.
+
+    Key versions are kept in a fixed number of hashed slots, so keys sharing a slot move
+    together; that only costs the other keys a cache miss. The last log_size changed keys are
+    also logged, so a copy of the table can catch up with changes_since().
+    """
+
+    def __init__(self, slots: int = 4096, log_size: int = 4096):
+        """
+        :param slots: Number of key version slots.
+        :param log_size: Number of changed keys remembered.
+        """
+        self.slots = slots
+        self.log_size = log_size
+        self._value = 0
+        self._keys = [0] * slots
+        self._log = deque(maxlen=log_size)  # (version, key)
+        self._logged = 0
+        self._lock = threading.Lock()
+
+    def _slot(self, key: Hashable) -> int:
+        return zlib.crc32(str(key).encode("utf-8")) % self.slots
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def key_version(self, key: Hashable) -> int:
+        return self._keys[self._slot(key)]
+
+    def bump(self, keys: Iterable[Hashable] = ()) -> int:
+        """
+        Record a write to the table that changed the given keys.
+
+        :return: The new value.
+        """
+        with self._lock:
+            self._value += 1
+            for key in keys:
+                self._keys[self._slot(key)] = self._value
+                self._log.append((self._value, str(key)))
+                self._logged += 1
+            return self._value
+
+    def changes_since(self, version: int) -> Optional[List[str]]:
+        """
+        :param version: A value read earlier.
+        :return: The keys, as strings, changed by the bumps after version, or None if the log
+            no longer goes back that far.
+        """
+        with self._lock:
+            keys = []
+            for entry_version, key in reversed(self._log):
+                if entry_version <= version:
+                    break
+                keys.append(key)
+            else:
+                if self._logged > len(self._log):
+                    return None
+            return list(dict.fromkeys(reversed(keys)))
+
+
+_MAGIC = b"RCHGC002"
+# magic, slots, log size
+_FILE_HEADER = struct.Struct("<8sII")
+_FILE_HEADER_SIZE = 64
+_WORD = struct.Struct("<Q")
+# The counter value and the number of keys ever logged follow the magic and sizes.
+_VALUE_OFFSET = 16
+_LOGGED_OFFSET = 24
+# version, key; keys that do not fit are logged as b"", which reads as a gap in the log.
+_LOG_ENTRY = struct.Struct("<Q24s")
+
+
+class SharedChangeCounter(ChangeCounter):
+    """
+    ChangeCounter in a memory-mapped file that every process on the host opens, so a write
+    made through one worker process makes the others' cached entries and ETags stale too.
+
+    Writers hold flock() on the file. Reads take no lock: the value and the key versions are
+    aligned 8 byte words, and a read racing a write sees the old or the new version. The log
+    is a ring; changes_since() gives up if a writer wrapped around it while it was read.
+    """
+
+    def __init__(self, name: str = "changes", directory: Optional[str] = None, slots: int = 65536,
+                 log_size: int = 4096):
+        """
+        :param name: Name of the file; every process counting the same table must use the same
+            name and sizes.
+        :param directory: Default /dev/shm, or the temp directory where there is none.
+        :param slots: Number of key version slots, 8 bytes each.
+        :param log_size: Number of changed keys remembered, 32 bytes each.
+        """
+        self.slots = slots
+        self.log_size = log_size
+        directory = directory or ("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir())
+        self.path = os.path.join(directory, f"{name}-{slots}x{log_size}")
+        self._log_offset = _FILE_HEADER_SIZE + slots * _WORD.size
+        self._size = self._log_offset + log_size * _LOG_ENTRY.size
+        self._lock = threading.Lock()
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            header = _FILE_HEADER.pack(_MAGIC, slots, log_size)
+            with self._write_lock():
+                size = os.fstat(self._fd).st_size
+                if size == 0:
+                    os.ftruncate(self._fd, self._size)
+                    os.pwrite(self._fd, header, 0)
+                elif size != self._size or os.pread(self._fd, len(header), 0) != header:
+                    raise ValueError(f"{self.path} is not a change counter file with this layout")
+            self._map = mmap.mmap(self._fd, self._size)
+        except Exception:
+            os.close(self._fd)
+            raise
+
+    @contextmanager
+    def _write_lock(self):
+        # flock() excludes other processes, not other threads of this one.
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    @property
+    def value(self) -> int:
+        return _WORD.unpack_from(self._map, _VALUE_OFFSET)[0]
+
+    def key_version(self, key: Hashable) -> int:
+        return _WORD.unpack_from(self._map, _FILE_HEADER_SIZE + self._slot(key) * _WORD.size)[0]
+
+    def _logged(self) -> int:
+        return _WORD.unpack_from(self._map, _LOGGED_OFFSET)[0]
+
+    def bump(self, keys: Iterable[Hashable] = ()) -> int:
+        with self._write_lock():
+            value = self.value + 1
+            logged = self._logged()
+            # Log and key versions first: a reader that sees the new value also sees the keys.
+            for key in keys:
+                _WORD.pack_into(self._map, _FILE_HEADER_SIZE + self._slot(key) * _WORD.size, value)
+                encoded = str(key).encode("utf-8")
+                _LOG_ENTRY.pack_into(self._map, self._log_offset + logged % self.log_size * _LOG_ENTRY.size,
+                                     value, encoded if len(encoded) <= _LOG_ENTRY.size - 8 else b"")
+                logged += 1
+            _WORD.pack_into(self._map, _LOGGED_OFFSET, logged)
+            _WORD.pack_into(self._map, _VALUE_OFFSET, value)
+            return value
+
+    def changes_since(self, version: int) -> Optional[List[str]]:
+        logged = self._logged()
+        oldest = max(logged - self.log_size, 0)
+        keys = []
+        position = logged
+        for position in range(logged - 1, oldest - 1, -1):
+            entry_version, key = _LOG_ENTRY.unpack_from(self._map,
+                                                         self._log_offset + position % self.log_size * _LOG_ENTRY.size)
+            if entry_version <= version:
+                break
+            if not key.rstrip(b"\0"):
+                return None
+            keys.append(key.rstrip(b"\0").decode("utf-8"))
+        else:
+            if oldest > 0:
+                return None
+        # Entries read may have been overwritten meanwhile.
+        if self._logged() - self.log_size > position:
+            return None
+        return list(dict.fromkeys(reversed(keys)))
+
+    def close(self):
+        """
+        Unmap the file. It is left in place for the other processes.
+        """
+        self._map.close()
+        os.close(self._fd)
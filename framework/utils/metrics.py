@@ -0,0 +1,216 @@
+"""
+Counters and histograms rendered in the Prometheus text exposition format.
+
+Metrics are created once, at import, and registered with REGISTRY. Updating one is a dict
+lookup for the label values plus a locked add, so they can sit on hot paths. Values that are
+already counted elsewhere, such as cache and pool stats, are better exposed with a collector,
+which is only called when /metrics is scraped.
+
+    REQUESTS = counter("http_requests_total", "Requests.", ["method", "status"])
+    REQUESTS.labels("GET", "200").inc()
+"""
+import math
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds, for request and query latency.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# A collector returns (name, type, help, [(labels, value)]) tuples.
+Sample = Tuple[Dict[str, str], float]
+Family = Tuple[str, str, str, List[Sample]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _CounterValue:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramValue:
+    __slots__ = ("_lock", "_upper_bounds", "buckets", "sum", "count")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self._lock = threading.Lock()
+        self._upper_bounds = upper_bounds
+        # Per bucket, not cumulative; the last one is +Inf.
+        self.buckets = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        index = bisect_left(self._upper_bounds, value)
+        with self._lock:
+            self.buckets[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._unlabelled = self.labels()
+
+    def _new_value(self):
+        raise NotImplementedError()
+
+    def labels(self, *values):
+        """
+        :param values: One per label name, in order. Keep them to a small, fixed set: each
+            combination is kept, and rendered, for the life of the process.
+        """
+        child = self._values.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._values.setdefault(tuple(str(value) for value in values), self._new_value())
+                self._values[values] = child
+        return child
+
+    def _children(self):
+        with self._lock:
+            items = list(self._values.items())
+        seen = set()
+        for values, child in items:
+            if id(child) not in seen:
+                seen.add(id(child))
+                yield dict(zip(self.labelnames, (str(value) for value in values))), child
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self._render_samples())
+        return lines
+
+    def _render_samples(self) -> List[str]:
+        raise NotImplementedError()
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_value(self):
+        return _CounterValue()
+
+    def inc(self, amount: float = 1):
+        self._unlabelled.inc(amount)
+
+    def _render_samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(labels)} {_format_value(child.value)}"
+                for labels, child in self._children()]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.upper_bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_value(self):
+        return _HistogramValue(self.upper_bounds)
+
+    def observe(self, value: float):
+        self._unlabelled.observe(value)
+
+    def _render_samples(self) -> List[str]:
+        lines = []
+        for labels, child in self._children():
+            with child._lock:
+                buckets, total, count = list(child.buckets), child.sum, child.count
+            cumulative = 0
+            for upper_bound, bucket in zip(self.upper_bounds + (math.inf,), buckets):
+                cumulative += bucket
+                bucket_labels = dict(labels, le=_format_value(float(upper_bound)))
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class Registry:
+    """
+    The metrics and collectors rendered by /metrics.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Family]]):
+        """
+        :param collector: Called on every scrape; returns (name, type, help, [(labels, value)])
+            for values kept elsewhere, e.g. cache stats.
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            for name, metric_type, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = (),
+            registry: Optional[Registry] = None) -> Counter:
+    return (registry or REGISTRY).register(Counter(name, documentation, labelnames))
+
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = LATENCY_BUCKETS, registry: Optional[Registry] = None) -> Histogram:
+    return (registry or REGISTRY).register(Histogram(name, documentation, labelnames, buckets))
@@ -0,0 +1,87 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from framework.utils import metrics
+
+SAVED_CALLS = metrics.counter(
+    "singleflight_saved_total", "Calls that waited for an identical call in flight instead of running their own.",
+    ["name"]
+)
+TIMEOUTS = metrics.counter("singleflight_timeouts_total", "Callers that gave up waiting for a call.", ["name"])
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls: the first caller for a key starts the call, and
+    callers arriving while it is in flight wait for its result, or its exception, instead of
+    running it again. Once the call finishes the key is forgotten, so later callers start a
+    new one; nothing is cached.
+
+    The call runs in its own task, so a caller that times out or is cancelled does not cancel
+    it for the others. Meant to be used from one event loop.
+    """
+
+    def __init__(self, name: str = "default", timeout: Optional[float] = None):
+        """
+        :param name: Label of the metrics.
+        :param timeout: Seconds a caller waits for the call, None to wait for as long as it
+            takes. The call itself goes on after a caller gives up.
+        """
+        self.name = name
+        self.timeout = timeout
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._saved = SAVED_CALLS.labels(name)
+        self._timeouts = TIMEOUTS.labels(name)
+        self._stats = {"calls": 0, "saved": 0, "errors": 0, "timeouts": 0}
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """
+        :param key: Identifies the call; equal keys must mean calls with the same result.
+        :param call: Started, without arguments, if no call for the key is in flight.
+        :param timeout: Overrides the default timeout.
+        :return: The call's result. Shared by all the callers, so it must not be modified.
+        :raises asyncio.TimeoutError: If the call did not finish within the timeout.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+            self._stats["calls"] += 1
+        else:
+            self._stats["saved"] += 1
+            self._saved.inc()
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), self.timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            if task.done():
+                # The call itself raised TimeoutError.
+                raise
+            self._stats["timeouts"] += 1
+            self._timeouts.inc()
+            raise
+
+    def forget(self, key: Optional[Hashable] = None):
+        """
+        Make later callers start a new call instead of joining the one in flight, e.g. after a
+        write the result may predate. Callers already waiting still get its result.
+
+        :param key: The call to forget, None for all of them.
+        """
+        if key is None:
+            self._calls.clear()
+        else:
+            self._calls.pop(key, None)
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Retrieve the exception even if every caller gave up, so it is not logged as unhandled.
+        if not task.cancelled() and task.exception() is not None:
+            self._stats["errors"] += 1
+
+    def get_stats(self) -> dict:
+        stats = dict(self._stats)
+        stats.update({"name": self.name, "timeout": self.timeout, "in_flight": len(self._calls)})
+        return stats
@@ -0,0 +1,175 @@
+"""
+Tracing and logging that keep the request path to an enqueue. Finished spans go to a
+BatchSpanProcessor's bounded queue and log records to a bounded queue drained by a
+QueueListener thread; exporting and formatting happen on those threads. When a queue is full,
+new spans and records are dropped rather than blocking requests.
+"""
+import atexit
+import logging
+import queue
+import random
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Iterable, List, Optional, Union
+
+from opentelemetry import trace
+from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SpanExporter
+from opentelemetry.sdk.trace.sampling import ALWAYS_ON, ParentBased, TraceIdRatioBased
+from opentelemetry.trace import StatusCode
+
+
+class TailSamplingSpanProcessor(SpanProcessor):
+    """
+    Decides whether to export a trace once its local root span has ended, when its outcome is
+    known: traces with an error span, or whose root took slow_threshold seconds or more, are
+    always exported; the others with probability keep_ratio.
+
+    Until then the trace's spans are held here. At most max_traces traces are held; past that,
+    the oldest is dropped (e.g. one whose root never ended).
+    """
+
+    def __init__(self, delegate: SpanProcessor, keep_ratio: float = 0.1, slow_threshold: float = 0.5,
+                 max_traces: int = 2048, max_spans_per_trace: int = 256):
+        """
+        :param delegate: Gets the spans of kept traces, e.g. a BatchSpanProcessor.
+        :param keep_ratio: Fraction of the fast, successful traces to keep.
+        :param slow_threshold: Seconds.
+        """
+        self.delegate = delegate
+        self.keep_ratio = keep_ratio
+        self.slow_threshold_ns = int(slow_threshold * 1e9)
+        self.max_traces = max_traces
+        self.max_spans_per_trace = max_spans_per_trace
+        self._pending: Dict[int, List[ReadableSpan]] = {}
+        self._lock = threading.Lock()
+        self.kept = 0
+        self.sampled_out = 0
+        self.dropped_spans = 0
+
+    def on_start(self, span, parent_context=None):
+        self.delegate.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan):
+        trace_id = span.context.trace_id
+        if span.parent is not None and not span.parent.is_remote:
+            with self._lock:
+                spans = self._pending.get(trace_id)
+                if spans is None:
+                    if len(self._pending) >= self.max_traces:
+                        # Dicts keep insertion order, so the first trace is the oldest.
+                        self.dropped_spans += len(self._pending.pop(next(iter(self._pending))))
+                    spans = self._pending[trace_id] = []
+                if len(spans) < self.max_spans_per_trace:
+                    spans.append(span)
+                else:
+                    self.dropped_spans += 1
+            return
+
+        with self._lock:
+            spans = self._pending.pop(trace_id, [])
+        spans.append(span)
+        if self._keep(span, spans):
+            self.kept += 1
+            for finished in spans:
+                self.delegate.on_end(finished)
+        else:
+            self.sampled_out += 1
+
+    def _keep(self, root: ReadableSpan, spans: List[ReadableSpan]) -> bool:
+        if root.end_time - root.start_time >= self.slow_threshold_ns:
+            return True
+        for finished in spans:
+            if finished.status.status_code is StatusCode.ERROR:
+                return True
+        return random.random() < self.keep_ratio
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            pending = len(self._pending)
+        return dict(kept=self.kept, sampled_out=self.sampled_out, dropped_spans=self.dropped_spans,
+                    pending_traces=pending)
+
+    def shutdown(self):
+        self.delegate.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.delegate.force_flush(timeout_millis)
+
+
+def configure_tracing(service_name: str, exporter: Optional[SpanExporter] = None,
+                      sample_ratio: float = 1.0, keep_ratio: float = 1.0, slow_threshold: float = 0.5,
+                      max_queue_size: int = 2048, max_export_batch_size: int = 512,
+                      schedule_delay: float = 5.0) -> TracerProvider:
+    """
+    Set the global tracer provider.
+
+    :param exporter: Defaults to the console.
+    :param sample_ratio: Head sampling: the fraction of new traces recorded at all. Unsampled
+        spans cost next to nothing. Requests that carry a sampling decision keep it.
+    :param keep_ratio: Tail sampling: the fraction of the recorded, fast and successful traces
+        that are exported; slow and failed ones always are. 1.0 disables tail sampling.
+    :param slow_threshold: Seconds; see TailSamplingSpanProcessor.
+    :param max_queue_size: Spans waiting for export; more are dropped.
+    :param schedule_delay: Seconds between exports, unless a batch fills up first.
+    :return: The provider, which flushes its spans at exit.
+    """
+    if sample_ratio >= 1.0:
+        sampler = ParentBased(ALWAYS_ON)
+    else:
+        sampler = ParentBased(TraceIdRatioBased(sample_ratio))
+    provider = TracerProvider(resource=Resource.create({SERVICE_NAME: service_name}), sampler=sampler)
+
+    processor = BatchSpanProcessor(exporter or ConsoleSpanExporter(),
+                                   max_queue_size=max_queue_size,
+                                   max_export_batch_size=min(max_export_batch_size, max_queue_size),
+                                   schedule_delay_millis=schedule_delay * 1000)
+    if keep_ratio < 1.0:
+        processor = TailSamplingSpanProcessor(processor, keep_ratio=keep_ratio, slow_threshold=slow_threshold)
+    provider.add_span_processor(processor)
+    trace.set_tracer_provider(provider)
+    return provider
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler for a bounded queue: a record that does not fit is counted and dropped, where
+    QueueHandler would report a queue.Full error for it.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(handlers: Iterable[logging.Handler], level: Union[int, str] = logging.INFO,
+                      filters: Iterable[logging.Filter] = (), max_queue_size: int = 10000) -> QueueListener:
+    """
+    Log through a queue: the root logger gets a DroppingQueueHandler and a listener thread passes
+    the records on to handlers, which format and write them. Slow handlers, such as CloudWatch,
+    belong here rather than on a logger.
+
+    :param filters: Run on the calling thread, before the record is queued; use them for
+        anything read from the caller's context, e.g. a CorrelationIdFilter.
+    :return: The started listener, which is flushed and stopped at exit.
+    """
+    log_queue = queue.Queue(max_queue_size)
+    queue_handler = DroppingQueueHandler(log_queue)
+    for log_filter in filters:
+        queue_handler.addFilter(log_filter)
+
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(queue_handler)
+    return listener
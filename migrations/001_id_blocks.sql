@@ -0,0 +1,11 @@
+-- Counters for MySQLRDBDataService.lease_id_block(); apply before deploying the service.
+-- The service assumes this table exists and never creates it at request time.
+CREATE TABLE IF NOT EXISTS `recipe_management`.`IdBlocks` (
+    name VARCHAR(128) PRIMARY KEY,
+    next_id BIGINT NOT NULL
+);
+
+-- Start the recipe counter above the largest existing key. lease_id_block() does the same
+-- for counters missing here, with INSERT IGNORE, so running this again is harmless.
+INSERT IGNORE INTO `recipe_management`.`IdBlocks` (name, next_id)
+SELECT 'Recipe.recipe_id', COALESCE(MAX(recipe_id), 0) + 1 FROM `recipe_management`.`Recipe`;
@@ -0,0 +1,66 @@
+import os
+
+# The app runs against SQLite and the local filesystem; set before the services are defined.
+os.environ.setdefault("RECIPE_DATA_SERVICE", "sqlite")
+os.environ.setdefault("RECIPE_IMAGE_STORAGE", "local")
+os.environ.setdefault("RECIPE_TRACE_SAMPLE_RATE", "0")
+os.environ.setdefault("RECIPE_LOG_LEVEL", "ERROR")
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.services.service_factory import ServiceFactory  # noqa: E402
+from benchmarks import fixtures  # noqa: E402
+
+RECIPES = 60
+
+
+@pytest.fixture
+def services(tmp_path):
+    """
+    Point the database, image storage and change counter at files under tmp_path, so every
+    test starts from empty state and nothing is left in /dev/shm. Yields a function that
+    overrides more definitions; they are all restored after the test.
+    """
+    original = dict(ServiceFactory.definitions())
+
+    def override(name: str, **changes):
+        ServiceFactory.register(name, dict(ServiceFactory.definitions()[name], **changes))
+
+    override("RecipeResourceDataService", kwargs=dict(context=dict(databases={
+        "recipe_management": str(tmp_path / "recipes.db")
+    })))
+    override("ImageStorage", kwargs=dict(context=dict(root=str(tmp_path / "images"))))
+    override("RecipeTableVersion", kwargs=dict(name="recipe-changes", directory=str(tmp_path)))
+    yield override
+
+    for name, definition in original.items():
+        ServiceFactory.register(name, definition)
+
+
+def open_client():
+    """
+    Seed the database and return a TestClient; entering it starts the app.
+    """
+    fixtures.seed_database(ServiceFactory.get_service("RecipeResourceDataService"), RECIPES)
+    return TestClient(app, raise_server_exceptions=False)
+
+
+@pytest.fixture
+def client(services):
+    """
+    A client for the app with RECIPES recipes, IDs 1 to RECIPES.
+    """
+    with open_client() as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def replica_client(services):
+    """
+    Like client, with the read replica enabled and loaded at startup.
+    """
+    services("RecipeReplica", enabled=True)
+    with open_client() as test_client:
+        yield test_client
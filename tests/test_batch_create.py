@@ -0,0 +1,48 @@
+from app.routers.recipes import MAX_BATCH_SIZE
+from app.services.service_factory import ServiceFactory
+from benchmarks import fixtures
+from tests.conftest import RECIPES
+
+
+def reject_recipes_named(name: str):
+    # A row the database refuses, as a constraint would.
+    ServiceFactory.get_service("RecipeResourceDataService").execute_script(
+        f"CREATE TRIGGER {fixtures.DATABASE}.reject_recipe BEFORE INSERT ON {fixtures.TABLE} "
+        f"WHEN NEW.recipe_name = '{name}' BEGIN SELECT RAISE(ABORT, 'rejected'); END;"
+    )
+
+
+def test_batch_create_inserts_every_recipe(client):
+    recipes = [{"recipe_name": f"zucchini bake {index}", "recipe_id": 1} for index in range(25)]
+    response = client.post("/recipes_sections/batch", json=recipes, params={"chunk_size": 10})
+    assert response.status_code == 201, response.text
+    body = response.json()
+    assert (body["created"], body["failed"]) == (25, 0)
+    assert [result["index"] for result in body["results"]] == list(range(25))
+
+    # One consecutive range of new IDs; IDs sent by the client are ignored.
+    ids = [result["recipe_id"] for result in body["results"]]
+    assert ids == list(range(ids[0], ids[0] + 25)) and ids[0] > RECIPES
+    assert client.get(f"/recipes_sections/{ids[3]}").json()["recipe_name"] == "zucchini bake 3"
+    page = client.get("/recipes_sections", params={"q": "zucchini", "limit": 100}).json()
+    assert page["pagination"]["total_count"] == 25
+    assert client.get("/recipes_sections", params={"limit": 1}).json()["pagination"]["total_count"] == RECIPES + 25
+
+
+def test_batch_create_reports_failed_rows(client):
+    reject_recipes_named("bad")
+    recipes = [{"recipe_name": name} for name in ("good", "bad", "also good")]
+    response = client.post("/recipes_sections/batch", json=recipes)
+    assert response.status_code == 207, response.text
+    body = response.json()
+    assert (body["created"], body["failed"]) == (2, 1)
+    failed = body["results"][1]
+    assert failed["status"] == "failed" and failed["recipe_id"] is None and "rejected" in failed["error"]
+    created = body["results"][2]
+    assert client.get(f"/recipes_sections/{created['recipe_id']}").json()["recipe_name"] == "also good"
+
+
+def test_batch_create_limits_the_batch_size(client):
+    response = client.post("/recipes_sections/batch", json=[{}] * (MAX_BATCH_SIZE + 1))
+    assert response.status_code == 413
+    assert client.get("/recipes_sections", params={"limit": 1}).json()["pagination"]["total_count"] == RECIPES
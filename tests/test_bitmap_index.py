@@ -0,0 +1,69 @@
+from framework.services.search.BitmapIndex import BitmapIndex
+
+INGREDIENTS = {
+    1: [10, 20, 30],
+    2: [20, 30],
+    3: [30],
+    4: [40, 10],
+}
+
+
+def make_index() -> BitmapIndex:
+    index = BitmapIndex()
+    index.rebuild(INGREDIENTS.items())
+    return index
+
+
+def test_match_all_and_any():
+    index = make_index()
+    assert index.query([20, 30]) == ([1, 2], 2)
+    assert index.query([10, 40], match_all=False) == ([1, 4], 2)
+    assert index.query([10, 20, 40]) == ([], 0)
+    assert index.query([99], match_all=False) == ([], 0)
+
+
+def test_pages_follow_the_insertion_order():
+    index = make_index()
+    assert index.query([30], offset=1, limit=1) == ([2], 3)
+    assert index.query([30], offset=3) == ([], 3)
+
+
+def test_filter_keeps_the_given_order():
+    assert make_index().filter([3, 4, 1, 9], [10, 30], match_all=False) == [3, 4, 1]
+
+
+def test_documents_are_replaced_and_removed():
+    index = make_index()
+    index.add(2, [40])
+    assert index.query([30]) == ([1, 3], 2)
+    # A replaced document moves to the end.
+    assert index.query([40]) == ([4, 2], 2)
+    index.remove(4)
+    assert index.query([10, 40], match_all=False) == ([1, 2], 2)
+    stats = index.stats()
+    assert (stats["documents"], stats["values"]) == (3, 4)
+
+
+def test_removed_ordinals_are_compacted():
+    index = make_index()
+    for _ in range(3000):
+        index.add(3, [30])
+    assert index.stats()["ordinals"] < 1100
+    assert index.query([30]) == ([1, 2, 3], 3)
+
+
+def test_updates_before_the_first_rebuild_are_ignored():
+    index = BitmapIndex()
+    index.add(1, [10])
+    assert not index.loaded and index.query([10]) == ([], 0)
+
+
+def test_rebuild_replays_changes_made_while_it_read():
+    index = BitmapIndex()
+    index.begin_rebuild()
+    index.remove(1)
+    index.add(5, [10])
+    index.rebuild(INGREDIENTS.items())
+    assert index.loaded
+    assert index.query([10]) == ([4, 5], 2)
+    assert index.stats()["documents"] == 4
@@ -0,0 +1,133 @@
+import threading
+import time
+
+import pytest
+
+from framework.services.data_access.ConnectionPool import ConnectionPool, PoolExhaustedError
+
+
+class FakeConnection:
+    open = True
+
+    def __init__(self, number):
+        self.number = number
+        self.pings = 0
+        self.dead = False
+
+    def close(self):
+        self.open = False
+
+
+class FakeDatabase:
+    """
+    Hands out numbered FakeConnections; ping() fails for connections marked dead.
+    """
+
+    def __init__(self):
+        self.connections = []
+
+    def connect(self):
+        self.connections.append(FakeConnection(len(self.connections)))
+        return self.connections[-1]
+
+    @staticmethod
+    def ping(raw):
+        raw.pings += 1
+        if raw.dead:
+            raise ConnectionError("gone away")
+
+
+@pytest.fixture
+def database():
+    return FakeDatabase()
+
+
+def make_pool(database, **kwargs):
+    return ConnectionPool(database.connect, ping=database.ping, **dict(dict(min_size=0, max_size=2), **kwargs))
+
+
+def test_checkout_times_out_when_the_pool_is_exhausted(database):
+    pool = make_pool(database)
+    held = [pool.acquire(), pool.acquire()]
+    started = time.monotonic()
+    with pytest.raises(PoolExhaustedError):
+        pool.acquire(timeout=0.05)
+    assert time.monotonic() - started >= 0.05
+    assert len(database.connections) == 2
+    assert pool.stats()["timeouts"] == 1
+    for connection in held:
+        connection.close()
+
+
+def test_checkout_waits_for_a_release(database):
+    pool = make_pool(database, max_size=1)
+    held = pool.acquire()
+    releaser = threading.Timer(0.05, held.close)
+    releaser.start()
+    connection = pool.acquire(timeout=5)
+    releaser.join()
+    assert connection.raw is held.raw
+    stats = pool.stats()
+    assert stats["waits"] == 1 and stats["wait_time_total"] > 0
+    connection.close()
+
+
+def test_the_most_recently_released_connection_is_reused(database):
+    pool = make_pool(database)
+    first, second = pool.acquire(), pool.acquire()
+    first.close()
+    second.close()
+    assert pool.acquire().raw is second.raw
+    assert pool.stats()["reused"] == 1
+
+
+def test_idle_connections_are_pinged_after_the_health_check_interval(database):
+    pool = make_pool(database, health_check_interval=60)
+    pool.acquire().close()
+    pool.acquire().close()
+    assert database.connections[0].pings == 0
+
+    pool.health_check_interval = 0
+    pool.acquire().close()
+    assert database.connections[0].pings == 1
+
+    # A connection failing its ping is closed and replaced.
+    database.connections[0].dead = True
+    connection = pool.acquire()
+    assert connection.raw is database.connections[1]
+    assert not database.connections[0].open
+    stats = pool.stats()
+    assert stats["health_checks"] == 2 and stats["health_check_failures"] == 1
+    assert stats["size"] == 1
+    connection.close()
+
+
+def test_idle_connections_above_min_size_are_evicted(database):
+    pool = make_pool(database, min_size=1, max_size=3, idle_timeout=0.05)
+    held = [pool.acquire() for _ in range(3)]
+    for connection in held:
+        connection.close()
+    time.sleep(0.06)
+    pool.acquire().close()
+    stats = pool.stats()
+    assert stats["idle_evictions"] == 2
+    assert stats["size"] == stats["idle"] == 1
+    assert [connection.open for connection in database.connections].count(True) == 1
+
+
+def test_stats_and_close(database):
+    pool = make_pool(database, max_size=3)
+    held = pool.acquire()
+    pool.acquire().close()
+    broken = pool.acquire()
+    broken.discard()
+    stats = pool.stats()
+    assert (stats["created"], stats["checkouts"], stats["closed"]) == (2, 3, 1)
+    assert (stats["size"], stats["in_use"], stats["idle"]) == (1, 1, 0)
+
+    pool.close()
+    with pytest.raises(PoolExhaustedError):
+        pool.acquire()
+    held.close()
+    assert not any(connection.open for connection in database.connections)
+    assert pool.stats()["size"] == 0
@@ -0,0 +1,76 @@
+from app.services.service_factory import ServiceFactory
+from tests.conftest import RECIPES
+
+
+def count_queries(monkeypatch):
+    """
+    Count get_total_count() calls on the database.
+    """
+    data_service = ServiceFactory.get_service("RecipeResourceDataService")
+    get_total_count = data_service.get_total_count
+    counts = []
+
+    def counting(*args, **kwargs):
+        counts.append(kwargs.get("filters"))
+        return get_total_count(*args, **kwargs)
+
+    monkeypatch.setattr(data_service, "get_total_count", counting)
+    return counts
+
+
+def pagination(client, **params):
+    response = client.get("/recipes_sections", params=dict(params, limit=5))
+    assert response.status_code == 200, response.text
+    page = response.json()["pagination"]
+    return page["total_count"], page["total_count_type"]
+
+
+def test_exact_counts_query_every_page(client, monkeypatch):
+    counts = count_queries(monkeypatch)
+    assert pagination(client, count="exact") == (RECIPES, "exact")
+    assert pagination(client, count="exact", offset=5) == (RECIPES, "exact")
+    assert len(counts) == 2
+
+
+def test_cached_counts_are_reused_until_a_write(client, monkeypatch):
+    counts = count_queries(monkeypatch)
+    assert pagination(client, count="cached") == (RECIPES, "exact")
+    assert pagination(client, count="cached", offset=5) == (RECIPES, "cached")
+    assert len(counts) == 1
+
+    client.post("/recipes_sections", json={"recipe_name": "plain rice"})
+    assert pagination(client, count="cached", offset=10) == (RECIPES + 1, "exact")
+    assert len(counts) == 2
+
+
+def test_cached_counts_are_kept_per_filter(client, monkeypatch):
+    name = client.get("/recipes_sections/7").json()["recipe_name"]
+    counts = count_queries(monkeypatch)
+    total_count, _ = pagination(client, count="cached", filter_by=name)
+    assert pagination(client, count="cached", filter_by=name, offset=0) == (total_count, "cached")
+    assert pagination(client, count="cached") == (RECIPES, "exact")
+    assert counts == [{"recipe_name": name}, {}]
+
+
+def test_approximate_counts_skip_count_queries(client, monkeypatch):
+    counts = count_queries(monkeypatch)
+    total_count, total_count_type = pagination(client, count="approximate")
+    assert total_count_type == "approximate"
+    # SQLite estimates from the largest rowid.
+    assert total_count == RECIPES
+    assert counts == []
+
+    # There is no estimate for a filter; the count is cached instead.
+    name = client.get("/recipes_sections/7").json()["recipe_name"]
+    assert pagination(client, count="approximate", filter_by=name)[1] == "exact"
+    assert pagination(client, count="approximate", filter_by=name, offset=0)[1] == "cached"
+
+
+def test_single_query_counts_come_with_the_page(client, monkeypatch):
+    counts = count_queries(monkeypatch)
+    assert pagination(client, count="single_query") == (RECIPES, "exact")
+    assert counts == []
+
+
+def test_unknown_count_strategies_are_rejected(client):
+    assert client.get("/recipes_sections", params={"count": "guess"}).status_code == 422
@@ -0,0 +1,132 @@
+import csv
+import io
+import json
+from decimal import Decimal
+
+from app.services import recipe_export, recipe_import, recipe_serializer
+from app.services.service_factory import ServiceFactory
+from benchmarks import fixtures
+from tests.conftest import RECIPES
+
+
+def test_ndjson_export_encodes_rows_like_the_api(client):
+    response = client.get("/recipes_sections/export")
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["recipe_id"] for row in rows] == list(range(1, RECIPES + 1))
+
+    recipe = client.get("/recipes_sections/7").json()
+    for field in ("recipe_name", "rating", "create_time", "ingredient_id", "cooking_time"):
+        assert rows[6][field] == recipe[field]
+
+
+def test_csv_export_has_a_header_and_every_recipe(client):
+    response = client.get("/recipes_sections/export", params={"format": "csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"] == "attachment; filename=recipes.csv"
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert list(rows[0]) == recipe_export.export_columns()
+    assert [int(row["recipe_id"]) for row in rows] == list(range(1, RECIPES + 1))
+    assert rows[6]["recipe_name"] == client.get("/recipes_sections/7").json()["recipe_name"]
+
+
+def test_export_projects_the_requested_fields(client):
+    fields = "recipe_name,recipe_id,recipe_name"
+    lines = client.get("/recipes_sections/export", params={"fields": fields}).text.splitlines()
+    assert len(lines) == RECIPES
+    assert set(json.loads(lines[0])) == {"recipe_id", "recipe_name"}
+
+    body = client.get("/recipes_sections/export", params={"fields": fields, "format": "csv"}).text
+    assert body.splitlines()[0] == "recipe_name,recipe_id"
+    assert client.get("/recipes_sections/export", params={"fields": "secret"}).status_code == 400
+
+
+def test_export_encodes_mysql_types_like_the_api():
+    # MySQL returns DECIMAL columns as Decimal, which SQLite never does.
+    row = {"recipe_id": 7, "rating": Decimal("4.5"), "comment": None}
+    assert b"".join(recipe_export.iter_ndjson([row])) == recipe_serializer.dumps(row) + b"\n"
+    assert json.loads(b"".join(recipe_export.iter_ndjson([row])))["rating"] == 4.5
+    csv_body = b"".join(recipe_export.iter_csv([row], ["recipe_id", "rating", "comment"]))
+    assert csv_body.decode().splitlines() == ["recipe_id,rating,comment", "7,4.5,"]
+
+
+def test_export_fails_before_the_response_starts(client, monkeypatch):
+    data_service = ServiceFactory.get_service("RecipeResourceDataService")
+
+    def stream_data(*args, **kwargs):
+        raise RuntimeError("connection lost")
+        yield
+
+    monkeypatch.setattr(data_service, "stream_data", stream_data)
+    assert client.get("/recipes_sections/export").status_code == 500
+    assert client.get("/recipes_sections/export", params={"format": "csv"}).status_code == 500
+
+
+def ndjson(*rows) -> bytes:
+    return b"".join(row if isinstance(row, bytes) else json.dumps(row).encode() + b"\n" for row in rows)
+
+
+def test_import_reports_bad_lines_and_inserts_the_rest(client):
+    body = ndjson({"recipe_name": "zucchini bread"}, b"not json\n", {"recipe_name": "zucchini soup",
+                                                                    "rating": "high"},
+                  b"\n", {"recipe_name": "zucchini fritters", "recipe_id": 1})
+    response = client.post("/recipes_sections/import", content=body, params={"batch_size": 1})
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert (report["lines_read"], report["rows_imported"], report["rows_failed"]) == (5, 2, 2)
+    assert [error["line"] for error in report["errors"]] == [2, 3]
+    assert report["last_committed_line"] == 5
+
+    hits = client.get("/recipes_sections", params={"q": "zucchini"}).json()["data"]
+    assert sorted(recipe["recipe_name"] for recipe in hits) == ["zucchini bread", "zucchini fritters"]
+    # Keys come from the allocator, not the file.
+    assert all(recipe["recipe_id"] > RECIPES for recipe in hits)
+
+
+def test_import_resumes_after_start_line(client):
+    body = ndjson(*({"recipe_name": f"zucchini {index}"} for index in range(5)))
+    report = client.post("/recipes_sections/import", content=body, params={"start_line": 3}).json()
+    assert (report["rows_imported"], report["last_committed_line"]) == (2, 5)
+    hits = client.get("/recipes_sections", params={"q": "zucchini"}).json()["data"]
+    assert sorted(recipe["recipe_name"] for recipe in hits) == ["zucchini 3", "zucchini 4"]
+
+
+def test_line_buffer_joins_lines_split_across_chunks():
+    buffer = recipe_import.LineBuffer()
+    assert buffer.feed(b'{"a": 1}\n{"a"') == [b'{"a": 1}']
+    assert buffer.feed(b': 2}\n{"a": 3}') == [b'{"a": 2}']
+    assert buffer.flush() == [b'{"a": 3}']
+    assert buffer.flush() == []
+
+
+def test_importer_writes_a_checkpoint_after_every_batch(tmp_path):
+    batches, reports = [], []
+
+    def insert(rows):
+        batches.append([row["recipe_name"] for row in rows])
+        return [{"status": "created", "recipe_id": index} for index, _ in enumerate(rows)]
+
+    checkpoint = str(tmp_path / "import.checkpoint")
+    importer = recipe_import.RecipeImporter(insert, batch_size=2, checkpoint_path=checkpoint,
+                                            progress=lambda report: reports.append(report["last_committed_line"]))
+    lines = ndjson(*({"recipe_name": str(index)} for index in range(5))).splitlines()
+    report = importer.import_lines(lines)
+    assert batches == [["0", "1"], ["2", "3"], ["4"]]
+    assert reports == [2, 4, 5]
+    assert report["rows_imported"] == 5
+    assert recipe_import.read_checkpoint(checkpoint) == 5
+
+
+def test_import_command_loads_a_file(services, tmp_path):
+    fixtures.seed_database(ServiceFactory.get_service("RecipeResourceDataService"), 3)
+    path = tmp_path / "recipes.ndjson"
+    path.write_bytes(ndjson(*({"recipe_name": f"zucchini {index}"} for index in range(4))))
+    checkpoint = str(tmp_path / "import.checkpoint")
+    assert recipe_import.main([str(path), "--checkpoint", checkpoint, "--batch-size", "3"]) == 0
+    assert recipe_import.read_checkpoint(checkpoint) == 4
+
+    # Run again with the checkpoint: nothing left to import.
+    assert recipe_import.main([str(path), "--checkpoint", checkpoint]) == 0
+    data_service = ServiceFactory.get_service("RecipeResourceDataService")
+    assert data_service.get_total_count(fixtures.DATABASE, fixtures.TABLE) == 7
@@ -0,0 +1,93 @@
+from app.services.service_factory import ServiceFactory
+from tests.conftest import RECIPES
+
+
+def record_columns(monkeypatch, method: str) -> list:
+    """
+    Record the columns argument of every call to a data service method.
+    """
+    data_service = ServiceFactory.get_service("RecipeResourceDataService")
+    original = getattr(data_service, method)
+    columns = []
+
+    def recording(*args, **kwargs):
+        columns.append(kwargs.get("columns"))
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(data_service, method, recording)
+    return columns
+
+
+def test_list_pages_read_only_the_requested_columns(client, monkeypatch):
+    columns = record_columns(monkeypatch, "get_paginated_data")
+    response = client.get("/recipes_sections", params={"fields": "rating,recipe_name", "limit": 5})
+    assert response.status_code == 200, response.text
+    assert columns == [["recipe_id", "rating", "recipe_name"]]
+    for recipe in response.json()["data"]:
+        assert list(recipe) == ["recipe_id", "rating", "recipe_name", "links"]
+
+
+def walk_cursor_pages(client, **params) -> list:
+    ids, cursor = [], None
+    while True:
+        response = client.get("/recipes_sections", params=dict(params, paging="cursor", limit=7,
+                                                               **({"cursor": cursor} if cursor else {})))
+        if response.status_code == 404:
+            return ids
+        assert response.status_code == 200, response.text
+        ids += [recipe["recipe_id"] for recipe in response.json()["data"]]
+        cursor = response.json()["pagination"]["next_cursor"]
+        if not cursor:
+            return ids
+
+
+def test_cursor_pages_read_only_the_requested_columns(client, monkeypatch):
+    columns = record_columns(monkeypatch, "get_keyset_data")
+    response = client.get("/recipes_sections", params={"fields": "recipe_name", "paging": "cursor", "limit": 5,
+                                                       "sort_by": "rating"})
+    assert response.status_code == 200, response.text
+    # The data service adds the sort column, which the cursor needs, but it is not returned.
+    assert columns == [["recipe_id", "recipe_name"]]
+    assert response.json()["pagination"]["next_cursor"]
+    assert set(response.json()["data"][0]) == {"recipe_id", "recipe_name", "links"}
+
+
+def test_projected_cursor_pages_cover_every_recipe(client):
+    ids = walk_cursor_pages(client, fields="recipe_name", sort_by="rating", order="desc")
+    assert sorted(ids) == list(range(1, RECIPES + 1))
+
+
+def test_projected_replica_cursor_pages_cover_every_recipe(replica_client):
+    ids = walk_cursor_pages(replica_client, fields="recipe_name", sort_by="rating", order="desc")
+    assert sorted(ids) == list(range(1, RECIPES + 1))
+
+
+def test_partial_recipes_are_not_cached(client, monkeypatch):
+    columns = record_columns(monkeypatch, "get_data_object")
+    recipe = client.get("/recipes_sections/7", params={"fields": "recipe_name"}).json()
+    assert set(recipe) == {"recipe_id", "recipe_name", "links"}
+    assert columns == [["recipe_id", "recipe_name"]]
+
+    full = client.get("/recipes_sections/7").json()
+    assert full["recipe_name"] == recipe["recipe_name"] and "content" in full
+    assert columns[1] is None
+
+    # A cached full recipe is projected without reading again.
+    assert set(client.get("/recipes_sections/7", params={"fields": "rating"}).json()) == \
+        {"recipe_id", "rating", "links"}
+    assert len(columns) == 2
+
+
+def test_replica_pages_are_projected(replica_client):
+    response = replica_client.get("/recipes_sections", params={"fields": "pictures", "limit": 3})
+    assert response.status_code == 200, response.text
+    assert all(set(recipe) == {"recipe_id", "pictures", "links"} for recipe in response.json()["data"])
+    recipe = replica_client.get("/recipes_sections/7", params={"fields": "cooking_time"}).json()
+    assert set(recipe) == {"recipe_id", "cooking_time", "links"}
+
+
+def test_unknown_fields_are_rejected(client):
+    for path in ("/recipes_sections", "/recipes_sections/7"):
+        response = client.get(path, params={"fields": "recipe_name,password"})
+        assert response.status_code == 400
+        assert "password" in response.json()["detail"]
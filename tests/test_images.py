@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+import io
+import os
+import time
+
+import pytest
+from PIL import Image
+
+from app.services.image_derivatives import picture_name, render_derivatives, variant_name
+from app.services.image_upload import ImageUploader, UploadTooLargeError, image_extension
+from app.services.service_factory import ServiceFactory
+from benchmarks import fixtures
+from framework.services.storage.LocalStorageBackend import LocalStorageBackend
+from tests.conftest import open_client
+
+
+def wait_for_job(client, job: dict, timeout: float = 30.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f"/upload/jobs/{job['id']}").json()
+        if job["status"] in ("done", "failed") or time.monotonic() > deadline:
+            return job
+        time.sleep(0.05)
+
+
+def test_recipe_etag_changes_once_the_variants_exist(client):
+    # Stored without going through /upload, so its variants do not exist yet.
+    data = fixtures.make_image(1)
+    name = hashlib.sha256(data).hexdigest() + ".jpg"
+    ServiceFactory.get_service("ImageStorage").write_bytes(name, data, "image/jpeg")
+    response = client.post("/recipes_sections", json={"recipe_name": "plain rice", "pictures": name})
+    path = f"/recipes_sections/{response.json()['recipe_id']}?picture_size=thumb"
+
+    response = client.get(path)
+    assert response.json()["pictures"].endswith(name)
+    etag = response.headers["etag"]
+    assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+
+    job = client.post(f"/upload/{name}/derivatives").json()
+    assert wait_for_job(client, job)["status"] == "done"
+    response = client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["pictures"].endswith(variant_name(name, "thumb"))
+    assert response.headers["etag"] != etag
+
+
+def stored_files(root) -> list:
+    return sorted(name for _, _, names in os.walk(root) for name in names)
+
+
+def test_multipart_upload_stores_the_image_under_its_hash(client):
+    data = fixtures.make_image(2)
+    digest = hashlib.sha256(data).hexdigest()
+    response = client.post("/upload", files={"image": ("../../holiday.JPEG", data, "image/jpeg")})
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["name"], result["sha256"], result["size"]) == (digest + ".jpg", digest, len(data))
+    assert not result["deduplicated"]
+    assert ServiceFactory.get_service("ImageStorage").read(result["name"]) == data
+    assert result["derivatives_job"]["status"] in ("queued", "running", "done")
+
+
+def test_stream_upload_of_a_stored_image_is_deduplicated(client):
+    data = fixtures.make_image(3)
+    first = client.post("/upload/stream", content=data, params={"filename": "a.jpg"}).json()
+    assert wait_for_job(client, first["derivatives_job"])["status"] == "done"
+
+    second = client.post("/upload/stream", content=data, headers={"content-type": "image/jpeg"}).json()
+    assert second["name"] == first["name"] and second["deduplicated"]
+    # The variants exist, so no new job.
+    assert second["derivatives_job"] is None
+
+    # Announcing the hash skips the transfer.
+    skipped = client.post("/upload/stream", content=b"", params={"sha256": first["sha256"], "filename": "a.jpg"})
+    assert (skipped.json()["name"], skipped.json()["size"]) == (first["name"], None)
+
+
+def test_checksum_mismatch_stores_nothing(client):
+    storage = ServiceFactory.get_service("ImageStorage")
+    response = client.post("/upload/stream", content=fixtures.make_image(4),
+                           params={"sha256": "0" * 64, "filename": "a.jpg"})
+    assert response.status_code == 400
+    assert stored_files(storage.root) == []
+
+
+def test_oversized_uploads_are_aborted(tmp_path):
+    storage = LocalStorageBackend(dict(root=str(tmp_path)))
+
+    async def chunks():
+        for _ in range(4):
+            yield b"x" * 100
+
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(ImageUploader(storage, max_bytes=250).upload(chunks(), filename="a.png"))
+    assert stored_files(tmp_path) == []
+
+
+def test_image_extension_only_trusts_known_types():
+    assert image_extension("../../photo.JPEG", None) == ".jpg"
+    assert image_extension("photo.exe", "image/png; charset=binary") == ".png"
+    assert image_extension(None, "text/html") == ""
+
+
+def test_variants_fit_their_box_and_carry_no_metadata():
+    image = Image.new("RGBA", (2000, 1000), (255, 0, 0, 0))
+    source = io.BytesIO()
+    exif = Image.Exif()
+    exif[0x010F] = "Camera maker"
+    image.save(source, format="PNG", exif=exif)
+
+    variants = render_derivatives(source.getvalue(), {"thumb": (320, 320), "medium": (1024, 1024)})
+    sizes = {}
+    for variant, data in variants.items():
+        with Image.open(io.BytesIO(data)) as rendered:
+            assert rendered.format == "JPEG" and rendered.mode == "RGB"
+            assert not rendered.getexif()
+            # Transparent pixels are flattened onto white.
+            assert rendered.getpixel((10, 10)) >= (250, 250, 250)
+            sizes[variant] = rendered.size
+    assert sizes == {"thumb": (320, 160), "medium": (1024, 512)}
+
+
+def test_picture_name_serves_the_original_until_the_variants_exist():
+    name = "a" * 64 + ".png"
+    assert picture_name(name, "thumb") == "a" * 64 + "_thumb.jpg"
+    assert picture_name(name, "thumb", ready=lambda _: False) == name
+    assert picture_name(name, "original") == name
+    # Not stored by /upload, so it has no variants.
+    assert picture_name("https://example.com/soup.jpg", "thumb") == "https://example.com/soup.jpg"
+
+
+def test_derivative_jobs_report_failures(client):
+    name = hashlib.sha256(b"not an image").hexdigest() + ".jpg"
+    ServiceFactory.get_service("ImageStorage").write_bytes(name, b"not an image")
+    job = wait_for_job(client, client.post(f"/upload/{name}/derivatives").json())
+    assert job["status"] == "failed" and job["error"]
+    assert job["finished_at"] is not None
+
+    assert client.post("/upload/holiday.jpg/derivatives").status_code == 400
+    assert client.post(f"/upload/{'0' * 64}.jpg/derivatives").status_code == 404
+    assert client.get("/upload/jobs/unknown").status_code == 404
+
+
+def test_a_full_derivative_queue_pushes_back(services):
+    services("ImageDerivativeQueue", kwargs=dict(context=dict(max_pending=0)))
+    with open_client() as client:
+        data = fixtures.make_image(5)
+        # The upload itself succeeds; its variants can be requested later.
+        result = client.post("/upload/stream", content=data, params={"filename": "a.jpg"}).json()
+        assert result["derivatives_job"] is None
+
+        response = client.post(f"/upload/{result['name']}/derivatives")
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "5"
@@ -0,0 +1,81 @@
+from framework.services.search.InvertedIndex import InvertedIndex, tokenize
+
+RECIPES = {
+    1: {"recipe_name": "Tomato soup", "content": "Simmer the tomatoes with garlic."},
+    2: {"recipe_name": "Garlic bread", "content": "Toast the bread, rub with garlic and butter."},
+    3: {"recipe_name": "Crème brûlée", "content": "Bake the custard, then burn the sugar on top."},
+    4: {"recipe_name": "Pasta", "content": "Boil the pasta; a tomato sauce goes well."},
+}
+
+
+def make_index(**kwargs) -> InvertedIndex:
+    index = InvertedIndex({"recipe_name": 2.0, "content": 1.0}, **kwargs)
+    index.rebuild(RECIPES.items())
+    return index
+
+
+def doc_ids(index, query, **kwargs):
+    hits, _ = index.search(query, **kwargs)
+    return [doc_id for doc_id, _ in hits]
+
+
+def test_tokenize_folds_case_and_accents():
+    assert tokenize("Crème Brûlée, 2x!") == ["creme", "brulee", "2x"]
+    assert tokenize(None) == []
+
+
+def test_matches_in_the_name_rank_first():
+    # Both mention tomatoes; recipe 1 in its heavier weighted name.
+    assert doc_ids(make_index(), "tomato") == [1, 4]
+    hits, total_count = make_index().search("garlic")
+    assert total_count == 2
+    assert hits[0][0] == 2 and hits[0][1] > hits[1][1]
+
+
+def test_prefixes_match_at_a_discount():
+    index = make_index()
+    assert doc_ids(index, "brul") == [3]
+    # "tomato" is a term and a prefix of "tomatoes", recipe 4 only has the term.
+    exact, _ = index.search("tomatoes")
+    prefix, _ = index.search("tomatoe")
+    assert [doc_id for doc_id, _ in exact] == [doc_id for doc_id, _ in prefix] == [1]
+    assert prefix[0][1] < exact[0][1]
+    # Too short to expand.
+    assert doc_ids(index, "t") == []
+
+
+def test_pages_are_stable():
+    index = make_index()
+    hits, total_count = index.search("the", limit=100)
+    assert total_count == 4
+    assert doc_ids(index, "the", offset=1, limit=2) == [doc_id for doc_id, _ in hits[1:3]]
+
+
+def test_documents_are_replaced_and_removed():
+    index = make_index()
+    index.add(4, {"recipe_name": "Pesto pasta", "content": "Basil, pine nuts and garlic."})
+    # Recipes 1 and 4 score the same; ties go to the smaller doc_id.
+    assert doc_ids(index, "garlic") == [2, 1, 4]
+    assert doc_ids(index, "tomato") == [1]
+    index.remove(2)
+    assert 2 not in doc_ids(index, "garlic")
+    assert doc_ids(index, "bread") == []
+    assert index.stats()["documents"] == 3
+
+
+def test_updates_before_the_first_rebuild_are_ignored():
+    index = InvertedIndex({"recipe_name": 1.0})
+    index.add(1, {"recipe_name": "soup"})
+    assert not index.loaded and len(index) == 0
+
+
+def test_rebuild_replays_changes_made_while_it_read():
+    index = InvertedIndex({"recipe_name": 2.0, "content": 1.0})
+    index.begin_rebuild()
+    # Written while the rebuild was reading the table: one recipe is gone, one is new.
+    index.remove(1)
+    index.add(5, {"recipe_name": "Tomato salad"})
+    index.rebuild(RECIPES.items())
+    assert index.loaded
+    assert doc_ids(index, "tomato") == [5, 4]
+    assert len(index) == 4
@@ -0,0 +1,64 @@
+import pytest
+
+from framework.utils import metrics
+
+
+def test_counters_render_per_label_set():
+    registry = metrics.Registry()
+    requests = metrics.counter("requests_total", "Requests.", ["method", "status"], registry=registry)
+    requests.labels("GET", 200).inc()
+    requests.labels("GET", "200").inc(2)
+    requests.labels("POST", 'a"b').inc()
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{method="GET",status="200"} 3',
+        'requests_total{method="POST",status="a\\"b"} 1',
+    ]
+    with pytest.raises(ValueError):
+        requests.labels("GET")
+    with pytest.raises(ValueError):
+        metrics.counter("requests_total", "Again.", registry=registry)
+
+
+def test_histograms_render_cumulative_buckets():
+    registry = metrics.Registry()
+    latency = metrics.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0), registry=registry)
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value)
+    assert registry.render().splitlines()[2:] == [
+        'latency_seconds_bucket{le="0.1"} 2',
+        'latency_seconds_bucket{le="1"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        "latency_seconds_sum 3.65",
+        "latency_seconds_count 4",
+    ]
+
+
+def test_collectors_run_on_every_scrape():
+    registry = metrics.Registry()
+    calls = []
+
+    def collect():
+        calls.append(1)
+        yield "pool_connections", "gauge", "Connections.", [({"state": "idle"}, len(calls))]
+
+    registry.add_collector(collect)
+    registry.render()
+    assert 'pool_connections{state="idle"} 2' in registry.render()
+
+
+def test_metrics_endpoint_counts_requests_by_route(client):
+    for path in ("/recipes_sections/7", "/recipes_sections/8", "/recipes_sections/99999", "/nowhere"):
+        client.get(path)
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == metrics.CONTENT_TYPE
+    body = response.text
+    route = 'method="GET",route="/recipes_sections/{recipe_id}"'
+    assert f'http_request_duration_seconds_count{{{route},status="200"}}' in body
+    assert f'http_request_duration_seconds_count{{{route},status="404"}}' in body
+    assert 'route="unmatched",status="404"' in body
+    assert 'cache_lookups_total{cache="RecipeCache",result="miss"}' in body
+    assert 'db_query_duration_seconds_count{method="get_data_object"}' in body
+    assert 'db_rows_returned_count{method="get_data_object"}' in body
@@ -0,0 +1,92 @@
+import pymysql
+import pytest
+
+from framework.services.data_access.MySQLRDBDataService import MySQLRDBDataService
+
+
+class FakeCursor:
+    """
+    Stands in for a pymysql cursor; every statement fails as if the server had gone away.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, sql_statement, params=None):
+        self.connection.statements.append(sql_statement)
+        raise pymysql.err.OperationalError(2006, "MySQL server has gone away")
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class FakeConnection:
+    open = True
+
+    def __init__(self):
+        self.statements = []
+
+    def cursor(self, cursor_class=None):
+        return FakeCursor(self)
+
+    def ping(self, reconnect=False):
+        pass
+
+    def commit(self):
+        pass
+
+    def close(self):
+        self.open = False
+
+
+@pytest.fixture
+def data_service(monkeypatch):
+    service = MySQLRDBDataService(dict(pool_min_size=0, pool_max_size=2))
+    monkeypatch.setattr(service, "_connect", FakeConnection)
+    yield service
+    service.close()
+
+
+def test_failed_page_queries_raise(data_service):
+    # An empty page would read as the end of the table, or as "No recipes found".
+    with pytest.raises(pymysql.err.OperationalError):
+        data_service.get_paginated_data("recipe_management", "Recipe", limit=10)
+    with pytest.raises(pymysql.err.OperationalError):
+        data_service.get_keyset_data("recipe_management", "Recipe", key_field="recipe_id", limit=10,
+                                     after={"key": 10})
+    with pytest.raises(pymysql.err.OperationalError):
+        data_service.get_paginated_data_with_count("recipe_management", "Recipe", limit=10)
+
+
+def test_failed_reads_raise(data_service):
+    with pytest.raises(pymysql.err.OperationalError):
+        data_service.get_data_object("recipe_management", "Recipe", key_field="recipe_id", key_value="7")
+    with pytest.raises(pymysql.err.OperationalError):
+        data_service.get_data_objects("recipe_management", "Recipe", key_field="recipe_id", key_values=["7"])
+    with pytest.raises(pymysql.err.OperationalError):
+        data_service.get_total_count("recipe_management", "Recipe")
+
+
+def test_connections_go_back_to_the_pool_after_a_failure(data_service):
+    for _ in range(5):
+        with pytest.raises(pymysql.err.OperationalError):
+            data_service.get_paginated_data("recipe_management", "Recipe")
+    stats = data_service.get_pool_stats()
+    assert stats["in_use"] == 0
+    assert stats["created"] <= 2
+
+
+def test_id_leases_do_not_run_ddl(data_service, monkeypatch):
+    # IdBlocks comes from migrations/001_id_blocks.sql.
+    connections = []
+    monkeypatch.setattr(data_service, "_connect", lambda: connections.append(FakeConnection()) or connections[-1])
+    with pytest.raises(pymysql.err.OperationalError):
+        data_service.lease_id_block("recipe_management", "Recipe", "recipe_id", 100)
+    statements = [statement for connection in connections for statement in connection.statements]
+    assert statements and not [statement for statement in statements if "CREATE" in statement.upper()]
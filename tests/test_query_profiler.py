@@ -0,0 +1,63 @@
+import logging
+import time
+
+from framework.services.data_access.QueryProfiler import QueryProfiler, normalize_statement
+from tests.conftest import open_client
+
+
+class FakeCursor:
+    rowcount = 3
+
+    def execute(self, sql_statement, params=None):
+        return self.rowcount
+
+
+def test_statements_are_counted_by_their_normalized_form():
+    profiler = QueryProfiler(dict(summary_interval=0))
+    for key in range(5):
+        profiler.execute(None, FakeCursor(), "SELECT * FROM recipe_management.Recipe WHERE recipe_id=%s", (key,))
+    profiler.execute(None, FakeCursor(), "SELECT * FROM recipe_management.Recipe WHERE recipe_id IN (%s, %s)",
+                     (1, 2))
+
+    stats = profiler.get_stats(recent=10)
+    counts = {entry["statement"]: entry["count"] for entry in stats["statements"]}
+    assert counts == {"SELECT * FROM recipe_management.Recipe WHERE recipe_id=?": 5,
+                      "SELECT * FROM recipe_management.Recipe WHERE recipe_id IN (...)": 1}
+    assert len(stats["recent"]) == 6
+    assert stats["recent"][-1]["rows"] == 3
+    assert normalize_statement("VALUES (%s, %s), (%s, %s)") == "VALUES (...), ..."
+
+
+def test_summary_is_logged_without_queries(caplog):
+    profiler = QueryProfiler(dict(summary_interval=0.05))
+    try:
+        profiler.execute(None, FakeCursor(), "SELECT 1", None)
+        with caplog.at_level(logging.INFO, logger="framework.services.data_access.QueryProfiler"):
+            deadline = time.monotonic() + 5
+            while "Query profile" not in caplog.text and time.monotonic() < deadline:
+                time.sleep(0.01)
+    finally:
+        profiler.close()
+    assert "Query profile" in caplog.text
+    assert profiler._summary_thread is None
+
+
+def test_debug_queries_lists_the_app_statements(services):
+    services("RecipeQueryProfiler", enabled=True, kwargs=dict(context=dict(
+        slow_query_threshold=0, explain_slow_queries=True, summary_interval=0
+    )))
+    with open_client() as client:
+        client.get("/recipes_sections/7")
+        client.get("/recipes_sections/8")
+        stats = client.get("/debug/queries", params={"slow_only": True}).json()
+    assert stats["enabled"]
+    reads = [entry for entry in stats["statements"]
+             if entry["statement"] == "SELECT * FROM recipe_management.Recipe WHERE recipe_id=?"]
+    assert len(reads) == 1 and reads[0]["count"] == 2
+    # Explained once, the first time it was slow.
+    assert reads[0]["explain"]
+    assert any(entry["caller"].endswith(".get_data_object") for entry in stats["recent"])
+
+
+def test_debug_queries_is_off_by_default(client):
+    assert client.get("/debug/queries").json() == {"enabled": False}
@@ -0,0 +1,64 @@
+import datetime
+import json
+from decimal import Decimal
+
+from app.models.recipe import Pagination, PaginatedRecipeResponse, RecipeSection
+from app.services import recipe_serializer
+
+ROW = {"recipe_id": 7, "recipe_name": "Crème brûlée \"deluxe\"", "user_id": 5, "content": "Bake.\nBurn.",
+       "rating": 4.5, "cuisine_id": 2, "ingredient_id": "1, 2", "comment": None, "cooking_time": 40,
+       "create_time": "2024-05-01 12:00:00", "pictures": "a.jpg"}
+
+
+def test_recipes_encode_like_the_model():
+    body = recipe_serializer.encode_recipe(ROW, recipe_serializer.DETAIL_LINKS)
+    expected = RecipeSection(**ROW, links=[
+        {"rel": "self", "href": "/recipes_sections/7", "method": "GET"},
+        {"rel": "update", "href": "/recipes_sections/7", "method": "PUT"},
+        {"rel": "delete", "href": "/recipes_sections/7", "method": "DELETE"},
+        {"rel": "comments", "href": "/recipes_sections/7/comments", "method": "GET"},
+    ])
+    assert json.loads(body) == expected.model_dump()
+    assert RecipeSection.model_validate_json(body) == expected
+
+
+def test_string_ids_are_escaped_in_links():
+    links = recipe_serializer.LinkTemplate([("self", "/recipes_sections/{id}", "GET")])
+    assert json.loads(links.render('7"x')) == [{"rel": "self", "href": '/recipes_sections/7"x', "method": "GET"}]
+    assert links.render(12) == b'[{"rel":"self","href":"/recipes_sections/12","method":"GET"}]'
+
+
+def test_sparse_fieldsets_always_include_the_id():
+    fields = recipe_serializer.output_fields(["rating", "pictures"])
+    assert fields == ("recipe_id", "rating", "pictures")
+    assert recipe_serializer.output_fields(None) == recipe_serializer.RECIPE_FIELDS
+
+    body = recipe_serializer.encode_recipe(ROW, recipe_serializer.LIST_LINKS, lambda name: "https://cdn/" + name,
+                                           fields)
+    recipe = json.loads(body)
+    assert list(recipe) == ["recipe_id", "rating", "pictures", "links"]
+    assert recipe["pictures"] == "https://cdn/a.jpg"
+    assert ROW["pictures"] == "a.jpg"
+
+
+def test_pages_validate_against_the_response_model():
+    pagination = Pagination(offset=0, limit=2, total_count=10, total_count_type="cached")
+    body = recipe_serializer.encode_page([ROW, dict(ROW, recipe_id=8)], pagination, recipe_serializer.LIST_LINKS)
+    page = PaginatedRecipeResponse.model_validate_json(body)
+    assert [recipe.recipe_id for recipe in page.data] == [7, 8]
+    assert page.pagination == pagination
+
+    body = recipe_serializer.encode_page([], pagination, recipe_serializer.LIST_LINKS)
+    assert json.loads(body)["data"] == []
+
+
+def test_database_types_encode_with_and_without_orjson(monkeypatch):
+    value = {"rating": Decimal("4.5"), "create_time": datetime.datetime(2024, 5, 1, 12), "name": b"soup",
+             "text": "crème"}
+    expected = {"rating": 4.5, "create_time": "2024-05-01T12:00:00", "name": "soup", "text": "crème"}
+    assert json.loads(recipe_serializer.dumps(value)) == expected
+
+    monkeypatch.setattr(recipe_serializer, "orjson", None)
+    body = recipe_serializer.dumps(value)
+    assert json.loads(body) == expected
+    assert b" " not in body and "crème".encode() in body
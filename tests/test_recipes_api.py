@@ -0,0 +1,215 @@
+import time
+import warnings
+
+from app.services.service_factory import ServiceFactory
+from benchmarks import fixtures
+from framework.utils.cursor import encode_cursor
+from tests.conftest import RECIPES, open_client
+
+
+def count_reads(monkeypatch, during_read=None):
+    """
+    Count get_data_object() calls on the database; during_read(key) runs while each one is
+    in flight.
+    """
+    data_service = ServiceFactory.get_service("RecipeResourceDataService")
+    get_data_object = data_service.get_data_object
+    reads = []
+
+    def counting(*args, **kwargs):
+        reads.append(kwargs["key_value"])
+        if during_read is not None:
+            during_read(kwargs["key_value"])
+        return get_data_object(*args, **kwargs)
+
+    monkeypatch.setattr(data_service, "get_data_object", counting)
+    return reads
+
+
+def slowed_down(method, seconds: float = 0.2):
+    def slow(*args, **kwargs):
+        time.sleep(seconds)
+        return method(*args, **kwargs)
+    return slow
+
+
+def walk_pages(client, **params):
+    """
+    :return: The recipes of every offset page, in order.
+    """
+    recipes, offset = [], 0
+    while True:
+        response = client.get("/recipes_sections", params=dict(params, offset=offset, limit=7))
+        if response.status_code == 404:
+            return recipes
+        assert response.status_code == 200, response.text
+        recipes += response.json()["data"]
+        offset += 7
+
+
+def test_get_recipe_is_cached(client, monkeypatch):
+    reads = count_reads(monkeypatch)
+    for _ in range(3):
+        response = client.get("/recipes_sections/7")
+        assert response.status_code == 200
+        assert response.json()["recipe_id"] == 7
+    assert reads == ["7"]
+
+
+def test_delete_invalidates_every_spelling_of_the_key(client):
+    assert client.get("/recipes_sections/007").status_code == 200
+    assert client.get("/recipes_sections/7").status_code == 200
+
+    assert client.delete("/recipes_sections/7").status_code == 200
+    assert client.get("/recipes_sections/007").status_code == 404
+    assert client.get("/recipes_sections/7").status_code == 404
+
+
+def test_etag_is_not_modified_until_the_recipe_is_deleted(client):
+    etag = client.get("/recipes_sections/7").headers["etag"]
+    assert client.get("/recipes_sections/007", headers={"If-None-Match": etag}).status_code == 304
+
+    client.delete("/recipes_sections/007")
+    assert client.get("/recipes_sections/7", headers={"If-None-Match": etag}).status_code == 404
+
+
+def test_read_racing_a_write_is_not_cached(client, monkeypatch):
+    resource = ServiceFactory.get_service("RecipeResource")
+    writes = []
+
+    def write_once(key):
+        if not writes:
+            writes.append(key)
+            resource.invalidate(key)
+
+    reads = count_reads(monkeypatch, during_read=write_once)
+    assert client.get("/recipes_sections/7").status_code == 200
+    # The first result may predate the write, so the second request reads again.
+    assert client.get("/recipes_sections/7").status_code == 200
+    assert client.get("/recipes_sections/7").status_code == 200
+    assert reads == ["7", "7"]
+
+
+def test_failed_read_is_not_cached_as_missing(client, monkeypatch):
+    data_service = ServiceFactory.get_service("RecipeResourceDataService")
+    get_data_object = data_service.get_data_object
+
+    def failing(*args, **kwargs):
+        raise RuntimeError("connection lost")
+
+    monkeypatch.setattr(data_service, "get_data_object", failing)
+    assert client.get("/recipes_sections/7").status_code == 500
+    monkeypatch.setattr(data_service, "get_data_object", get_data_object)
+    assert client.get("/recipes_sections/7").status_code == 200
+
+
+def test_total_count_follows_creates_and_deletes(client):
+    def total_count():
+        return client.get("/recipes_sections", params={"limit": 1}).json()["pagination"]["total_count"]
+
+    assert total_count() == RECIPES
+    response = client.post("/recipes_sections", json={"recipe_name": "plain rice", "content": "Boil the rice."})
+    assert response.status_code == 201, response.text
+    assert total_count() == RECIPES + 1
+    client.delete(f"/recipes_sections/{response.json()['recipe_id']}")
+    assert total_count() == RECIPES
+
+
+def test_replica_miss_reads_the_database(replica_client):
+    # Written behind the app's back, as by another worker the replica has not heard from yet.
+    data_service = ServiceFactory.get_service("RecipeResourceDataService")
+    recipe = dict(fixtures.make_recipes(1, seed=1)[0], recipe_id=RECIPES + 100)
+    data_service.create_data_objects(fixtures.DATABASE, fixtures.TABLE, [recipe])
+
+    response = replica_client.get(f"/recipes_sections/{RECIPES + 100}")
+    assert response.status_code == 200
+    assert response.json()["recipe_name"] == recipe["recipe_name"]
+
+    response = replica_client.get("/recipes_sections/multi", params={"ids": f"3,{RECIPES + 100}"})
+    assert response.status_code == 200, response.text
+    assert [recipe["recipe_id"] for recipe in response.json()["data"]] == [3, RECIPES + 100]
+
+
+def test_replica_forgets_deleted_recipes(replica_client):
+    assert replica_client.get("/recipes_sections/7").status_code == 200
+    assert replica_client.delete("/recipes_sections/7").status_code == 200
+    assert replica_client.get("/recipes_sections/7").status_code == 404
+
+
+def test_offset_pages_sorted_by_a_non_unique_column_cover_every_recipe(client):
+    for order in ("asc", "desc"):
+        recipes = walk_pages(client, sort_by="rating", order=order)
+        keys = [recipe["recipe_id"] for recipe in recipes]
+        assert sorted(keys) == list(range(1, RECIPES + 1))
+        # Recipes with the same rating are ordered by key, in the same direction.
+        for previous, recipe in zip(recipes, recipes[1:]):
+            if previous["rating"] == recipe["rating"]:
+                assert (previous["recipe_id"] < recipe["recipe_id"]) == (order == "asc")
+
+
+def test_cursor_pages_cover_every_recipe(client):
+    keys, cursor = [], None
+    while True:
+        params = {"paging": "cursor", "limit": 7, "sort_by": "rating"}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/recipes_sections", params=params)
+        assert response.status_code == 200, response.text
+        keys += [recipe["recipe_id"] for recipe in response.json()["data"]]
+        cursor = response.json()["pagination"]["next_cursor"]
+        if cursor is None:
+            break
+    assert sorted(keys) == list(range(1, RECIPES + 1))
+
+
+def test_malformed_cursors_are_rejected(client):
+    cursors = [
+        "not a cursor",
+        encode_cursor({"sort": 3.5}),
+        encode_cursor({"key": 5, "sort": {"$gt": 1}}),
+        encode_cursor({"key": 5, "sort": [1, 2]}),
+        encode_cursor({"key": "5"}),
+        encode_cursor({"key": True}),
+        encode_cursor({"key": 5, "sort": "high"}),
+        encode_cursor({"key": 5, "sort": 3.5, "desc": "yes"}),
+    ]
+    for cursor in cursors:
+        response = client.get("/recipes_sections", params={"cursor": cursor, "sort_by": "rating"})
+        assert response.status_code == 400, (cursor, response.text)
+
+
+def test_page_bounds_are_validated(client):
+    for params in ({"limit": 0}, {"limit": -1}, {"limit": 100000}, {"offset": -5},
+                   {"paging": "cursor", "limit": 0}, {"q": "pasta", "limit": 0}):
+        response = client.get("/recipes_sections", params=params)
+        assert response.status_code == 422, (params, response.text)
+    response = client.get("/recipes_sections", params={"paging": "cursor", "limit": 1})
+    assert response.status_code == 200
+    assert len(response.json()["data"]) == 1
+
+
+def test_reads_that_time_out_are_retried_later(services, monkeypatch):
+    services("RecipeReadFlights", kwargs=dict(name="test_reads", timeout=0.05))
+    with open_client() as client:
+        data_service = ServiceFactory.get_service("RecipeResourceDataService")
+        for method in ("get_data_object", "get_paginated_data_with_count", "get_total_count"):
+            monkeypatch.setattr(data_service, method, slowed_down(getattr(data_service, method)))
+
+        for path in ("/recipes_sections/7", "/recipes_sections?limit=5"):
+            response = client.get(path)
+            assert response.status_code == 503, (path, response.text)
+            assert response.headers["retry-after"]
+
+
+def test_multi_get_keeps_the_order_and_lists_missing_recipes(client):
+    with warnings.catch_warnings():
+        # Serializer warnings, e.g. links that are not Link models, fail the request.
+        warnings.simplefilter("error")
+        response = client.get("/recipes_sections/multi", params={"ids": f"9,{RECIPES + 1},3,9"})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert [recipe and recipe["recipe_id"] for recipe in body["data"]] == [9, None, 3, 9]
+    assert body["missing"] == [RECIPES + 1]
+    assert body["data"][1] is None
+    assert {"rel": "self", "href": "/recipes_sections/3", "method": "GET"} in body["data"][2]["links"]
+    assert body["data"][0]["recipe_name"] == client.get("/recipes_sections/9").json()["recipe_name"]
@@ -0,0 +1,74 @@
+from app.services.service_factory import ServiceFactory
+from benchmarks import fixtures
+from tests.conftest import RECIPES
+
+
+def search_ids(client, **params):
+    response = client.get("/recipes_sections", params=dict(params, limit=100))
+    if response.status_code == 404:
+        return []
+    assert response.status_code == 200, response.text
+    return [recipe["recipe_id"] for recipe in response.json()["data"]]
+
+
+def write_behind_the_app(recipe=None, delete=None):
+    """
+    Write to the table directly and bump the table version, as another worker on the host does.
+    """
+    data_service = ServiceFactory.get_service("RecipeResourceDataService")
+    if recipe is not None:
+        data_service.create_data_objects(fixtures.DATABASE, fixtures.TABLE, [recipe])
+    if delete is not None:
+        data_service.delete_data_object(fixtures.DATABASE, fixtures.TABLE, "recipe_id", delete)
+    ServiceFactory.get_service("RecipeTableVersion").bump([(recipe or {}).get("recipe_id", delete)])
+
+
+def test_indexes_follow_writes_from_other_workers(client):
+    assert search_ids(client, q="pasta")
+    assert search_ids(client, q="zucchini") == []
+
+    key = RECIPES + 1
+    write_behind_the_app(dict(fixtures.make_recipes(1)[0], recipe_id=key, recipe_name="zucchini frittata",
+                              ingredient_id="999"))
+    assert search_ids(client, q="zucchini") == [key]
+    assert search_ids(client, ingredients="999") == [key]
+
+    write_behind_the_app(delete=key)
+    assert search_ids(client, q="zucchini") == []
+    assert search_ids(client, ingredients="999") == []
+
+
+def delete_unseen(*keys):
+    # Deleted without bumping the table version, so the indexes still list the recipes.
+    data_service = ServiceFactory.get_service("RecipeResourceDataService")
+    for key in keys:
+        data_service.delete_data_object(fixtures.DATABASE, fixtures.TABLE, "recipe_id", key)
+
+
+def test_search_pages_skip_recipes_deleted_behind_the_index(client):
+    assert search_ids(client, q="soup")
+    # The first hits, not read yet, so not cached either.
+    hits, total_count = ServiceFactory.get_service("RecipeSearchIndex").search("pasta", limit=3)
+    gone = [doc_id for doc_id, _ in hits[:2]]
+    assert total_count > 4
+
+    delete_unseen(*gone)
+    response = client.get("/recipes_sections", params={"q": "pasta", "limit": 3})
+    assert len(response.json()["data"]) == 3
+    assert response.json()["pagination"]["total_count"] == total_count - 2
+    assert not set(gone) & {recipe["recipe_id"] for recipe in response.json()["data"]}
+
+
+def test_ingredient_pages_skip_recipes_deleted_behind_the_index(client):
+    assert search_ids(client, q="soup")
+    ingredients = list(range(1, 21))
+    doc_ids, total_count = ServiceFactory.get_service("RecipeIngredientIndex").query(ingredients, match_all=False,
+                                                                                     limit=3)
+    assert total_count > 4
+
+    delete_unseen(*doc_ids[:2])
+    response = client.get("/recipes_sections", params={"ingredients": ",".join(map(str, ingredients)),
+                                                        "match": "any", "limit": 3})
+    assert len(response.json()["data"]) == 3
+    assert response.json()["pagination"]["total_count"] == total_count - 2
+    assert not set(doc_ids[:2]) & {recipe["recipe_id"] for recipe in response.json()["data"]}
@@ -0,0 +1,188 @@
+import asyncio
+
+import pytest
+
+from benchmarks import fixtures
+from framework.services.cache.BaseCache import MISSING, NOT_FOUND
+from framework.services.cache.SharedMemoryCache import SharedMemoryCache
+from framework.services.data_access.AsyncDataService import ExecutorDataService
+from framework.services.data_access.IdAllocator import BlockIdAllocator
+from framework.services.data_access.SQLiteDataService import SQLiteDataService
+from framework.utils.etag import ChangeCounter, SharedChangeCounter
+from framework.utils.singleflight import SingleFlight
+
+
+@pytest.fixture(params=["local", "shared"])
+def counter(request, tmp_path):
+    if request.param == "local":
+        yield ChangeCounter(slots=64, log_size=8)
+    else:
+        shared = SharedChangeCounter("changes", directory=str(tmp_path), slots=64, log_size=8)
+        yield shared
+        shared.close()
+
+
+def test_change_counter_versions_keys(counter):
+    assert counter.value == 0
+    assert counter.bump(["7", "8"]) == 1
+    assert counter.bump() == 2
+    assert counter.value == 2
+    assert counter.key_version("7") == counter.key_version("8") == 1
+    assert counter.bump([7]) == 3
+    assert counter.key_version("7") == 3
+
+
+def test_change_counter_logs_changed_keys(counter):
+    start = counter.value
+    counter.bump(["1", "2"])
+    middle = counter.value
+    counter.bump(["2", "3"])
+    assert counter.changes_since(start) == ["1", "2", "3"]
+    assert counter.changes_since(middle) == ["2", "3"]
+    assert counter.changes_since(counter.value) == []
+
+    counter.bump([str(key) for key in range(10, 20)])
+    # The log only holds the last 8 keys.
+    assert counter.changes_since(middle) is None
+    assert counter.changes_since(counter.value - 1) is None
+    counter.bump(["4"])
+    assert counter.changes_since(counter.value - 1) == ["4"]
+
+
+def test_shared_change_counter_is_shared_between_instances(tmp_path):
+    first = SharedChangeCounter("changes", directory=str(tmp_path), slots=64, log_size=8)
+    second = SharedChangeCounter("changes", directory=str(tmp_path), slots=64, log_size=8)
+    try:
+        first.bump(["7"])
+        assert second.value == 1
+        assert second.key_version("7") == 1
+        assert second.changes_since(0) == ["7"]
+        # A key too long to log leaves a gap, so the log cannot be replayed past it.
+        second.bump(["x" * 100])
+        assert first.changes_since(0) is None
+    finally:
+        first.close()
+        second.close()
+
+
+@pytest.fixture
+def shared_cache(tmp_path):
+    cache = SharedMemoryCache(dict(name="cache", directory=str(tmp_path), slots=16, ways=4, slot_size=256))
+    yield cache
+    cache.close()
+
+
+def test_shared_memory_cache_round_trip(shared_cache, tmp_path):
+    other = SharedMemoryCache(dict(name="cache", directory=str(tmp_path), slots=16, ways=4, slot_size=256))
+    try:
+        assert shared_cache.get(("7", "thumb@1")) is MISSING
+        shared_cache.set(("7", "thumb@1"), b"body")
+        shared_cache.set(("8", "thumb@1"), NOT_FOUND)
+        assert other.get(("7", "thumb@1")) == b"body"
+        assert other.get(("8", "thumb@1")) is NOT_FOUND
+        assert other.get(("7", "thumb@2")) is MISSING
+    finally:
+        other.close()
+
+
+def test_shared_memory_cache_invalidates_a_group(shared_cache):
+    shared_cache.set(("7", "thumb@1"), b"thumb")
+    shared_cache.set(("7", "large@1"), b"large")
+    shared_cache.set(("8", "thumb@1"), b"other")
+    shared_cache.invalidate("7")
+    assert shared_cache.get(("7", "thumb@1")) is MISSING
+    assert shared_cache.get(("7", "large@1")) is MISSING
+    assert shared_cache.get(("8", "thumb@1")) == b"other"
+
+
+def test_shared_memory_cache_skips_values_larger_than_a_slot(shared_cache):
+    shared_cache.set("7", b"small")
+    shared_cache.set("7", b"x" * 1000)
+    assert shared_cache.get("7") is MISSING
+    assert shared_cache.stats()["too_large"] == 1
+
+
+def test_shared_memory_cache_evicts_within_a_set(shared_cache):
+    for key in range(100):
+        shared_cache.set(str(key), str(key).encode())
+    stats = shared_cache.stats()
+    assert stats["entries"] <= 16
+    assert stats["evictions"] >= 100 - 16
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    async def run():
+        flights = SingleFlight("test")
+        calls = []
+
+        async def call():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return len(calls)
+
+        results = await asyncio.gather(*(flights.do("key", call) for _ in range(10)))
+        assert results == [1] * 10
+        # Nothing is cached once the call is done.
+        assert await flights.do("key", call) == 2
+        assert flights.get_stats()["saved"] == 9
+
+    asyncio.run(run())
+
+
+def test_single_flight_forget_starts_a_new_call():
+    async def run():
+        flights = SingleFlight("test")
+
+        async def call(value):
+            await asyncio.sleep(0.01)
+            return value
+
+        first = asyncio.ensure_future(flights.do("key", lambda: call("old")))
+        await asyncio.sleep(0)
+        flights.forget()
+        assert await flights.do("key", lambda: call("new")) == "new"
+        assert await first == "old"
+
+    asyncio.run(run())
+
+
+def test_single_flight_shares_errors_and_times_out():
+    async def run():
+        flights = SingleFlight("test", timeout=0.05)
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(*(flights.do("key", failing) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        with pytest.raises(asyncio.TimeoutError):
+            await flights.do("slow", lambda: asyncio.sleep(1))
+        assert flights.get_stats()["timeouts"] == 1
+
+    asyncio.run(run())
+
+
+def test_block_id_allocators_hand_out_disjoint_ids(tmp_path):
+    data_service = SQLiteDataService(dict(databases={fixtures.DATABASE: str(tmp_path / "recipes.db")}))
+    fixtures.seed_database(data_service, 5)
+    executor = ExecutorDataService(data_service, dict(executor_max_workers=2))
+    context = dict(database=fixtures.DATABASE, table=fixtures.TABLE, key_field="recipe_id", block_size=10)
+
+    async def run():
+        first, second = BlockIdAllocator(executor, context), BlockIdAllocator(executor, context)
+        ids = [await first.allocate() for _ in range(25)]
+        ids += [await second.allocate() for _ in range(25)]
+        ids += list(await first.allocate_range(30))
+        await first.close()
+        await second.close()
+        return ids
+
+    try:
+        ids = asyncio.run(run())
+    finally:
+        executor.close()
+        data_service.close()
+    assert len(set(ids)) == len(ids)
+    # Leased above the rows already in the table.
+    assert min(ids) > 5
@@ -0,0 +1,113 @@
+import logging
+import queue
+
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import Status, StatusCode
+
+from framework.middleware.correlation_id import CorrelationIdFilter, correlation_id_var
+from framework.utils.telemetry import DroppingQueueHandler, TailSamplingSpanProcessor
+
+
+def make_tracer(**kwargs):
+    exporter = InMemorySpanExporter()
+    processor = TailSamplingSpanProcessor(SimpleSpanProcessor(exporter), **kwargs)
+    provider = TracerProvider()
+    provider.add_span_processor(processor)
+    return provider.get_tracer(__name__), processor, exporter
+
+
+def run_trace(tracer, name: str, fail: bool = False):
+    with tracer.start_as_current_span(name):
+        with tracer.start_as_current_span(name + " query") as child:
+            if fail:
+                child.set_status(Status(StatusCode.ERROR))
+
+
+def exported(exporter) -> list:
+    return sorted(span.name for span in exporter.get_finished_spans())
+
+
+def test_fast_successful_traces_are_sampled_out():
+    tracer, processor, exporter = make_tracer(keep_ratio=0.0)
+    run_trace(tracer, "GET /recipes_sections")
+    assert exported(exporter) == []
+    assert processor.get_stats() == dict(kept=0, sampled_out=1, dropped_spans=0, pending_traces=0)
+
+
+def test_failed_and_slow_traces_are_kept_whole():
+    tracer, processor, exporter = make_tracer(keep_ratio=0.0)
+    run_trace(tracer, "GET /a", fail=True)
+    assert exported(exporter) == ["GET /a", "GET /a query"]
+
+    tracer, processor, exporter = make_tracer(keep_ratio=0.0, slow_threshold=0.0)
+    run_trace(tracer, "GET /b")
+    assert exported(exporter) == ["GET /b", "GET /b query"]
+    assert processor.get_stats()["kept"] == 1
+
+
+def test_keep_ratio_one_keeps_everything():
+    tracer, processor, exporter = make_tracer(keep_ratio=1.0)
+    for _ in range(3):
+        run_trace(tracer, "GET /c")
+    assert len(exporter.get_finished_spans()) == 6
+
+
+def test_held_traces_are_bounded():
+    tracer, processor, exporter = make_tracer(keep_ratio=1.0, max_traces=2, max_spans_per_trace=2)
+    roots = [tracer.start_span(f"root {index}") for index in range(3)]
+    for root in roots:
+        with tracer.start_as_current_span("parent", context=trace.set_span_in_context(root)):
+            pass
+    # The first trace was dropped to make room for the third.
+    stats = processor.get_stats()
+    assert (stats["pending_traces"], stats["dropped_spans"]) == (2, 1)
+
+    with tracer.start_as_current_span("big"):
+        for _ in range(4):
+            with tracer.start_as_current_span("child"):
+                pass
+    assert exported(exporter) == ["big", "child", "child"]
+    # Another held trace made room for it, and two children did not fit.
+    assert processor.get_stats()["dropped_spans"] == 4
+
+
+def test_full_log_queues_drop_records():
+    handler = DroppingQueueHandler(queue.Queue(2))
+    logger = logging.getLogger("tests.telemetry")
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        for index in range(5):
+            logger.error("record %d", index)
+    finally:
+        logger.removeHandler(handler)
+        logger.propagate = True
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_log_records_carry_the_request_correlation_id(client):
+    records = []
+
+    class Recorder(logging.Handler):
+        def emit(self, record):
+            records.append(record)
+
+    recorder = Recorder()
+    recorder.addFilter(CorrelationIdFilter())
+    logger = logging.getLogger("framework.middleware.correlation_id")
+    logger.addHandler(recorder)
+    logger.setLevel(logging.INFO)
+    try:
+        response = client.get("/recipes_sections/7", headers={"X-Trace-Id": "trace-123"})
+        generated = client.get("/recipes_sections/7").headers["x-correlation-id"]
+    finally:
+        logger.removeHandler(recorder)
+        logger.setLevel(logging.NOTSET)
+    assert response.headers["x-correlation-id"] == "trace-123"
+    assert len(generated) == 32
+    assert [record.correlation_id for record in records] == ["trace-123", generated]
+    assert correlation_id_var.get() == "N/A"